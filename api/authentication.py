@@ -0,0 +1,76 @@
+import threading
+import time
+
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+from . import cache
+from .models import User
+
+
+class UserCache:
+    """
+    Per-process cache of user rows by id. Every entry remembers the
+    version of its user, read from the version store shared by all
+    processes, so an entry is dropped as soon as any process bumps that
+    version, not only when its TTL runs out.
+    """
+
+    def __init__(self, ttl, maxsize):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.field_names = [field.attname
+                            for field in User._meta.concrete_fields]
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def version(self, user_id):
+        return cache.get_versions(cache.USER.format(user_id))[0]
+
+    def get(self, user_id, version):
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        db, values, cached_version, expires = entry
+        if cached_version != version or expires < time.monotonic():
+            self.forget(user_id)
+            return None
+        # A fresh instance per request, so that changes made while
+        # handling one request never leak into another.
+        return User.from_db(db, self.field_names, values)
+
+    def set(self, user, version):
+        values = [getattr(user, name) for name in self.field_names]
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            if len(self._entries) >= self.maxsize:
+                self._entries.clear()
+            self._entries[user.pk] = (user._state.db, values, version,
+                                      expires)
+
+    def forget(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache(ttl=settings.AUTH_USER_CACHE_TTL,
+                       maxsize=settings.AUTH_USER_CACHE_SIZE)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+        version = user_cache.version(user_id)
+        user = user_cache.get(user_id, version)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(user, version)
+        return user
@@ -0,0 +1,105 @@
+from io import BytesIO
+from urllib.parse import urlsplit
+
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import transaction
+from django.urls import Resolver404, resolve
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .renderers import FastJSONRenderer
+from .throttling import BurstNonEmployeeRateThrottle
+
+API_PREFIX = '/api/'
+BATCH_ROUTE = 'batch_view'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# The scope the batch view is throttled in.
+BATCH_THROTTLE_SCOPE = BurstNonEmployeeRateThrottle.default_scope
+
+
+def build_request(request, item):
+    """
+    A Django request for one item of the batch, with the headers of the
+    batch. It carries the user the batch was authenticated as and skips
+    the throttle scope the batch itself has already passed; the views in
+    other scopes, such as authentication, are throttled per item.
+    """
+    url = urlsplit(item['path'])
+    body = b''
+    if item.get('body') is not None:
+        body = FastJSONRenderer().render(item['body'])
+    environ = {key: value for key, value in request.META.items()
+               if not key.startswith(('CONTENT_', 'wsgi.'))}
+    environ.update({
+        'REQUEST_METHOD': item['method'],
+        'PATH_INFO': url.path,
+        'QUERY_STRING': url.query,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.input': BytesIO(body),
+        'wsgi.url_scheme': request.scheme,
+    })
+    sub_request = WSGIRequest(environ)
+    if request.user.is_authenticated:
+        # Anonymous sub-requests have no token to decode and keep the 401
+        # answers of a missing one.
+        sub_request._force_auth_user = request.user
+        sub_request._force_auth_token = request.auth
+    sub_request.batch_throttle_scope = BATCH_THROTTLE_SCOPE
+    return sub_request
+
+
+def error(status_code, detail):
+    return {'status': status_code, 'body': {'detail': detail}}
+
+
+def dispatch(request, item):
+    """
+    Status and data of one item, handled by the view of its route. Only
+    API views can be called: they authenticate the sub-request themselves,
+    while other views rely on the middleware, which sub-requests skip.
+    """
+    sub_request = build_request(request, item)
+    if not sub_request.path_info.startswith(API_PREFIX):
+        return error(status.HTTP_404_NOT_FOUND, 'Страница не найдена.')
+    try:
+        match = resolve(sub_request.path_info)
+    except Resolver404:
+        return error(status.HTTP_404_NOT_FOUND, 'Страница не найдена.')
+    view_class = getattr(match.func, 'cls', None)
+    if view_class is None or not issubclass(view_class, APIView):
+        return error(status.HTTP_404_NOT_FOUND, 'Страница не найдена.')
+    if match.url_name == BATCH_ROUTE:
+        return error(status.HTTP_400_BAD_REQUEST,
+                     'Пакетные запросы не могут быть вложенными.')
+    sub_request.resolver_match = match
+    response = match.func(sub_request, *match.args, **match.kwargs)
+    if response.streaming:
+        return error(status.HTTP_400_BAD_REQUEST,
+                     'Потоковые ответы недоступны в пакетных запросах.')
+    if isinstance(response, Response):
+        # The data is rendered once, together with the whole batch.
+        body = response.data
+    else:
+        body = response.content.decode(response.charset)
+    return {'status': response.status_code, 'body': body}
+
+
+def run_batch(request, items):
+    """
+    Results of the items in their order. Writes run in one transaction,
+    which is rolled back if any of them fails; the index of the first
+    failed write is returned along with the results.
+    """
+    writes = [index for index, item in enumerate(items)
+              if item['method'] not in SAFE_METHODS]
+    if not writes:
+        return [dispatch(request, item) for item in items], None
+    with transaction.atomic():
+        results = [dispatch(request, item) for item in items]
+        failed = next((index for index in writes
+                       if results[index]['status'] >= 400), None)
+        if failed is not None:
+            transaction.set_rollback(True)
+    return results, failed
@@ -0,0 +1,178 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+from . import routers
+from .stores import get_version_store
+
+VERSION_KEY = 'api:version:{}'
+RESPONSE_KEY = 'api:response:{}:{}'
+
+TITLES = 'titles'
+GENRES = 'genres'
+CATEGORIES = 'categories'
+USERS = 'users'
+USER = 'user:{}'
+TITLE_REVIEWS = 'reviews:{}'
+REVIEW_COMMENTS = 'comments:{}'
+
+
+def _new_version():
+    return time.time_ns()
+
+
+def get_versions(*resources):
+    """
+    Current versions of the given resources, from the store shared by all
+    worker processes. A version is the time of the last change; a resource
+    seen for the first time gets the current time, so it never matches
+    entries cached before.
+    """
+    store = get_version_store()
+    keys = [VERSION_KEY.format(resource) for resource in resources]
+    versions = store.get_many(keys)
+    missing = {key: _new_version() for key in keys if key not in versions}
+    if missing:
+        store.add_many(missing)
+        versions.update(store.get_many(missing))
+    return tuple(versions[key] for key in keys)
+
+
+def bump_versions(*resources):
+    version = _new_version()
+    get_version_store().set_many(
+        {VERSION_KEY.format(resource): version for resource in resources}
+    )
+
+
+def normalize_query(query_params):
+    return sorted(
+        (key, sorted(value for value in values if value))
+        for key, values in query_params.lists()
+        if any(values)
+    )
+
+
+class VersionedResourceMixin:
+    """
+    Views whose output depends only on the rows of "cache_resources".
+    The versions are read once per request.
+    """
+    cache_resources = ()
+
+    def get_cache_resources(self):
+        return self.cache_resources
+
+    def get_resource_versions(self):
+        if not hasattr(self, '_resource_versions'):
+            self._resource_versions = get_versions(
+                *self.get_cache_resources()
+            )
+        return self._resource_versions
+
+    def may_be_stale(self):
+        """
+        Whether the rows may be read from a replica that has not caught up
+        with the current versions yet. Such a response must be neither
+        cached nor given the ETag of those versions.
+        """
+        return routers.may_lag(max(self.get_resource_versions()))
+
+    def get_request_fingerprint(self, request):
+        source = repr((
+            request.build_absolute_uri(request.path),
+            normalize_query(request.query_params),
+            self.get_resource_versions(),
+        ))
+        return hashlib.md5(source.encode()).hexdigest()
+
+
+class CachedResponseMixin(VersionedResourceMixin):
+    """
+    Caches the serialized data of successful responses. Entries are keyed
+    by the resource versions, so bumping a version invalidates every
+    response built from that resource.
+    """
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        key = RESPONSE_KEY.format(self.basename,
+                                  self.get_request_fingerprint(request))
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200 and not self.may_be_stale():
+            cache.set(key, response.data,
+                      settings.API_RESPONSE_CACHE_TIMEOUT)
+        return response
+
+
+class CachedListMixin(CachedResponseMixin):
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+
+class CachedRetrieveMixin(CachedResponseMixin):
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args,
+                                    **kwargs)
+
+
+class ConditionalResponseMixin(VersionedResourceMixin):
+    """
+    Answers If-None-Match and If-Modified-Since from the resource versions
+    alone, before any queryset is evaluated.
+    """
+
+    def get_last_modified(self):
+        """
+        The newest version in whole seconds, or None while it is less than
+        a second old: a later change in the same second would share the
+        HTTP date and be answered with 304.
+        """
+        newest = max(self.get_resource_versions())
+        if _new_version() - newest < 10 ** 9:
+            return None
+        return newest // 10 ** 9
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        fingerprint = self.get_request_fingerprint(request)
+        accept = request.META.get('HTTP_ACCEPT', '')
+        etag = quote_etag(
+            hashlib.md5(f'{fingerprint}:{accept}'.encode()).hexdigest()
+        )
+        last_modified = self.get_last_modified()
+        # If-None-Match takes precedence over If-Modified-Since.
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if not_modified is not None:
+            not_modified['ETag'] = etag
+            return not_modified
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200 and not self.may_be_stale():
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
+
+
+class ConditionalListMixin(ConditionalResponseMixin):
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(super().list, request, *args,
+                                         **kwargs)
+
+
+class ConditionalRetrieveMixin(ConditionalResponseMixin):
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(super().retrieve, request, *args,
+                                         **kwargs)
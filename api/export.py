@@ -0,0 +1,23 @@
+from .importers import chunked
+from .renderers import FastJSONRenderer
+from .serializers import TITLE_COLUMNS, TitleRowSerializer
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+def iter_title_data(queryset, chunk_size=None):
+    """
+    Titles in the TitlesSafeMethodSerializer format, read through a
+    server-side cursor with one genre query per chunk, or a few where the
+    database limits the number of query parameters.
+    """
+    chunk_size = chunk_size or EXPORT_CHUNK_SIZE
+    rows = queryset.values(*TITLE_COLUMNS).iterator(chunk_size=chunk_size)
+    for chunk in chunked(rows, chunk_size):
+        yield from TitleRowSerializer(chunk, many=True).data
+
+
+def iter_ndjson(items):
+    renderer = FastJSONRenderer()
+    for item in items:
+        yield renderer.render(item) + b'\n'
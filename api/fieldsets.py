@@ -0,0 +1,86 @@
+from rest_framework.exceptions import ValidationError
+
+FIELDS_PARAM = 'fields'
+OMIT_PARAM = 'omit'
+
+
+def parse_names(query_params, param):
+    return {name.strip()
+            for value in query_params.getlist(param)
+            for name in value.split(',') if name.strip()}
+
+
+def get_requested_fields(query_params, available):
+    """
+    Names of "available" kept by ?fields=a,b and ?omit=c, in the order of
+    "available", or None when neither parameter is passed.
+    """
+    requested = parse_names(query_params, FIELDS_PARAM)
+    omitted = parse_names(query_params, OMIT_PARAM)
+    if not requested and not omitted:
+        return None
+    unknown = (requested | omitted) - set(available)
+    if unknown:
+        raise ValidationError({
+            FIELDS_PARAM: ['Неизвестные поля: {}. Доступные поля: {}.'.format(
+                ', '.join(sorted(unknown)), ', '.join(available)
+            )]
+        })
+    return tuple(name for name in available
+                 if (not requested or name in requested)
+                 and name not in omitted)
+
+
+class SparseFieldsSerializerMixin:
+    """Serializer that drops the fields missing from its "fields" argument."""
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class SparseFieldsetMixin:
+    """
+    Sparse fieldsets for the "sparse_actions". "sparse_fields" maps every
+    field of the output to the lookups it is built from; the queryset is
+    narrowed to them with only(), and a relation is joined only when one
+    of the requested fields needs it.
+    """
+    sparse_actions = ('list', 'retrieve')
+    sparse_fields = {}
+
+    def get_sparse_fields(self):
+        """The requested field names, or None for the whole output."""
+        if self.action not in self.sparse_actions:
+            return None
+        if not hasattr(self, '_sparse_fields'):
+            self._sparse_fields = get_requested_fields(
+                self.request.query_params, tuple(self.sparse_fields)
+            )
+        return self._sparse_fields
+
+    def get_sparse_lookups(self):
+        fields = self.get_sparse_fields()
+        if fields is None:
+            fields = self.sparse_fields
+        return {lookup for name in fields
+                for lookup in self.sparse_fields[name]}
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        lookups = self.get_sparse_lookups()
+        related = {lookup.rsplit('__', 1)[0] for lookup in lookups
+                   if '__' in lookup}
+        if related:
+            queryset = queryset.select_related(*related)
+        if self.get_sparse_fields() is None:
+            return queryset
+        return queryset.only(*lookups)
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_sparse_fields()
+        if fields is not None:
+            kwargs['fields'] = fields
+        return super().get_serializer(*args, **kwargs)
@@ -1,13 +1,67 @@
-from django_filters import CharFilter, FilterSet
+from django_filters import (BaseInFilter, CharFilter, ChoiceFilter, FilterSet,
+                            NumberFilter, OrderingFilter)
+from django_filters.constants import EMPTY_VALUES
 
 from .models import Title
+from .search import search_titles
+
+
+GENRE_MODE_ANY = 'any'
+GENRE_MODE_ALL = 'all'
+GENRE_MODES = ((GENRE_MODE_ANY, 'любой из жанров'),
+               (GENRE_MODE_ALL, 'все жанры'))
+
+
+class CharInFilter(BaseInFilter, CharFilter):
+    pass
+
+
+class TitleOrderingFilter(OrderingFilter):
+    """
+    Ordering with ties broken by id in the direction of the last field, so
+    that pages are stable and follow the (column, id) indexes.
+    """
+
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        ordering = [self.get_ordering_value(param) for param in value]
+        return qs.order_by(
+            *ordering, '-id' if ordering[-1].startswith('-') else 'id'
+        )
 
 
 class TitlesFilter(FilterSet):
-    genre = CharFilter(field_name='genre__slug')
+    genre = CharInFilter(method='filter_genre')
+    genre_mode = ChoiceFilter(choices=GENRE_MODES, method='filter_genre_mode')
     category = CharFilter(field_name='category__slug')
     name = CharFilter(field_name='name', lookup_expr='icontains')
+    search = CharFilter(method='filter_search')
+    year_min = NumberFilter(field_name='year', lookup_expr='gte')
+    year_max = NumberFilter(field_name='year', lookup_expr='lte')
+    rating_min = NumberFilter(field_name='rating_mean', lookup_expr='gte')
+    rating_max = NumberFilter(method='filter_rating_max')
+    # Declared last: an explicit ordering replaces the search rank.
+    ordering = TitleOrderingFilter(fields=(
+        ('rating_mean', 'rating'), ('year', 'year'), ('name', 'name'),
+    ))
 
     class Meta:
         model = Title
-        fields = ('name', 'year', 'genre', 'category')
+        fields = ('name', 'year', 'genre', 'category', 'search')
+
+    def filter_genre(self, queryset, name, value):
+        mode = self.form.cleaned_data.get('genre_mode') or GENRE_MODE_ANY
+        return queryset.with_genres(value,
+                                    match_all=mode == GENRE_MODE_ALL)
+
+    def filter_genre_mode(self, queryset, name, value):
+        # Applied by filter_genre.
+        return queryset
+
+    def filter_search(self, queryset, name, value):
+        return search_titles(queryset, value)
+
+    def filter_rating_max(self, queryset, name, value):
+        # Titles without reviews are stored with a rating of 0.
+        return queryset.filter(rating_mean__gt=0, rating_mean__lte=value)
@@ -0,0 +1,178 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.core.mail import get_connection
+
+logger = logging.getLogger(__name__)
+
+
+class MailQueue:
+    """
+    Bounded in-process queue of outgoing emails. Worker threads take up to
+    "batch_size" messages at a time and send them over one connection,
+    retrying the messages that failed with exponential backoff.
+    """
+
+    def __init__(self, maxsize=1000, workers=2, batch_size=50,
+                 max_retries=3, retry_backoff=1.0, connection_factory=None):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.connection_factory = connection_factory or get_connection
+        self._queue = queue.Queue(maxsize)
+        self._threads = []
+        self._lock = threading.Lock()
+        self._stats = {
+            'sent': 0,
+            'failed': 0,
+            'dropped': 0,
+            'retries': 0,
+            'batches': 0,
+            'latency_sum': 0.0,
+            'latency_max': 0.0,
+        }
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            maxsize=settings.EMAIL_QUEUE_SIZE,
+            workers=settings.EMAIL_QUEUE_WORKERS,
+            batch_size=settings.EMAIL_QUEUE_BATCH_SIZE,
+            max_retries=settings.EMAIL_QUEUE_MAX_RETRIES,
+            retry_backoff=settings.EMAIL_QUEUE_RETRY_BACKOFF,
+        )
+
+    def _start(self):
+        # Threads are started lazily so that every forked worker process
+        # gets its own.
+        with self._lock:
+            self._threads = [thread for thread in self._threads
+                             if thread.is_alive()]
+            for number in range(len(self._threads), self.workers):
+                thread = threading.Thread(target=self._work, daemon=True,
+                                          name=f'mail-queue-{number}')
+                thread.start()
+                self._threads.append(thread)
+
+    def enqueue(self, message):
+        """Queue an EmailMessage; False if the queue is full."""
+        if (len(self._threads) < self.workers
+                or not all(thread.is_alive() for thread in self._threads)):
+            self._start()
+        try:
+            self._queue.put_nowait((message, time.monotonic()))
+        except queue.Full:
+            self._count('dropped')
+            logger.warning('Очередь писем переполнена, письмо для %s '
+                           'не отправлено', ', '.join(message.to))
+            return False
+        return True
+
+    def _count(self, name, value=1):
+        with self._lock:
+            self._stats[name] += value
+
+    def _take_batch(self):
+        batch = [self._queue.get()]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _send_once(self, messages):
+        """
+        Send the messages one by one over a single connection and return
+        those that were not sent.
+        """
+        failed = []
+        unsent = list(messages)
+        try:
+            with self.connection_factory() as connection:
+                while unsent:
+                    message = unsent.pop(0)
+                    try:
+                        if not connection.send_messages([message]):
+                            failed.append(message)
+                    except Exception:
+                        logger.warning('Не удалось отправить письмо для %s',
+                                       ', '.join(message.to), exc_info=True)
+                        failed.append(message)
+        except Exception:
+            logger.warning('Ошибка соединения с почтовым сервером',
+                           exc_info=True)
+        return failed + unsent
+
+    def _send(self, messages):
+        """Send the messages; return those that failed every retry."""
+        for attempt in range(self.max_retries + 1):
+            messages = self._send_once(messages)
+            if not messages:
+                break
+            if attempt == self.max_retries:
+                logger.error('Не удалось отправить %s писем', len(messages))
+                break
+            self._count('retries')
+            time.sleep(self.retry_backoff * 2 ** attempt)
+        return messages
+
+    def _work(self):
+        while True:
+            batch = self._take_batch()
+            try:
+                failed = self._send([message for message, _ in batch])
+                now = time.monotonic()
+                latencies = [now - queued_at for _, queued_at in batch]
+                with self._lock:
+                    self._stats['batches'] += 1
+                    self._stats['sent'] += len(batch) - len(failed)
+                    self._stats['failed'] += len(failed)
+                    self._stats['latency_sum'] += sum(latencies)
+                    self._stats['latency_max'] = max(
+                        self._stats['latency_max'], *latencies
+                    )
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def flush(self, timeout=None):
+        """Wait until every queued message has been handled."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = (None if deadline is None
+                             else deadline - time.monotonic())
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        handled = stats['sent'] + stats['failed']
+        stats['depth'] = self._queue.qsize()
+        stats['latency_avg'] = (stats['latency_sum'] / handled
+                                if handled else 0.0)
+        return stats
+
+
+_mail_queue = None
+_mail_queue_lock = threading.Lock()
+
+
+def get_mail_queue():
+    global _mail_queue
+    if _mail_queue is None:
+        with _mail_queue_lock:
+            if _mail_queue is None:
+                _mail_queue = MailQueue.from_settings()
+                atexit.register(_mail_queue.flush,
+                                settings.EMAIL_QUEUE_SHUTDOWN_TIMEOUT)
+    return _mail_queue
@@ -0,0 +1,185 @@
+import re
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from api.models import Genre, Review, Title
+
+LARGE_TABLES = ('api_title', 'api_title_genre', 'api_review', 'api_comment')
+
+SEQUENTIAL_SCAN = {
+    # "SCAN t USING INDEX i" walks an index and "SCAN t VIRTUAL TABLE" is
+    # the full-text index; only a bare SCAN reads the whole table.
+    'sqlite': re.compile(r'^SCAN (?:TABLE )?"?(\w+)"?(?: AS \w+)?$'),
+    'postgresql': re.compile(r'Seq Scan on "?(\w+)"?'),
+}
+
+NO_CACHE = {'default': {
+    'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+}}
+
+
+def find_sequential_scans(vendor, plan, tables):
+    pattern = SEQUENTIAL_SCAN.get(vendor)
+    if pattern is None:
+        raise CommandError(f'Разбор планов для {vendor} не поддерживается.')
+    scans = []
+    for line in plan:
+        match = pattern.search(line.strip())
+        if match and match.group(1) in tables:
+            scans.append(match.group(1))
+    return scans
+
+
+class Command(BaseCommand):
+    help = ('Выполняет EXPLAIN для запросов, которые строят представления '
+            'API, и завершается с ошибкой при последовательном чтении '
+            'больших таблиц.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tables', nargs='+', default=LARGE_TABLES,
+            help='Таблицы, которые нельзя читать целиком.'
+        )
+
+    def get_checks(self):
+        """Requests and lookups for every indexed access path of the API."""
+        client = Client()
+        checks = []
+        title = Title.objects.filter(category__isnull=False,
+                                     year__isnull=False).first()
+        if title is not None:
+            checks += [
+                ('title-list: category + year', lambda: client.get(
+                    '/api/v1/titles/',
+                    {'category': title.category.slug, 'year': title.year}
+                )),
+                ('title-list: top rated', lambda: client.get(
+                    '/api/v1/titles/', {'ordering': '-rating'}
+                )),
+                ('title-list: category + top rated', lambda: client.get(
+                    '/api/v1/titles/',
+                    {'category': title.category.slug, 'ordering': '-rating'}
+                )),
+                ('title-list: rating range', lambda: client.get(
+                    '/api/v1/titles/',
+                    {'rating_min': 7, 'rating_max': 9, 'ordering': '-rating'}
+                )),
+            ]
+        genre = Genre.objects.first()
+        if genre is not None:
+            checks += [
+                ('title-list: genre', lambda: client.get(
+                    '/api/v1/titles/', {'genre': genre.slug}
+                )),
+                ('title-list: genre + top rated', lambda: client.get(
+                    '/api/v1/titles/', {'genre': genre.slug,
+                                        'ordering': '-rating'}
+                )),
+            ]
+            slugs = ','.join(Genre.objects.values_list('slug', flat=True)[:3])
+            checks += [
+                ('title-list: any of genres', lambda: client.get(
+                    '/api/v1/titles/', {'genre': slugs}
+                )),
+                ('title-list: all of genres', lambda: client.get(
+                    '/api/v1/titles/', {'genre': slugs, 'genre_mode': 'all'}
+                )),
+            ]
+        review = Review.objects.first()
+        if review is not None:
+            checks += [
+                ('review-list', lambda: client.get(
+                    f'/api/v1/titles/{review.title_id}/reviews/'
+                )),
+                ('comment-list', lambda: client.get(
+                    f'/api/v1/titles/{review.title_id}/reviews/'
+                    f'{review.id}/comments/'
+                )),
+                ('review validation: title + author', lambda: Review.objects
+                 .filter(title_id=review.title_id,
+                         author_id=review.author_id).exists()),
+            ]
+        return checks
+
+    def explain(self, connection, sql):
+        prefix = connection.ops.explain_query_prefix()
+        with connection.cursor() as cursor:
+            cursor.execute(f'{prefix} {sql}')
+            return [str(row[-1]) for row in cursor.fetchall()]
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        checks = self.get_checks()
+        if not checks:
+            raise CommandError('В базе нет данных для построения запросов.')
+        # API reads may be routed to any replica, so queries are captured
+        # and explained on the database that actually ran them.
+        aliases = [DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS]
+        failures = []
+        with override_settings(CACHES=NO_CACHE):
+            for name, run in checks:
+                with ExitStack() as stack:
+                    contexts = {
+                        alias: stack.enter_context(
+                            CaptureQueriesContext(connections[alias])
+                        )
+                        for alias in aliases
+                    }
+                    run()
+                failures += self.check_queries(
+                    name,
+                    {alias: context.captured_queries
+                     for alias, context in contexts.items()},
+                    options['tables'],
+                )
+        if failures:
+            raise CommandError(
+                'Проверка планов запросов не пройдена:\n'
+                + '\n'.join(failures)
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено путей доступа: {len(checks)}, '
+            f'последовательного чтения нет.'
+        ))
+
+    def check_queries(self, name, queries, tables):
+        """Explain the SELECTs captured on every database alias."""
+        failures = []
+        selects = {
+            alias: [query['sql'] for query in captured
+                    if query['sql'].lstrip().upper().startswith('SELECT')]
+            for alias, captured in queries.items()
+        }
+        if not any(selects.values()):
+            return [f'{name}: не выполнено ни одного запроса SELECT']
+        for alias, sqls in selects.items():
+            if sqls:
+                failures += self.check_plans(name, connections[alias], sqls,
+                                             tables)
+        return failures
+
+    def check_plans(self, name, connection, selects, tables):
+        if connection.vendor == 'postgresql':
+            # On a small database a sequential scan is always cheapest;
+            # this leaves it only where no index can be used at all.
+            with connection.cursor() as cursor:
+                cursor.execute('SET enable_seqscan = off')
+        failures = []
+        try:
+            for sql in selects:
+                plan = self.explain(connection, sql)
+                scans = find_sequential_scans(connection.vendor, plan, tables)
+                if scans:
+                    failures.append(f'{name}: {", ".join(scans)}\n  {sql}')
+                elif self.verbosity > 1:
+                    self.stdout.write(f'{name}:\n  ' + '\n  '.join(plan))
+        finally:
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('RESET enable_seqscan')
+        return failures
@@ -0,0 +1,75 @@
+import csv
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.importers import DEFAULT_CHUNK_SIZE, CatalogueImporter, ImportRowError
+
+# Порядок важен: каждая следующая сущность ссылается на предыдущие.
+SOURCES = ('users', 'categories', 'genres', 'titles', 'reviews', 'comments')
+
+
+def read_rows(path):
+    """Stream rows of a CSV file with a header or of a JSON Lines file."""
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, encoding='utf-8', newline='') as file:
+        if extension == '.csv':
+            yield from csv.DictReader(file)
+        elif extension in ('.jsonl', '.ndjson'):
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            raise CommandError(
+                f'Неизвестный формат файла {path}: ожидается .csv или .jsonl'
+            )
+
+
+class Command(BaseCommand):
+    help = ('Потоково загружает пользователей, категории, жанры, '
+            'произведения, отзывы и комментарии из CSV или JSON Lines.')
+
+    def add_arguments(self, parser):
+        for source in SOURCES:
+            parser.add_argument(f'--{source}', metavar='PATH',
+                                help=f'Файл с данными: {source}.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+            help='Количество строк в одном bulk_create.'
+        )
+        parser.add_argument(
+            '--ignore-conflicts', action='store_true',
+            help='Пропускать строки, нарушающие ограничения уникальности.'
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size должен быть положительным.')
+        sources = [source for source in SOURCES if options[source]]
+        if not sources:
+            raise CommandError('Укажите хотя бы один файл для загрузки.')
+        importer = CatalogueImporter(
+            chunk_size=options['chunk_size'],
+            ignore_conflicts=options['ignore_conflicts'],
+            progress=self.report_progress if options['verbosity'] > 1
+            else None,
+        )
+        try:
+            for source in sources:
+                load = getattr(importer, f'import_{source}')
+                total, seconds = load(read_rows(options[source]))
+                self.stdout.write(self.style.SUCCESS(
+                    f'{source}: {total} строк за {seconds:.1f} с '
+                    f'({total / max(seconds, 1e-6):.0f} строк/с)'
+                ))
+        except (ImportRowError, KeyError, ValueError) as error:
+            raise CommandError(f'{source}: {error!r}')
+        finally:
+            importer.finish()
+
+    def report_progress(self, model, total, seconds):
+        self.stdout.write(
+            f'  {model._meta.verbose_name_plural}: {total} строк, '
+            f'{total / max(seconds, 1e-6):.0f} строк/с'
+        )
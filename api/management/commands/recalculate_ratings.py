@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api import cache
+from api.models import Review, Title
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает сохранённые суммы, количества и гистограммы '
+            'оценок произведений по отзывам и счётчики комментариев '
+            'отзывов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Только проверить расхождения, ничего не изменяя.'
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            drifted_titles = Title.objects.with_rating_drift().count()
+            drifted_reviews = set(
+                Review.objects.with_comments_count_drift().values_list(
+                    'title_id', 'id'
+                ).iterator()
+            )
+            if options['check']:
+                if drifted_titles or drifted_reviews:
+                    raise CommandError(
+                        f'Рейтинг расходится с отзывами у {drifted_titles} '
+                        f'произведений, счётчик комментариев — у '
+                        f'{len(drifted_reviews)} отзывов.'
+                    )
+                self.stdout.write('Расхождений рейтинга и счётчиков не '
+                                  'найдено.')
+                return
+            titles = Title.objects.recalculate_ratings()
+            reviews = Review.objects.recalculate_comments_counts()
+            # Review lists show comments_count.
+            resources = {cache.TITLE_REVIEWS.format(title_id)
+                         for title_id, _ in drifted_reviews}
+            transaction.on_commit(
+                lambda: cache.bump_versions(cache.TITLES, *resources)
+            )
+        drifted = drifted_titles + len(drifted_reviews)
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано произведений: {titles}, отзывов: {reviews}, '
+            f'исправлено расхождений: {drifted}.'
+        ))
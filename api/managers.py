@@ -1,5 +1,28 @@
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import AbstractUser, UserManager
+from django.db import connections, models, transaction
+from django.db.models import (Count, Exists, F, Max, OuterRef, Subquery,
+                              Sum)
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+SCORES = range(1, 11)
+
+
+def histogram_field(score):
+    """Title column counting the reviews with this score."""
+    return f'score_{score}'
+
+
+HISTOGRAM_FIELDS = tuple(histogram_field(score) for score in SCORES)
+
+
+def mean_score(rating_sum, rating_count):
+    """Expression of the stored rating: the mean score, 0 without reviews."""
+    return Coalesce(
+        Cast(rating_sum, models.FloatField())
+        / Cast(NullIf(rating_count, 0), models.FloatField()),
+        models.Value(0.0, output_field=models.FloatField())
+    )
 
 
 class APIUserManager(UserManager):
@@ -16,3 +39,130 @@ class APIUserManager(UserManager):
         extra_fields['role'] = 'admin'
         return super().create_superuser(username=username, email=email,
                                         password=password, **extra_fields)
+
+
+class BulkCreateQuerySet(models.QuerySet):
+
+    def bulk_create_with_pks(self, objs, batch_size=None):
+        """
+        bulk_create() that fills in primary keys on every backend. Where the
+        database cannot return them, the rows of one transaction get
+        consecutive autoincrement keys ending at the current maximum: the
+        write lock is held from the first INSERT until the MAX() query.
+        """
+        objs = list(objs)
+        features = connections[self.db].features
+        if features.can_return_rows_from_bulk_insert:
+            return self.bulk_create(objs, batch_size=batch_size)
+        missing = [obj for obj in objs if obj.pk is None]
+        with transaction.atomic(using=self.db):
+            self.bulk_create(objs, batch_size=batch_size)
+            if missing:
+                last_pk = self.aggregate(last_pk=Max('pk'))['last_pk']
+                first_pk = last_pk - len(missing) + 1
+                for pk, obj in enumerate(missing, start=first_pk):
+                    obj.pk = pk
+        return objs
+
+
+class ReviewQuerySet(models.QuerySet):
+
+    def update_comments_count(self, review_id, count_delta):
+        """Add (1) or remove (-1) one comment in the stored counter."""
+        return self.filter(pk=review_id).update(
+            comments_count=F('comments_count') + count_delta
+        )
+
+    def _actual_comments_count(self):
+        comments = self.model._meta.get_field('comments').related_model
+        return Coalesce(Subquery(
+            comments.objects.filter(review=OuterRef('pk')).order_by()
+            .values('review').annotate(total=Count('id')).values('total')
+        ), 0)
+
+    def with_comments_count_drift(self):
+        """Reviews whose stored counter differs from their comments."""
+        return self.annotate(
+            actual_comments_count=self._actual_comments_count()
+        ).exclude(comments_count=F('actual_comments_count'))
+
+    def recalculate_comments_counts(self):
+        """Rebuild the stored counters from the comments in one UPDATE."""
+        return self.update(comments_count=self._actual_comments_count())
+
+
+class TitleQuerySet(BulkCreateQuerySet):
+
+    def update_rating(self, title_id, score, count_delta):
+        """
+        Add (count_delta=1) or remove (-1) one score in the stored rating
+        counters, mean and histogram of a title, in one UPDATE.
+        F-expressions keep concurrent review writes from overwriting each
+        other; every expression reads the values from before the UPDATE.
+        """
+        field = histogram_field(score)
+        rating_sum = F('rating_sum') + score * count_delta
+        rating_count = F('rating_count') + count_delta
+        return self.filter(pk=title_id).update(**{
+            'rating_sum': rating_sum,
+            'rating_count': rating_count,
+            'rating_mean': mean_score(rating_sum, rating_count),
+            field: F(field) + count_delta,
+        })
+
+    def with_genres(self, slugs, match_all=False):
+        """
+        Titles with any (or, with match_all, every) of the genre slugs,
+        selected by id from the through table rather than joined to it, so
+        no title is repeated and COUNT() of the result is the number of
+        titles. For every genre the rows of one genre are read and the
+        others are checked by EXISTS on the (title_id, genre_id) index.
+        """
+        through = self.model.genre.through.objects
+        slugs = sorted(set(slugs))
+        if not match_all:
+            return self.filter(pk__in=through.filter(
+                genre__slug__in=slugs
+            ).values('title_id'))
+        matches = through.filter(genre__slug=slugs[0])
+        for slug in slugs[1:]:
+            matches = matches.filter(Exists(through.filter(
+                title_id=OuterRef('title_id'), genre__slug=slug
+            )))
+        return self.filter(pk__in=matches.values('title_id'))
+
+    def _actual_rating_expressions(self):
+        reviews = self.model._meta.get_field('reviews').related_model.objects
+        per_title = reviews.filter(title=OuterRef('pk')).order_by().values(
+            'title'
+        )
+
+        def total(queryset, aggregate):
+            return Coalesce(Subquery(
+                queryset.annotate(total=aggregate).values('total')
+            ), 0)
+
+        rating_sum = total(per_title, Sum('score'))
+        rating_count = total(per_title, Count('id'))
+        expressions = {
+            'rating_sum': rating_sum,
+            'rating_count': rating_count,
+            'rating_mean': mean_score(rating_sum, rating_count),
+        }
+        for score in SCORES:
+            expressions[histogram_field(score)] = total(
+                per_title.filter(score=score), Count('id')
+            )
+        return expressions
+
+    def with_rating_drift(self):
+        """Titles whose stored counters differ from their reviews."""
+        expressions = self._actual_rating_expressions()
+        return self.annotate(**{
+            f'actual_{field}': expression
+            for field, expression in expressions.items()
+        }).exclude(**{field: F(f'actual_{field}') for field in expressions})
+
+    def recalculate_ratings(self):
+        """Rebuild the stored counters from the reviews in one UPDATE."""
+        return self.update(**self._actual_rating_expressions())
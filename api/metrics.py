@@ -0,0 +1,216 @@
+import atexit
+import bisect
+import logging
+import re
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from rest_framework.renderers import BaseRenderer
+
+from .stores import SQLiteFileStore
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+UNMATCHED_ROUTE = 'unmatched'
+OTHER_METHOD = 'other'
+HTTP_METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE',
+                          'OPTIONS', 'TRACE', 'CONNECT'))
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+                    5.0, 10.0)
+
+# name: (type, help)
+FAMILIES = {
+    'api_requests_total': (
+        'counter', 'Обработанные запросы.'),
+    'api_request_duration_seconds': (
+        'histogram', 'Время обработки запроса.'),
+    'api_db_queries_total': (
+        'counter', 'Запросы к базе данных.'),
+    'api_db_duration_seconds_total': (
+        'counter', 'Время выполнения запросов к базе данных.'),
+    'api_response_bytes_total': (
+        'counter', 'Размер тел ответов.'),
+    'api_throttled_requests_total': (
+        'counter', 'Запросы, отклонённые ограничением частоты.'),
+}
+HISTOGRAM_SUFFIX = re.compile(r'_(bucket|sum|count)$')
+LE_LABEL = re.compile(r',?le="([^"]+)"')
+
+
+def format_labels(**labels):
+    return ','.join(
+        '{}="{}"'.format(key, str(value).replace('\\', r'\\')
+                         .replace('"', r'\"').replace('\n', r'\n'))
+        for key, value in labels.items()
+    )
+
+
+def route_name(request):
+    """The URL name of the resolved route, the label of every series."""
+    match = getattr(request, 'resolver_match', None)
+    return getattr(match, 'url_name', None) or UNMATCHED_ROUTE
+
+
+def method_name(request):
+    """
+    The HTTP method as a label; any other method a client sends is counted
+    as "other", so clients cannot create new series.
+    """
+    return request.method if request.method in HTTP_METHODS else OTHER_METHOD
+
+
+class MetricsStore(SQLiteFileStore):
+    """
+    Series summed over every worker process of the host. Processes add
+    their increments in one upsert per flush.
+    """
+    schema = (
+        'CREATE TABLE IF NOT EXISTS series ('
+        'name TEXT NOT NULL, labels TEXT NOT NULL, value REAL NOT NULL, '
+        'PRIMARY KEY (name, labels)) WITHOUT ROWID',
+    )
+
+    def add(self, increments):
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.executemany(
+                'INSERT INTO series (name, labels, value) VALUES (?, ?, ?) '
+                'ON CONFLICT (name, labels) '
+                'DO UPDATE SET value = value + excluded.value',
+                [(name, labels, value)
+                 for (name, labels), value in increments.items()]
+            )
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+
+    def series(self):
+        return self._connection().execute(
+            'SELECT name, labels, value FROM series'
+        ).fetchall()
+
+    def clear(self):
+        self._connection().execute('DELETE FROM series')
+
+
+class Metrics:
+    """
+    Increments are collected in memory and written to the shared store at
+    most once per "flush_interval" seconds, so a request costs a few dict
+    updates.
+    """
+
+    def __init__(self, store, flush_interval=5.0):
+        self.store = store
+        self.flush_interval = flush_interval
+        self._pending = defaultdict(float)
+        self._lock = threading.Lock()
+        self._flushed = time.monotonic()
+
+    def _add(self, name, labels, value=1):
+        self._pending[name, labels] += value
+
+    def observe_request(self, route, method, status, duration, queries,
+                        db_duration, size):
+        labels = format_labels(route=route)
+        bucket = bisect.bisect_left(DURATION_BUCKETS, duration)
+        with self._lock:
+            self._add('api_requests_total', format_labels(
+                route=route, method=method, status=status
+            ))
+            for le in DURATION_BUCKETS[bucket:]:
+                self._add('api_request_duration_seconds_bucket',
+                          f'{labels},le="{le}"')
+            self._add('api_request_duration_seconds_bucket',
+                      f'{labels},le="+Inf"')
+            self._add('api_request_duration_seconds_sum', labels, duration)
+            self._add('api_request_duration_seconds_count', labels)
+            self._add('api_db_queries_total', labels, queries)
+            self._add('api_db_duration_seconds_total', labels, db_duration)
+            self._add('api_response_bytes_total', labels, size)
+        self.maybe_flush()
+
+    def observe_throttled(self, route, scope):
+        with self._lock:
+            self._add('api_throttled_requests_total',
+                      format_labels(route=route, scope=scope))
+        self.maybe_flush()
+
+    def maybe_flush(self):
+        if time.monotonic() - self._flushed >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(float)
+            self._flushed = time.monotonic()
+        if not pending:
+            return
+        try:
+            self.store.add(pending)
+        except Exception:
+            logger.exception('Не удалось сохранить метрики')
+            with self._lock:
+                for key, value in pending.items():
+                    self._pending[key] += value
+
+    def render(self):
+        """All series of the host in the Prometheus text format."""
+        self.flush()
+        families = defaultdict(list)
+        for name, labels, value in self.store.series():
+            family = name
+            if HISTOGRAM_SUFFIX.sub('', name) in FAMILIES:
+                family = HISTOGRAM_SUFFIX.sub('', name)
+            families[family].append((name, labels, value))
+        lines = []
+        for family, (kind, description) in FAMILIES.items():
+            lines += [f'# HELP {family} {description}',
+                      f'# TYPE {family} {kind}']
+            for name, labels, value in sorted(families[family],
+                                              key=self._series_order):
+                if value.is_integer():
+                    value = int(value)
+                lines.append(f'{name}{{{labels}}} {value}')
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _series_order(series):
+        name, labels, _ = series
+        le = LE_LABEL.search(labels)
+        return (LE_LABEL.sub('', labels), name,
+                float(le.group(1)) if le else 0)
+
+
+_metrics = {}
+_metrics_lock = threading.Lock()
+
+
+def get_metrics():
+    path = settings.METRICS_STORE_PATH
+    if path not in _metrics:
+        with _metrics_lock:
+            if path not in _metrics:
+                metrics = Metrics(MetricsStore(path),
+                                  settings.METRICS_FLUSH_INTERVAL)
+                atexit.register(metrics.flush)
+                _metrics[path] = metrics
+    return _metrics[path]
+
+
+class PrometheusRenderer(BaseRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict):
+            # Errors such as a denied permission.
+            data = '\n'.join(f'{key}: {value}' for key, value in data.items())
+        return data.encode(self.charset)
@@ -0,0 +1,76 @@
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+
+from .metrics import get_metrics, method_name, route_name
+
+
+class QueryCounter:
+    """Counts and times queries on every database connection."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - started
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        return self._stack.__exit__(*exc_info)
+
+
+class MetricsMiddleware:
+    """
+    Records the count, latency, database work and response size of every
+    request, labelled with the URL name of its route.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        queries = QueryCounter()
+        with queries:
+            response = self.get_response(request)
+        if response.streaming:
+            # The body, and the queries behind it, are produced only while
+            # the server sends it.
+            response.streaming_content = self.stream(
+                request, response, started, queries,
+                response.streaming_content
+            )
+        else:
+            self.observe(request, response, started, queries,
+                         len(response.content))
+        return response
+
+    def stream(self, request, response, started, queries, content):
+        size = 0
+        try:
+            with queries:
+                for chunk in content:
+                    size += len(chunk)
+                    yield chunk
+        finally:
+            self.observe(request, response, started, queries, size)
+
+    def observe(self, request, response, started, queries, size):
+        get_metrics().observe_request(
+            route=route_name(request), method=method_name(request),
+            status=response.status_code,
+            duration=time.perf_counter() - started,
+            queries=queries.count, db_duration=queries.duration, size=size,
+        )
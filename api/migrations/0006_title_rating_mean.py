@@ -0,0 +1,41 @@
+from django.db import migrations, models
+from django.db.models import F
+
+from api.managers import mean_score
+from api.search import restore_search_index
+
+
+def fill_rating_mean(apps, schema_editor):
+    Title = apps.get_model('api', 'Title')
+    Title.objects.update(
+        rating_mean=mean_score(F('rating_sum'), F('rating_count'))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_title_score_histogram'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='rating_mean',
+            field=models.FloatField(default=0, editable=False, verbose_name='Средняя оценка'),
+        ),
+        migrations.RunPython(fill_rating_mean, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['rating_mean', 'id'], name='title_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['category', 'rating_mean', 'id'], name='title_category_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['name', 'id'], name='title_name_idx'),
+        ),
+        migrations.RunPython(restore_search_index, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,33 @@
+from decimal import Decimal
+
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
 from django.db.models import CharField, EmailField, TextField, UniqueConstraint
 
-from .managers import APIUserManager
+from .managers import (SCORES, APIUserManager, ReviewQuerySet, TitleQuerySet,
+                       histogram_field)
+
+
+def calculate_rating(rating_sum, rating_count):
+    if not rating_count:
+        return None
+    return Decimal(rating_sum) / rating_count
+
+
+def histogram_median(histogram):
+    """Median score of a {score: number of reviews} histogram."""
+    total = sum(histogram.values())
+    if not total:
+        return None
+    seen, lower = 0, None
+    for score, count in sorted(histogram.items()):
+        seen += count
+        if lower is None and seen >= (total + 1) // 2:
+            lower = score
+        if seen > total // 2:
+            return (lower + score) / 2
+    return None
 
 
 class User(AbstractUser):
@@ -71,6 +95,13 @@ class Review(models.Model):
         validators=(MinValueValidator(1, 'Меньше 1 поставить нельзя'),
                     MaxValueValidator(10, 'Больше 10 поставить нельзя'))
     )
+    comments_count = models.PositiveIntegerField(
+        verbose_name='Количество комментариев',
+        default=0,
+        editable=False
+    )
+
+    objects = ReviewQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Отзыв'
@@ -81,10 +112,19 @@ class Review(models.Model):
                 fields=('author', 'title')
             ),
         )
+        indexes = (
+            models.Index(fields=('title', '-id'), name='review_title_id_idx'),
+        )
 
     def __str__(self):
         return self.text[:15]
 
+    def save(self, *args, **kwargs):
+        # The title rating counters are updated from the post_save signal,
+        # so the review row and the counters must be written together.
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     author = models.ForeignKey(User, on_delete=models.CASCADE,
@@ -99,10 +139,19 @@ class Comment(models.Model):
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = (
+            models.Index(fields=('review', '-id'),
+                         name='comment_review_id_idx'),
+        )
 
     def __str__(self):
         return self.text[:15]
 
+    def save(self, *args, **kwargs):
+        # The review counter is updated from the post_save signal.
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
 
 class CategoryAndGenreBaseModel(models.Model):
     name = models.CharField(verbose_name='Название', max_length=200,
@@ -153,11 +202,60 @@ class Title(models.Model):
         verbose_name='Категория',
         related_name='titles'
     )
+    rating_sum = models.PositiveIntegerField(
+        verbose_name='Сумма оценок',
+        default=0,
+        editable=False
+    )
+    rating_count = models.PositiveIntegerField(
+        verbose_name='Количество оценок',
+        default=0,
+        editable=False
+    )
+    # Stored for filtering and ordering by rating through an index; the
+    # API shows the exact value from rating_sum and rating_count.
+    rating_mean = models.FloatField(
+        verbose_name='Средняя оценка',
+        default=0,
+        editable=False
+    )
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         ordering = ('name',)
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
+        indexes = (
+            models.Index(fields=('category', 'year'),
+                         name='title_category_year_idx'),
+            models.Index(fields=('rating_mean', 'id'),
+                         name='title_rating_idx'),
+            models.Index(fields=('category', 'rating_mean', 'id'),
+                         name='title_category_rating_idx'),
+            models.Index(fields=('name', 'id'), name='title_name_idx'),
+        )
 
     def __str__(self):
         return self.name
+
+    @property
+    def rating(self):
+        return calculate_rating(self.rating_sum, self.rating_count)
+
+    @property
+    def score_histogram(self):
+        return {score: getattr(self, histogram_field(score))
+                for score in SCORES}
+
+    @property
+    def median_score(self):
+        return histogram_median(self.score_histogram)
+
+
+# Reviews per score, kept by TitleQuerySet.update_rating() in the same
+# UPDATE as rating_sum and rating_count.
+for score in SCORES:
+    Title.add_to_class(histogram_field(score), models.PositiveIntegerField(
+        verbose_name=f'Оценок {score}', default=0, editable=False
+    ))
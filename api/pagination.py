@@ -0,0 +1,28 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class NewestFirstCursorPagination(CursorPagination):
+    ordering = '-id'
+
+
+class PageNumberOrCursorPagination(PageNumberPagination):
+    """
+    Page-number pagination by default. Passing the "cursor" query parameter
+    (even an empty one for the first page) switches to keyset pagination by
+    "id", which needs neither COUNT nor OFFSET.
+    """
+    cursor_pagination_class = NewestFirstCursorPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        cursor_param = self.cursor_pagination_class.cursor_query_param
+        if cursor_param not in request.query_params:
+            return super().paginate_queryset(queryset, request, view)
+        self.cursor_paginator = self.cursor_pagination_class()
+        return self.cursor_paginator.paginate_queryset(queryset, request,
+                                                       view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,111 @@
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .stores import get_version_store
+
+PIN_KEY = 'api:primary:user:{}'
+REPLICA_METHODS = ('GET', 'HEAD')
+
+_state = threading.local()
+
+
+def reset():
+    """Back to the primary; called when a request starts and finishes."""
+    _state.replica = None
+    _state.written = False
+
+
+def read_from_replica():
+    """Route the reads of the current request to a random replica."""
+    if settings.DATABASE_REPLICAS and not has_written():
+        _state.replica = random.choice(settings.DATABASE_REPLICAS)
+
+
+def has_written():
+    return getattr(_state, 'written', False)
+
+
+def current_replica():
+    """The replica the reads of the current request go to, if any."""
+    replica = getattr(_state, 'replica', None)
+    if (replica is None or has_written()
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block):
+        return None
+    return replica
+
+
+def _is_recent(version):
+    """Whether the replicas may not have caught up with "version" yet."""
+    lag = settings.DATABASE_REPLICA_PIN_SECONDS * 10 ** 9
+    return time.time_ns() - version < lag
+
+
+def may_lag(version):
+    """
+    Whether the current request reads from a replica that may not have
+    caught up with a change made at "version", a time in nanoseconds.
+    """
+    return current_replica() is not None and _is_recent(version)
+
+
+def pin_user(user):
+    """
+    Keep the user on the primary until the replicas catch up. The time of
+    the write is kept in the version store, so every worker process sees
+    the pin.
+    """
+    if user.is_authenticated and settings.DATABASE_REPLICAS:
+        get_version_store().set_many({PIN_KEY.format(user.pk):
+                                      time.time_ns()})
+
+
+def is_pinned(user):
+    if not user.is_authenticated:
+        return False
+    key = PIN_KEY.format(user.pk)
+    written = get_version_store().get_many([key]).get(key)
+    return written is not None and _is_recent(written)
+
+
+class PrimaryReplicaRouter:
+    """
+    Writes go to the default database. Reads go there too, unless the
+    request has been switched to a replica by ReplicaReadMixin and has not
+    written anything yet. Reads inside a transaction stay on the primary,
+    where they see the transaction's own rows.
+    """
+
+    def db_for_read(self, model, **hints):
+        return current_replica() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        _state.written = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Every database holds the same rows as the primary.
+        return True
+
+
+class ReplicaReadMixin:
+    """
+    GET and HEAD requests read from a replica once the user is known. A
+    user who has written in the last DATABASE_REPLICA_PIN_SECONDS reads
+    from the primary, so their own reviews and comments are never missing.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (settings.DATABASE_REPLICAS
+                and request.method in REPLICA_METHODS
+                and not is_pinned(request.user)):
+            read_from_replica()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if has_written():
+            pin_user(request.user)
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,170 @@
+import re
+
+from django.db import connections
+from django.db.models import Q, Value
+
+WORD = re.compile(r'\w+')
+
+TABLE = 'api_title'
+SQLITE_INDEX = 'api_title_search'
+POSTGRES_CONFIG = 'russian'
+
+
+def _words(query):
+    return WORD.findall(query.lower())
+
+
+class SQLiteTitleSearch:
+    """
+    FTS5 external-content table over the name and description columns,
+    kept in sync by triggers. Every word of the query is a prefix match.
+    """
+    install_sql = (
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_INDEX} USING fts5("
+        f"name, description, content='{TABLE}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER IF NOT EXISTS {SQLITE_INDEX}_insert "
+        f"AFTER INSERT ON {TABLE} BEGIN "
+        f"INSERT INTO {SQLITE_INDEX}(rowid, name, description) "
+        f"VALUES (new.id, new.name, new.description); END",
+        f"CREATE TRIGGER IF NOT EXISTS {SQLITE_INDEX}_delete "
+        f"AFTER DELETE ON {TABLE} BEGIN "
+        f"INSERT INTO {SQLITE_INDEX}({SQLITE_INDEX}, rowid, name, "
+        f"description) VALUES ('delete', old.id, old.name, "
+        f"old.description); END",
+        f"CREATE TRIGGER IF NOT EXISTS {SQLITE_INDEX}_update "
+        f"AFTER UPDATE OF name, description ON {TABLE} BEGIN "
+        f"INSERT INTO {SQLITE_INDEX}({SQLITE_INDEX}, rowid, name, "
+        f"description) VALUES ('delete', old.id, old.name, "
+        f"old.description); "
+        f"INSERT INTO {SQLITE_INDEX}(rowid, name, description) "
+        f"VALUES (new.id, new.name, new.description); END",
+        f"INSERT INTO {SQLITE_INDEX}({SQLITE_INDEX}) VALUES ('rebuild')",
+    )
+    uninstall_sql = (
+        f'DROP TRIGGER IF EXISTS {SQLITE_INDEX}_insert',
+        f'DROP TRIGGER IF EXISTS {SQLITE_INDEX}_delete',
+        f'DROP TRIGGER IF EXISTS {SQLITE_INDEX}_update',
+        f'DROP TABLE IF EXISTS {SQLITE_INDEX}',
+    )
+
+    def filter(self, queryset, query):
+        match = ' '.join(
+            '"{}"*'.format(word.replace('"', '""')) for word in _words(query)
+        )
+        # Name matches weigh more than description matches; lower bm25 is
+        # a better match.
+        return queryset.extra(
+            select={'search_rank': f'-bm25({SQLITE_INDEX}, 10.0, 1.0)'},
+            tables=(SQLITE_INDEX,),
+            where=(f'{SQLITE_INDEX}.rowid = {TABLE}.id',
+                   f'{SQLITE_INDEX} MATCH %s'),
+            params=(match,),
+        )
+
+
+class PostgresTitleSearch:
+    """
+    Weighted tsvector column maintained by a trigger with a GIN index, plus
+    a trigram index on the name for misspelled queries.
+    """
+    install_sql = (
+        'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+        f'ALTER TABLE {TABLE} '
+        f'ADD COLUMN IF NOT EXISTS search_vector tsvector',
+        f"""CREATE OR REPLACE FUNCTION {TABLE}_search_vector_update()
+        RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector :=
+                setweight(to_tsvector('{POSTGRES_CONFIG}',
+                                      coalesce(NEW.name, '')), 'A')
+                || setweight(to_tsvector('{POSTGRES_CONFIG}',
+                                         coalesce(NEW.description, '')),
+                             'B');
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql""",
+        f'DROP TRIGGER IF EXISTS {TABLE}_search_vector ON {TABLE}',
+        f'CREATE TRIGGER {TABLE}_search_vector '
+        f'BEFORE INSERT OR UPDATE OF name, description ON {TABLE} '
+        f'FOR EACH ROW EXECUTE PROCEDURE {TABLE}_search_vector_update()',
+        f'UPDATE {TABLE} SET name = name',
+        f'CREATE INDEX IF NOT EXISTS {TABLE}_search_vector_idx '
+        f'ON {TABLE} USING GIN (search_vector)',
+        f'CREATE INDEX IF NOT EXISTS {TABLE}_name_trgm_idx '
+        f'ON {TABLE} USING GIN (name gin_trgm_ops)',
+    )
+    uninstall_sql = (
+        f'DROP INDEX IF EXISTS {TABLE}_name_trgm_idx',
+        f'DROP INDEX IF EXISTS {TABLE}_search_vector_idx',
+        f'DROP TRIGGER IF EXISTS {TABLE}_search_vector ON {TABLE}',
+        f'DROP FUNCTION IF EXISTS {TABLE}_search_vector_update()',
+        f'ALTER TABLE {TABLE} DROP COLUMN IF EXISTS search_vector',
+    )
+
+    def filter(self, queryset, query):
+        tsquery = ' & '.join(f'{word}:*' for word in _words(query))
+        vector_match = (f"{TABLE}.search_vector @@ "
+                        f"to_tsquery('{POSTGRES_CONFIG}', %s)")
+        return queryset.extra(
+            select={'search_rank': (
+                f"ts_rank({TABLE}.search_vector, "
+                f"to_tsquery('{POSTGRES_CONFIG}', %s)) "
+                f"+ similarity({TABLE}.name, %s)"
+            )},
+            select_params=(tsquery, query),
+            where=(f'({vector_match} OR {TABLE}.name %% %s)',),
+            params=(tsquery, query),
+        )
+
+
+class FallbackTitleSearch:
+    """Unindexed substring search for databases without a backend."""
+    install_sql = ()
+    uninstall_sql = ()
+
+    def filter(self, queryset, query):
+        condition = Q()
+        for word in _words(query):
+            condition &= (Q(name__icontains=word)
+                          | Q(description__icontains=word))
+        return queryset.filter(condition).annotate(search_rank=Value(0))
+
+
+BACKENDS = {
+    'sqlite': SQLiteTitleSearch,
+    'postgresql': PostgresTitleSearch,
+}
+
+
+def get_backend(connection):
+    return BACKENDS.get(connection.vendor, FallbackTitleSearch)()
+
+
+def search_titles(queryset, query):
+    """Titles matching the query, best matches first."""
+    if not _words(query):
+        return queryset.none()
+    backend = get_backend(connections[queryset.db])
+    return backend.filter(queryset, query).order_by('-search_rank', '-id')
+
+
+def install_search_index(apps, schema_editor):
+    backend = get_backend(schema_editor.connection)
+    for statement in backend.install_sql:
+        schema_editor.execute(statement, params=None)
+
+
+def uninstall_search_index(apps, schema_editor):
+    backend = get_backend(schema_editor.connection)
+    for statement in backend.uninstall_sql:
+        schema_editor.execute(statement, params=None)
+
+
+def restore_search_index(apps, schema_editor):
+    """
+    Reinstall the index after a migration that altered the title table:
+    SQLite rebuilds the table for most changes, dropping its triggers.
+    """
+    if schema_editor.connection.vendor == 'sqlite':
+        install_search_index(apps, schema_editor)
@@ -1,14 +1,56 @@
+from collections import Counter, defaultdict
+
 import jwt
 from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import Q
+from django.utils.functional import cached_property
 from rest_framework import serializers
+from rest_framework.settings import api_settings
+
+from . import cache
+from .fieldsets import SparseFieldsSerializerMixin
+from .importers import chunked
+from .models import (Category, Comment, Genre, Review, Title, User,
+                     calculate_rating)
+from .signals import invalidate_on_commit
+
+SLUG_LOOKUP_CHUNK_SIZE = 500
 
-from .models import Category, Comment, Genre, Review, Title, User
+# Output fields of a title and the values() columns each is built from.
+TITLE_LOOKUPS = {
+    'id': ('id',),
+    'genre': (),
+    'category': ('category__name', 'category__slug'),
+    'rating': ('rating_sum', 'rating_count'),
+    'reviews_count': ('rating_count',),
+    'name': ('name',),
+    'year': ('year',),
+    'description': ('description',),
+}
+TITLE_COLUMNS = tuple(column for columns in TITLE_LOOKUPS.values()
+                      for column in columns)
 
 
 class SendConfirmCodeSerializer(serializers.Serializer):
     email = serializers.EmailField()
 
 
+class BatchItemSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(
+        choices=('GET', 'POST', 'PUT', 'PATCH', 'DELETE'), default='GET'
+    )
+    path = serializers.RegexField(r'^/', max_length=2000)
+    body = serializers.JSONField(required=False)
+
+
+class BatchSerializer(serializers.Serializer):
+    requests = serializers.ListField(
+        child=BatchItemSerializer(), min_length=1,
+        max_length=settings.BATCH_MAX_REQUESTS
+    )
+
+
 class TokenReceiveSerializer(serializers.Serializer):
     email = serializers.EmailField()
     confirmation_code = serializers.CharField()
@@ -47,7 +89,8 @@ class UserSerializer(serializers.ModelSerializer):
         return role
 
 
-class ReviewsSerializer(serializers.ModelSerializer):
+class ReviewsSerializer(SparseFieldsSerializerMixin,
+                        serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         slug_field='username',
         read_only=True,
@@ -65,10 +108,12 @@ class ReviewsSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Review
-        fields = ('id', 'text', 'author', 'score', 'pub_date')
+        fields = ('id', 'text', 'author', 'score', 'pub_date',
+                  'comments_count')
 
 
-class CommentsSerializer(serializers.ModelSerializer):
+class CommentsSerializer(SparseFieldsSerializerMixin,
+                         serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         slug_field='username',
         read_only=True,
@@ -94,7 +139,7 @@ class GenresSerializer(serializers.ModelSerializer):
 class TitleBaseSerializer(serializers.ModelSerializer):
     class Meta:
         model = Title
-        fields = '__all__'
+        fields = ('id', 'genre', 'category', 'name', 'year', 'description')
 
 
 class TitlesUnSafeMethodSerializer(TitleBaseSerializer):
@@ -113,5 +158,387 @@ class TitlesUnSafeMethodSerializer(TitleBaseSerializer):
 class TitlesSafeMethodSerializer(TitleBaseSerializer):
     genre = GenresSerializer(many=True)
     category = CategoriesSerializer()
-    rating = serializers.DecimalField(max_digits=3, decimal_places=2,
-                                      coerce_to_string=False)
+    rating = serializers.DecimalField(max_digits=4, decimal_places=2,
+                                      coerce_to_string=False, read_only=True)
+    # Every review has a score, so the rating counter counts reviews.
+    reviews_count = serializers.IntegerField(source='rating_count',
+                                             read_only=True)
+
+    class Meta(TitleBaseSerializer.Meta):
+        fields = ('id', 'genre', 'category', 'rating', 'reviews_count',
+                  'name', 'year', 'description')
+
+
+class TitleStatsSerializer(serializers.ModelSerializer):
+    """Review statistics of a title, read from its stored score counters."""
+    reviews_count = serializers.IntegerField(source='rating_count')
+    mean = serializers.DecimalField(source='rating', max_digits=4,
+                                    decimal_places=2, coerce_to_string=False)
+    median = serializers.FloatField(source='median_score')
+    histogram = serializers.DictField(child=serializers.IntegerField(),
+                                      source='score_histogram')
+
+    class Meta:
+        model = Title
+        fields = ('id', 'reviews_count', 'mean', 'median', 'histogram')
+        read_only_fields = fields
+
+
+# group_genres() pads its IN lists to powers of two up to this size, so
+# only a dozen statements per database vendor are ever built.
+GENRES_MAX_BATCH = 2048
+
+_genres_sql = {}
+
+
+def genres_sql(connection, size):
+    """
+    SQL of group_genres() for "size" titles on "connection". The statement
+    is built once per database vendor and batch size, since compiling the
+    equivalent queryset costs more CPU than serializing the whole page.
+    """
+    key = (connection.vendor, size)
+    if key not in _genres_sql:
+        through = Title.genre.through._meta
+        quote = connection.ops.quote_name
+        _genres_sql[key] = (
+            'SELECT t.{title}, g.{name}, g.{slug} '
+            'FROM {through} t INNER JOIN {genre} g ON g.{id} = t.{genre_id} '
+            'WHERE t.{title} IN ({params}) ORDER BY g.{name}'
+        ).format(
+            through=quote(through.db_table),
+            genre=quote(Genre._meta.db_table),
+            title=quote(through.get_field('title').column),
+            genre_id=quote(through.get_field('genre').column),
+            id=quote(Genre._meta.pk.column),
+            name=quote(Genre._meta.get_field('name').column),
+            slug=quote(Genre._meta.get_field('slug').column),
+            params=', '.join(['%s'] * size),
+        )
+    return _genres_sql[key]
+
+
+def genre_batches(connection, title_ids):
+    """
+    The title ids split into IN lists that "connection" accepts, each
+    padded to a power of two by repeating its last id.
+    """
+    limit = min(GENRES_MAX_BATCH,
+                connection.features.max_query_params or GENRES_MAX_BATCH)
+    limit = 1 << (limit.bit_length() - 1)
+    for batch in chunked(title_ids, limit):
+        size = 1 << (len(batch) - 1).bit_length()
+        yield batch + batch[-1:] * (size - len(batch))
+
+
+def group_genres(title_ids):
+    """
+    Genres of the given titles, ordered as in the API, in one query per
+    genre_batches() list. The query goes to the database the router picks
+    for reading genres.
+    """
+    genres = defaultdict(list)
+    if not title_ids:
+        return genres
+    connection = connections[router.db_for_read(Genre)]
+    with connection.cursor() as cursor:
+        for batch in genre_batches(connection, title_ids):
+            cursor.execute(genres_sql(connection, len(batch)), batch)
+            for title_id, name, slug in cursor.fetchall():
+                genres[title_id].append({'name': name, 'slug': slug})
+    return genres
+
+
+class TitleRowSerializer:
+    """
+    Read-only TitlesSafeMethodSerializer output built from values() rows
+    instead of model instances and DRF fields. The genres of all rows are
+    read in one query, unless "fields" leaves them out; rows need only the
+    TITLE_LOOKUPS columns of the "fields" and the id.
+    """
+    rating_field = TitlesSafeMethodSerializer._declared_fields['rating']
+
+    def __init__(self, instance, many=False, fields=None, **kwargs):
+        self.instance = instance
+        self.many = many
+        self.fields = tuple(TITLE_LOOKUPS) if fields is None else fields
+
+    @cached_property
+    def data(self):
+        rows = list(self.instance) if self.many else [self.instance]
+        genres = {}
+        if 'genre' in self.fields:
+            genres = group_genres([row['id'] for row in rows])
+        builders = [(name, getattr(self, f'get_{name}'))
+                    for name in self.fields]
+        items = [{name: build(row, genres) for name, build in builders}
+                 for row in rows]
+        return items if self.many else items[0]
+
+    def get_id(self, row, genres):
+        return row['id']
+
+    def get_genre(self, row, genres):
+        return genres.get(row['id'], [])
+
+    def get_category(self, row, genres):
+        if row['category__slug'] is None:
+            return None
+        return {'name': row['category__name'], 'slug': row['category__slug']}
+
+    def get_rating(self, row, genres):
+        rating = calculate_rating(row['rating_sum'], row['rating_count'])
+        if rating is None:
+            return None
+        return self.rating_field.to_representation(rating)
+
+    def get_reviews_count(self, row, genres):
+        return row['rating_count']
+
+    def get_name(self, row, genres):
+        return row['name']
+
+    def get_year(self, row, genres):
+        return row['year']
+
+    def get_description(self, row, genres):
+        return row['description']
+
+
+def slug_ids(model, slugs):
+    """Ids of the objects with the given slugs, one query per chunk."""
+    ids = {}
+    for chunk in chunked(sorted(slugs), SLUG_LOOKUP_CHUNK_SIZE):
+        ids.update(model.objects.filter(slug__in=chunk).values_list(
+            'slug', 'id'
+        ))
+    return ids
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """
+    Validates every item with the fields of the child, then lets the
+    child check the valid ones at once: validate_items() returns one error
+    dict per item and resolves slugs with one query per model. Saving
+    hands the whole list to bulk_create() or bulk_update() of the child.
+    """
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list) or not data:
+            # Not a list or empty, which the stock validation reports.
+            return super().to_internal_value(data)
+        if len(data) > settings.BULK_MAX_OBJECTS:
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    f'Не больше {settings.BULK_MAX_OBJECTS} объектов '
+                    f'за запрос.'
+                ]
+            })
+        items, errors = [], []
+        for item in data:
+            try:
+                items.append(self.child.run_validation(item))
+                errors.append({})
+            except serializers.ValidationError as exc:
+                items.append(None)
+                errors.append(exc.detail)
+        valid = [index for index, item in enumerate(items) if item is not None]
+        item_errors = self.child.validate_items([items[index]
+                                                 for index in valid])
+        for index, error in zip(valid, item_errors):
+            errors[index] = error
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return items
+
+    def create(self, validated_data):
+        return self.child.bulk_create(validated_data)
+
+    def update(self, instance, validated_data):
+        return self.child.bulk_update(validated_data)
+
+
+class NamedBulkSerializer(serializers.ModelSerializer):
+    """
+    Categories and genres for BulkListSerializer. The unique validators
+    of the model fields, a query per item, are replaced by one query for
+    the whole list.
+    """
+    invalidates = ()
+
+    class Meta:
+        fields = ('name', 'slug')
+        extra_kwargs = {'name': {'validators': []},
+                        'slug': {'validators': []}}
+        list_serializer_class = BulkListSerializer
+
+    def validate_items(self, items):
+        model = self.Meta.model
+        taken = {field: set() for field in self.Meta.fields}
+        for name, slug in model.objects.filter(
+            Q(name__in=[item['name'] for item in items])
+            | Q(slug__in=[item['slug'] for item in items])
+        ).values_list('name', 'slug'):
+            taken['name'].add(name)
+            taken['slug'].add(slug)
+        errors = []
+        for item in items:
+            error = {}
+            for field, values in taken.items():
+                if item[field] in values:
+                    error[field] = [
+                        f'{model._meta.verbose_name} с таким значением поля '
+                        f'«{field}» уже существует.'
+                    ]
+                values.add(item[field])
+            errors.append(error)
+        return errors
+
+    def bulk_create(self, items):
+        model = self.Meta.model
+        objs = [model(**item) for item in items]
+        with transaction.atomic():
+            model.objects.bulk_create(objs)
+            invalidate_on_commit(*self.invalidates)
+        return objs
+
+
+class CategoryBulkSerializer(NamedBulkSerializer):
+    invalidates = (cache.CATEGORIES,)
+
+    class Meta(NamedBulkSerializer.Meta):
+        model = Category
+
+
+class GenreBulkSerializer(NamedBulkSerializer):
+    invalidates = (cache.GENRES,)
+
+    class Meta(NamedBulkSerializer.Meta):
+        model = Genre
+
+
+class TitleBulkSerializer(serializers.ModelSerializer):
+    """
+    Titles for BulkListSerializer, in the TitlesUnSafeMethodSerializer
+    format. Created items have no id; updated items are found by their id
+    and may leave out any other field. Genre and category slugs of all
+    items are resolved with one query per model.
+    """
+    id = serializers.IntegerField(required=False)
+    genre = serializers.ListField(child=serializers.SlugField(),
+                                  source='genre_slugs', required=False)
+    category = serializers.SlugField(source='category_slug', required=False,
+                                     allow_null=True)
+    model_fields = ('name', 'year', 'description')
+
+    class Meta:
+        model = Title
+        fields = ('id', 'genre', 'category', 'name', 'year', 'description')
+        list_serializer_class = BulkListSerializer
+
+    def validate_genre(self, slugs):
+        # A repeated slug would add the same title-genre row twice.
+        return list(dict.fromkeys(slugs))
+
+    def validate_items(self, items):
+        self.genre_ids = slug_ids(Genre, {
+            slug for item in items for slug in item.get('genre_slugs', ())
+        })
+        self.category_ids = slug_ids(Category, {
+            item['category_slug'] for item in items
+            if item.get('category_slug')
+        })
+        self.titles = {}
+        ids = Counter(item['id'] for item in items if 'id' in item)
+        self.repeated_ids = {title_id for title_id, count in ids.items()
+                             if count > 1}
+        if self.parent.instance is not None:
+            self.titles = Title.objects.in_bulk(list(ids))
+        return [self.validate_item(item) for item in items]
+
+    def validate_item(self, item):
+        error = {}
+        if self.parent.instance is None and 'id' in item:
+            error['id'] = ['id указывается только при изменении.']
+        elif self.parent.instance is not None and 'id' not in item:
+            error['id'] = ['Обязательное поле.']
+        elif 'id' in item and item['id'] not in self.titles:
+            error['id'] = [f'Произведение {item["id"]} не найдено.']
+        elif 'id' in item and item['id'] in self.repeated_ids:
+            error['id'] = [f'Произведение {item["id"]} указано несколько '
+                           f'раз.']
+        missing = [slug for slug in item.get('genre_slugs', ())
+                   if slug not in self.genre_ids]
+        if missing:
+            error['genre'] = [f'Жанр «{slug}» не найден.' for slug in missing]
+        category = item.get('category_slug')
+        if category and category not in self.category_ids:
+            error['category'] = [f'Категория «{category}» не найдена.']
+        return error
+
+    def bulk_create(self, items):
+        titles = []
+        for item in items:
+            title = Title(
+                category_id=self.category_ids.get(item.get('category_slug')),
+                **{name: item[name] for name in self.model_fields
+                   if name in item}
+            )
+            title.genre_slugs = item.get('genre_slugs', [])
+            title.category_slug = item.get('category_slug')
+            titles.append(title)
+        with transaction.atomic():
+            Title.objects.bulk_create_with_pks(titles)
+            self.add_genres(titles)
+            invalidate_on_commit(cache.TITLES)
+        return titles
+
+    def bulk_update(self, items):
+        titles, fields = [], set()
+        for item in items:
+            title = self.titles[item['id']]
+            for name in self.model_fields:
+                if name in item:
+                    setattr(title, name, item[name])
+                    fields.add(name)
+            if 'category_slug' in item:
+                title.category_id = self.category_ids.get(
+                    item['category_slug']
+                )
+                fields.add('category')
+            if 'genre_slugs' in item:
+                title.genre_slugs = item['genre_slugs']
+            titles.append(title)
+        changed_genres = [title for title in titles
+                          if hasattr(title, 'genre_slugs')]
+        with transaction.atomic():
+            if fields:
+                Title.objects.bulk_update(titles, fields)
+            Title.genre.through.objects.filter(
+                title_id__in=[title.pk for title in changed_genres]
+            ).delete()
+            self.add_genres(changed_genres)
+            invalidate_on_commit(cache.TITLES)
+        self.attach_slugs(titles)
+        return titles
+
+    def add_genres(self, titles):
+        through = Title.genre.through
+        through.objects.bulk_create(
+            through(title_id=title.pk, genre_id=self.genre_ids[slug])
+            for title in titles for slug in title.genre_slugs
+        )
+
+    def attach_slugs(self, titles):
+        """Current genre and category slugs of updated titles."""
+        genres = defaultdict(list)
+        for title_id, slug in Title.genre.through.objects.filter(
+            title_id__in=[title.pk for title in titles]
+        ).order_by('genre__slug').values_list('title_id', 'genre__slug'):
+            genres[title_id].append(slug)
+        categories = dict(Category.objects.filter(
+            id__in={title.category_id for title in titles}
+        ).values_list('id', 'slug'))
+        for title in titles:
+            title.genre_slugs = genres[title.pk]
+            title.category_slug = categories.get(title.category_id)
@@ -0,0 +1,135 @@
+from django.core.signals import request_finished, request_started
+from django.db import transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_save)
+from django.dispatch import receiver
+
+from . import cache, routers
+from .models import Category, Comment, Genre, Review, Title, User
+
+
+@receiver(pre_save, sender=Review)
+def remember_previous_score(sender, instance, raw, **kwargs):
+    instance._previous_rating = None
+    if raw or instance.pk is None:
+        return
+    # Runs in the transaction of Review.save(). The row lock makes a
+    # concurrent re-score wait, so each save subtracts the score it
+    # replaces rather than both subtracting the same one.
+    instance._previous_rating = sender.objects.select_for_update().filter(
+        pk=instance.pk
+    ).values_list('title_id', 'score').first()
+
+
+@receiver(post_save, sender=Review)
+def add_score_to_rating(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_previous_rating', None)
+    if previous == (instance.title_id, instance.score):
+        return
+    if previous is not None:
+        title_id, score = previous
+        Title.objects.update_rating(title_id, score, -1)
+    Title.objects.update_rating(instance.title_id, instance.score, 1)
+
+
+@receiver(post_delete, sender=Review)
+def remove_score_from_rating(sender, instance, **kwargs):
+    Title.objects.update_rating(instance.title_id, instance.score, -1)
+
+
+@receiver(post_save, sender=Comment)
+def add_comment_to_count(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        Review.objects.update_comments_count(instance.review_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def remove_comment_from_count(sender, instance, **kwargs):
+    Review.objects.update_comments_count(instance.review_id, -1)
+
+
+def invalidate_on_commit(*resources):
+    # Bumping before the commit would let a concurrent read cache the old
+    # rows under the new version.
+    transaction.on_commit(lambda: cache.bump_versions(*resources))
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+def invalidate_titles(sender, instance, **kwargs):
+    invalidate_on_commit(cache.TITLES,
+                         cache.TITLE_REVIEWS.format(instance.pk))
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_reviews(sender, instance, **kwargs):
+    resources = [cache.TITLES, cache.TITLE_REVIEWS.format(instance.title_id),
+                 cache.REVIEW_COMMENTS.format(instance.pk)]
+    previous = getattr(instance, '_previous_rating', None)
+    if previous is not None and previous[0] != instance.title_id:
+        resources.append(cache.TITLE_REVIEWS.format(previous[0]))
+    invalidate_on_commit(*resources)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comments(sender, instance, **kwargs):
+    # The review shows its comments_count. CommentsViewSet passes the
+    # review loaded, which spares the lookup of its title.
+    if Comment.review.is_cached(instance):
+        title_id = instance.review.title_id
+    else:
+        title_id = Review.objects.filter(pk=instance.review_id).values_list(
+            'title_id', flat=True
+        ).first()
+    resources = [cache.REVIEW_COMMENTS.format(instance.review_id)]
+    if title_id is not None:
+        resources.append(cache.TITLE_REVIEWS.format(title_id))
+    invalidate_on_commit(*resources)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_authors(sender, created=False, **kwargs):
+    # Reviews and comments show the author's username, and deleting a user
+    # changes the comments_count of the reviews they commented on; a new
+    # user has written nothing yet.
+    if not created:
+        invalidate_on_commit(cache.USERS)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_authenticated_user(sender, instance, **kwargs):
+    # Bumped right away as well as on commit: a role or is_active change
+    # must not wait for the transaction of the request that made it.
+    cache.bump_versions(cache.USER.format(instance.pk))
+    invalidate_on_commit(cache.USER.format(instance.pk))
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_title_genres(sender, action, **kwargs):
+    if action.startswith('post_'):
+        invalidate_on_commit(cache.TITLES)
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def invalidate_genres(sender, **kwargs):
+    invalidate_on_commit(cache.GENRES, cache.TITLES)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_categories(sender, **kwargs):
+    invalidate_on_commit(cache.CATEGORIES, cache.TITLES)
+
+
+@receiver(request_started)
+@receiver(request_finished)
+def reset_database_routing(**kwargs):
+    # Threads serve many requests; each one starts on the primary.
+    routers.reset()
@@ -0,0 +1,102 @@
+import os
+import sqlite3
+import threading
+
+from django.conf import settings
+
+
+class SQLiteFileStore:
+    """
+    An SQLite file shared by every worker process of the host. Each thread
+    of each process opens its own connection in autocommit mode.
+    """
+    schema = ()
+
+    def __init__(self, path, timeout=5.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _connection(self):
+        # sqlite3 connections must not cross threads or forked processes.
+        pid = os.getpid()
+        if getattr(self._local, 'pid', None) != pid:
+            connection = sqlite3.connect(self.path, timeout=self.timeout,
+                                         isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            for statement in self.schema:
+                connection.execute(statement)
+            self._local.connection = connection
+            self._local.pid = pid
+        return self._local.connection
+
+
+class VersionStore(SQLiteFileStore):
+    """
+    Named versions, such as the resource versions of api.cache, in an
+    SQLite file shared by every worker process of the host, so that a
+    bump made by one process is seen by all of them at once.
+    """
+    schema = (
+        'CREATE TABLE IF NOT EXISTS versions ('
+        'key TEXT PRIMARY KEY, version INTEGER NOT NULL) WITHOUT ROWID',
+    )
+
+    def get_many(self, keys):
+        """{key: version} of the keys that have a version."""
+        keys = list(keys)
+        if not keys:
+            return {}
+        placeholders = ', '.join('?' * len(keys))
+        return dict(self._connection().execute(
+            f'SELECT key, version FROM versions '
+            f'WHERE key IN ({placeholders})', keys
+        ).fetchall())
+
+    def add_many(self, versions):
+        """Store the versions of the keys that have none yet."""
+        self._write(
+            'INSERT OR IGNORE INTO versions (key, version) VALUES (?, ?)',
+            versions
+        )
+
+    def set_many(self, versions):
+        """
+        Replace the versions. A version never goes back, even when the
+        clocks of two processes disagree.
+        """
+        self._write(
+            'INSERT INTO versions (key, version) VALUES (?, ?) '
+            'ON CONFLICT (key) DO UPDATE SET '
+            'version = max(excluded.version, version + 1)',
+            versions
+        )
+
+    def _write(self, sql, versions):
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.executemany(sql, list(versions.items()))
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+
+    def clear(self):
+        self._connection().execute('DELETE FROM versions')
+
+
+_version_stores = {}
+_version_stores_lock = threading.Lock()
+
+
+def get_version_store():
+    path = settings.VERSION_STORE_PATH
+    if path not in _version_stores:
+        with _version_stores_lock:
+            _version_stores.setdefault(path, VersionStore(path))
+    return _version_stores[path]
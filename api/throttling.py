@@ -1,13 +1,124 @@
+import random
+import threading
+import time
+
+from django.conf import settings
 from rest_framework.throttling import ScopedRateThrottle
 
+from .metrics import get_metrics, route_name
 from .models import User
+from .stores import SQLiteFileStore
 
 EMPLOYEES = (User.ADMIN_ROLE, User.MODERATOR_ROLE)
 
 
+class TokenBucketStore(SQLiteFileStore):
+    """
+    Token buckets in an SQLite file shared by every worker process of the
+    host. Each key holds one row: the tokens left and the time they were
+    counted. BEGIN IMMEDIATE serialises concurrent updates of a bucket.
+    """
+    schema = (
+        'CREATE TABLE IF NOT EXISTS buckets ('
+        'key TEXT PRIMARY KEY, tokens REAL NOT NULL, '
+        'updated REAL NOT NULL) WITHOUT ROWID',
+    )
+    purge_probability = 0.001
+    purge_after = 24 * 60 * 60
+
+    def consume(self, key, capacity, refill_rate, now=None):
+        """
+        Take one token from the bucket. Returns whether it was taken and
+        how many seconds remain until the next token.
+        """
+        now = time.time() if now is None else now
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute(
+                'SELECT tokens, updated FROM buckets WHERE key = ?', (key,)
+            ).fetchone()
+            tokens = capacity if row is None else min(
+                capacity, row[0] + max(now - row[1], 0) * refill_rate
+            )
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            connection.execute(
+                'INSERT OR REPLACE INTO buckets (key, tokens, updated) '
+                'VALUES (?, ?, ?)', (key, tokens, now)
+            )
+            if random.random() < self.purge_probability:
+                connection.execute('DELETE FROM buckets WHERE updated < ?',
+                                   (now - self.purge_after,))
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        wait = 0 if allowed else (1 - tokens) / refill_rate
+        return allowed, wait
+
+    def clear(self):
+        self._connection().execute('DELETE FROM buckets')
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_throttle_store():
+    path = settings.THROTTLE_STORE_PATH
+    if path not in _stores:
+        with _stores_lock:
+            _stores.setdefault(path, TokenBucketStore(path))
+    return _stores[path]
+
+
 class NonEmployeeScopedRateThrottle(ScopedRateThrottle):
+    """
+    Scoped rate limit for everyone except admins and moderators, counted
+    in a token bucket shared by all worker processes.
+    """
+    default_scope = None
+
+    def get_scope(self, view):
+        return getattr(view, self.scope_attr, None) or self.default_scope
 
     def get_cache_key(self, request, view):
         if request.user.is_authenticated and request.user.role in EMPLOYEES:
             return None
         return super().get_cache_key(request, view)
+
+    def allow_request(self, request, view):
+        self.scope = self.get_scope(view)
+        if not self.scope:
+            return True
+        if self.scope == getattr(request, 'batch_throttle_scope', None):
+            # The batch it belongs to has been counted in this scope, see
+            # api.batch; every other scope is checked per item.
+            return True
+        self.rate = self.get_rate()
+        if self.rate is None:
+            return True
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        allowed, self.wait_seconds = get_throttle_store().consume(
+            self.key, self.num_requests, self.num_requests / self.duration
+        )
+        if not allowed:
+            get_metrics().observe_throttled(route_name(request), self.scope)
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class AuthNonEmployeeRateThrottle(NonEmployeeScopedRateThrottle):
+    """For function-based views, which cannot declare throttle_scope."""
+    default_scope = 'auth-non-employee'
+
+
+class BurstNonEmployeeRateThrottle(NonEmployeeScopedRateThrottle):
+    default_scope = 'burst-non-employee'
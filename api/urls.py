@@ -2,7 +2,8 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from .views import (CategoriesViewSet, CommentsViewSet, GenresViewSet,
-                    ReviewsViewSet, TitlesViewSet, UserViewSet,
+                    ReviewsViewSet, TitlesViewSet, UserViewSet, batch_view,
+                    mail_queue_stats_view, metrics_view,
                     send_confirmation_code_view, token_receive_view)
 
 router_v1 = DefaultRouter()
@@ -24,9 +25,13 @@ auth_patterns = [
          name='token_receive_view'),
     path('email/', send_confirmation_code_view,
          name='send_confirmation_code_view'),
+    path('email/stats/', mail_queue_stats_view,
+         name='mail_queue_stats_view'),
 ]
 
 urlpatterns = [
+    path('v1/_metrics', metrics_view, name='metrics_view'),
+    path('v1/batch/', batch_view, name='batch_view'),
     path('v1/', include(router_v1.urls)),
     path('v1/auth/', include(auth_patterns)),
 ]
@@ -1,27 +1,44 @@
 import datetime as dt
+from functools import partial
 
 import jwt
 from django.conf import settings
-from django.core.mail import send_mail
-from django.db.models import Avg
+from django.core.mail import EmailMessage
+from django.http import StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import mixins, status, viewsets
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import (action, api_view, permission_classes,
+                                       renderer_classes, throttle_classes)
 from rest_framework.generics import get_object_or_404
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import AccessToken
 
+from . import cache
+from .batch import run_batch
+from .cache import (CachedListMixin, CachedRetrieveMixin, ConditionalListMixin,
+                    ConditionalRetrieveMixin)
+from .export import iter_ndjson, iter_title_data
+from .fieldsets import SparseFieldsetMixin
 from .filters import TitlesFilter
-from .models import Category, Genre, Review, Title, User
+from .mail import get_mail_queue
+from .managers import HISTOGRAM_FIELDS
+from .metrics import CONTENT_TYPE, PrometheusRenderer, get_metrics
+from .models import Category, Comment, Genre, Review, Title, User
+from .pagination import PageNumberOrCursorPagination
 from .permissions import (HasUsernameForPOST, IsAdmin, IsAdminOrReadOnly,
                           IsStaffOrAuthorOrReadOnly)
-from .serializers import (CategoriesSerializer, CommentsSerializer,
-                          GenresSerializer, ReviewsSerializer,
-                          SendConfirmCodeSerializer,
-                          TitlesSafeMethodSerializer,
+from .routers import ReplicaReadMixin
+from .serializers import (TITLE_LOOKUPS, BatchSerializer, CategoriesSerializer,
+                          CategoryBulkSerializer, CommentsSerializer,
+                          GenreBulkSerializer, GenresSerializer,
+                          ReviewsSerializer, SendConfirmCodeSerializer,
+                          TitleBulkSerializer, TitleRowSerializer,
+                          TitlesSafeMethodSerializer, TitleStatsSerializer,
                           TitlesUnSafeMethodSerializer, TokenReceiveSerializer,
                           UserSerializer)
+from .throttling import (AuthNonEmployeeRateThrottle,
+                         BurstNonEmployeeRateThrottle)
 
 MAIL_SUBJECT = 'Код подтверждения'
 MAIL_DESCRIPTION = ('Для получения токена отправьте email и confirmation_code'
@@ -36,27 +53,64 @@ def create_jwt(email):
     secret_key = settings.SECRET_KEY
     expire = dt.datetime.utcnow() + settings.EMAIL_EXPIRATION_TIME
     payload = {'email': email, 'exp': expire}
-    return jwt.encode(payload=payload, key=secret_key, algorithm='HS256')
+    token = jwt.encode(payload=payload, key=secret_key, algorithm='HS256')
+    # PyJWT 1.x returns bytes, 2.x returns str.
+    return token.decode() if isinstance(token, bytes) else token
 
 
 @api_view(('POST',))
 @permission_classes((AllowAny,))
+@throttle_classes((AuthNonEmployeeRateThrottle,))
 def send_confirmation_code_view(request):
     serializer = SendConfirmCodeSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
     email = serializer.validated_data.get('email')
     signed_code = create_jwt(email)
-    send_mail(subject=MAIL_SUBJECT, from_email=settings.DEFAULT_FROM_EMAIL,
-              message=MAIL_DESCRIPTION + signed_code,
-              recipient_list=(email,), fail_silently=True)
+    get_mail_queue().enqueue(EmailMessage(
+        subject=MAIL_SUBJECT, from_email=settings.DEFAULT_FROM_EMAIL,
+        body=MAIL_DESCRIPTION + signed_code, to=(email,)
+    ))
     return Response(serializer.validated_data,
                     status=status.HTTP_200_OK)
 
 
+@api_view(('GET',))
+@permission_classes((IsAdmin,))
+def mail_queue_stats_view(request):
+    return Response(get_mail_queue().stats(), status=status.HTTP_200_OK)
+
+
+@api_view(('GET',))
+@permission_classes((IsAdmin,))
+@renderer_classes((PrometheusRenderer,))
+def metrics_view(request):
+    return Response(get_metrics().render(), content_type=CONTENT_TYPE)
+
+
+@api_view(('POST',))
+@permission_classes((AllowAny,))
+@throttle_classes((BurstNonEmployeeRateThrottle,))
+def batch_view(request):
+    """
+    Sub-requests dispatched to their views in-process. Authentication and
+    the burst throttle run once for the batch, while the permissions and
+    other throttle scopes of every view still apply.
+    """
+    serializer = BatchSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    results, failed = run_batch(request, serializer.validated_data['requests'])
+    if failed is not None:
+        return Response({
+            'detail': f'Изменения отменены: запрос {failed} завершился '
+                      f'ошибкой.',
+            'results': results,
+        }, status=status.HTTP_400_BAD_REQUEST)
+    return Response({'results': results}, status=status.HTTP_200_OK)
+
+
 @api_view(('POST',))
 @permission_classes((AllowAny,))
-# Невозможно указать throttle_scope,
-# а для класса ScopedRateThrottle это необходимо.
+@throttle_classes((AuthNonEmployeeRateThrottle,))
 def token_receive_view(request):
     serializer = TokenReceiveSerializer(data=request.data)
     if not serializer.is_valid():
@@ -69,7 +123,7 @@ def token_receive_view(request):
     return Response({'token': access}, status=status.HTTP_200_OK)
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = User.objects.exclude(username__isnull=True)
     serializer_class = UserSerializer
     permission_classes = (IsAdmin,)
@@ -91,32 +145,64 @@ class UserViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class ReviewsViewSet(viewsets.ModelViewSet):
+class ReviewsViewSet(ReplicaReadMixin, ConditionalListMixin,
+                     ConditionalRetrieveMixin, SparseFieldsetMixin,
+                     viewsets.ModelViewSet):
+    pagination_class = PageNumberOrCursorPagination
     serializer_class = ReviewsSerializer
+    sparse_fields = {
+        'id': ('id',),
+        'text': ('text',),
+        'author': ('author', 'author__username'),
+        'score': ('score',),
+        'pub_date': ('pub_date',),
+        'comments_count': ('comments_count',),
+    }
     permission_classes = (IsStaffOrAuthorOrReadOnly, HasUsernameForPOST)
     throttle_scope = 'burst-non-employee'
 
+    def get_cache_resources(self):
+        return (cache.TITLE_REVIEWS.format(self.kwargs.get('title_id')),
+                cache.USERS)
+
     def get_queryset(self):
         title = get_object_or_404(Title, id=self.kwargs.get('title_id'))
-        return title.reviews.order_by('-id')
+        # Not title.reviews: a related manager reads the deferred title_id
+        # of every review to attach the title to it.
+        return Review.objects.filter(title=title).order_by('-id')
 
     def perform_create(self, serializer):
         title = get_object_or_404(Title, id=self.kwargs.get('title_id'))
         serializer.save(author=self.request.user, title=title)
 
 
-class CommentsViewSet(viewsets.ModelViewSet):
+class CommentsViewSet(ReplicaReadMixin, ConditionalListMixin,
+                      ConditionalRetrieveMixin, SparseFieldsetMixin,
+                      viewsets.ModelViewSet):
+    pagination_class = PageNumberOrCursorPagination
     serializer_class = CommentsSerializer
+    sparse_fields = {
+        'id': ('id',),
+        'text': ('text',),
+        'author': ('author', 'author__username'),
+        'pub_date': ('pub_date',),
+    }
     permission_classes = (IsStaffOrAuthorOrReadOnly, HasUsernameForPOST)
     throttle_scope = 'burst-non-employee'
 
+    def get_cache_resources(self):
+        return (cache.REVIEW_COMMENTS.format(self.kwargs.get('review_id')),
+                cache.USERS)
+
     def get_queryset(self):
-        review = get_object_or_404(
+        self.review = get_object_or_404(
             Review,
             id=self.kwargs.get('review_id'),
             title=self.kwargs.get('title_id')
         )
-        return review.comments.order_by('-id')
+        # Not review.comments: a related manager reads the deferred
+        # review_id of every comment to attach the review to it.
+        return Comment.objects.filter(review=self.review).order_by('-id')
 
     def perform_create(self, serializer):
         review = get_object_or_404(
@@ -126,8 +212,58 @@ class CommentsViewSet(viewsets.ModelViewSet):
         )
         serializer.save(author=self.request.user, review=review)
 
+    def perform_destroy(self, instance):
+        # The review is already loaded; the signals need its title.
+        instance.review = self.review
+        instance.delete()
+
+
+class BulkCreateMixin:
+    """
+    POST of an array of objects to <prefix>/bulk/, validated and saved by
+    the BulkListSerializer of "bulk_serializer_class". Nothing is saved
+    unless every object is valid; errors are returned per object.
+    """
+    bulk_serializer_class = None
+
+    def get_bulk_serializer(self, *args, **kwargs):
+        return self.bulk_serializer_class(
+            *args, many=True, allow_empty=False,
+            context=self.get_serializer_context(), **kwargs
+        )
+
+    def bulk_create(self, request):
+        serializer = self.get_bulk_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=('post',), permission_classes=(IsAdmin,))
+    def bulk(self, request):
+        return self.bulk_create(request)
 
-class CreateListDestroyViewSet(mixins.CreateModelMixin,
+
+class BulkCreateUpdateMixin(BulkCreateMixin):
+    """BulkCreateMixin that also takes a PATCH of objects with their ids."""
+
+    def bulk_update(self, request):
+        serializer = self.get_bulk_serializer(
+            self.get_queryset(), data=request.data, partial=True
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=('post', 'patch'),
+            permission_classes=(IsAdmin,))
+    def bulk(self, request):
+        if request.method == 'PATCH':
+            return self.bulk_update(request)
+        return self.bulk_create(request)
+
+
+class CreateListDestroyViewSet(ReplicaReadMixin,
+                               mixins.CreateModelMixin,
                                mixins.ListModelMixin,
                                mixins.DestroyModelMixin,
                                viewsets.GenericViewSet):
@@ -137,20 +273,66 @@ class CreateListDestroyViewSet(mixins.CreateModelMixin,
     lookup_field = 'slug'
 
 
-class CategoriesViewSet(CreateListDestroyViewSet):
+class CategoriesViewSet(CachedListMixin, BulkCreateMixin,
+                        CreateListDestroyViewSet):
+    cache_resources = (cache.CATEGORIES,)
     queryset = Category.objects.order_by('name')
     serializer_class = CategoriesSerializer
+    bulk_serializer_class = CategoryBulkSerializer
 
 
-class GenresViewSet(CreateListDestroyViewSet):
+class GenresViewSet(CachedListMixin, BulkCreateMixin,
+                    CreateListDestroyViewSet):
+    cache_resources = (cache.GENRES,)
     queryset = Genre.objects.order_by('name')
     serializer_class = GenresSerializer
+    bulk_serializer_class = GenreBulkSerializer
+
+
+class TitleRowsMixin(SparseFieldsetMixin):
+    """
+    list and retrieve serialized by TitleRowSerializer from values() rows
+    with the columns of the requested fields only. Extra selects and
+    annotations, such as the search rank, are kept for ordering.
+    """
+    sparse_fields = TITLE_LOOKUPS
 
+    def get_row_queryset(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        columns = sorted(self.get_sparse_lookups() | {'id'})
+        return queryset.values(*columns, *queryset.query.extra_select,
+                               *queryset.query.annotations)
 
-class TitlesViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.annotate(
-        rating=Avg('reviews__score')
-    ).order_by('-id')
+    def get_row_serializer(self, instance, many=False):
+        return TitleRowSerializer(instance, many=many,
+                                  fields=self.get_sparse_fields())
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.get_row_queryset()
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(
+                self.get_row_serializer(page, many=True).data
+            )
+        return Response(self.get_row_serializer(queryset, many=True).data)
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(
+            self.get_row_queryset(),
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        self.check_object_permissions(request, row)
+        return Response(self.get_row_serializer(row).data)
+
+
+class TitlesViewSet(ReplicaReadMixin, ConditionalListMixin,
+                    ConditionalRetrieveMixin, CachedListMixin,
+                    CachedRetrieveMixin, TitleRowsMixin, BulkCreateUpdateMixin,
+                    viewsets.ModelViewSet):
+    cache_resources = (cache.TITLES,)
+    queryset = Title.objects.order_by('-id')
+    bulk_serializer_class = TitleBulkSerializer
     permission_classes = (IsAdminOrReadOnly,)
     throttle_scope = 'burst-non-employee'
     filter_backends = (DjangoFilterBackend,)
@@ -159,4 +341,31 @@ class TitlesViewSet(viewsets.ModelViewSet):
     def get_serializer_class(self):
         if self.action in ('list', 'retrieve'):
             return TitlesSafeMethodSerializer
+        if self.action == 'stats':
+            return TitleStatsSerializer
         return TitlesUnSafeMethodSerializer
+
+    def get_stats(self, request, pk=None):
+        title = get_object_or_404(
+            Title.objects.only('rating_sum', 'rating_count',
+                               *HISTOGRAM_FIELDS),
+            pk=pk
+        )
+        self.check_object_permissions(request, title)
+        return Response(self.get_serializer(title).data)
+
+    @action(detail=True, methods=('get',))
+    def stats(self, request, pk=None):
+        """Review count, mean, median and score histogram of a title."""
+        return self.conditional_response(
+            partial(self.cached_response, self.get_stats), request, pk=pk
+        )
+
+    @action(detail=False, methods=('get',), permission_classes=(IsAdmin,))
+    def export(self, request):
+        """The whole catalogue as newline-delimited JSON."""
+        queryset = self.filter_queryset(Title.objects.order_by('id'))
+        return StreamingHttpResponse(
+            iter_ndjson(iter_title_data(queryset)),
+            content_type='application/x-ndjson'
+        )
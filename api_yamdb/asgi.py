@@ -1,7 +1,12 @@
+# gunicorn api_yamdb.asgi:application -k uvicorn.workers.UvicornH11Worker
 import os
 
-from django.core.asgi import get_asgi_application
+import django
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
 
-application = get_asgi_application()
+django.setup(set_prefix=False)
+
+from api_yamdb.handlers import ThreadPoolASGIHandler  # noqa: E402
+
+application = ThreadPoolASGIHandler()
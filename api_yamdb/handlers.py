@@ -0,0 +1,139 @@
+import asyncio
+import concurrent.futures
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core import signals
+from django.core.exceptions import RequestAborted
+from django.core.handlers.asgi import ASGIHandler
+from django.urls import set_script_prefix
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+STREAM_QUEUE_SIZE = 8
+END_OF_STREAM = object()
+
+
+class ThreadPoolASGIHandler(ASGIHandler):
+    """
+    The event loop receives request bodies and sends responses, so slow
+    clients hold no thread; views run in a read pool for safe methods and
+    in a smaller write pool otherwise. Each request stays in one thread
+    from request_started to request_finished, including the iteration of
+    a streamed body, so that thread closes its own database connection.
+    Django 3.0 has no async views or ORM, so the views themselves are sync.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.read_executor = ThreadPoolExecutor(
+            settings.ASGI_READ_THREADS, thread_name_prefix='asgi-read'
+        )
+        self.write_executor = ThreadPoolExecutor(
+            settings.ASGI_WRITE_THREADS, thread_name_prefix='asgi-write'
+        )
+
+    def get_executor(self, scope):
+        if scope['method'] in SAFE_METHODS:
+            return self.read_executor
+        return self.write_executor
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await super().__call__(scope, receive, send)
+            return
+        try:
+            body_file = await self.read_body(receive)
+        except RequestAborted:
+            return
+        loop = asyncio.get_event_loop()
+        started = loop.create_future()
+        chunks = asyncio.Queue(STREAM_QUEUE_SIZE)
+        handled = loop.run_in_executor(
+            self.get_executor(scope), self.handle, scope, body_file, loop,
+            started, chunks
+        )
+        await asyncio.wait((started, handled),
+                           return_when=asyncio.FIRST_COMPLETED)
+        if not started.done():
+            # The handler failed before it had a response.
+            await handled
+        response = started.result()
+        await self.send_headers(response, send)
+        if response.streaming:
+            await self.send_stream(chunks, send)
+        else:
+            for chunk, last in self.chunk_bytes(response.content):
+                await send({'type': 'http.response.body', 'body': chunk,
+                            'more_body': not last})
+        await handled
+
+    def handle(self, scope, body_file, loop, started, chunks):
+        """Runs in a pool thread, from request_started to request_finished."""
+        set_script_prefix(self.get_script_prefix(scope))
+        signals.request_started.send(sender=self.__class__, scope=scope)
+        request, response = self.create_request(scope, body_file)
+        if request is not None:
+            response = self.get_response(request)
+        response._handler_class = self.__class__
+        loop.call_soon_threadsafe(started.set_result, response)
+        try:
+            if response.streaming:
+                self.produce(response, loop, chunks)
+        finally:
+            # Sends request_finished, which closes the database connection
+            # of this thread.
+            response.close()
+
+    def produce(self, response, loop, chunks):
+        """Put the parts of a streamed body into the queue of the loop."""
+        try:
+            for part in response:
+                if not self.put(loop, chunks, part):
+                    logger.warning('Клиент не читает ответ, передача '
+                                   'прервана')
+                    return
+        except Exception as error:
+            # Raised again by the loop, which aborts the response.
+            self.put(loop, chunks, error)
+            return
+        self.put(loop, chunks, END_OF_STREAM)
+
+    def put(self, loop, chunks, item):
+        future = asyncio.run_coroutine_threadsafe(chunks.put(item), loop)
+        try:
+            future.result(settings.ASGI_STREAM_TIMEOUT)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            return False
+        return True
+
+    async def send_stream(self, chunks, send):
+        while True:
+            part = await chunks.get()
+            if part is END_OF_STREAM:
+                break
+            if isinstance(part, BaseException):
+                raise part
+            for chunk, _ in self.chunk_bytes(part):
+                await send({'type': 'http.response.body', 'body': chunk,
+                            'more_body': True})
+        await send({'type': 'http.response.body'})
+
+    async def send_headers(self, response, send):
+        headers = []
+        for header, value in response.items():
+            if isinstance(header, str):
+                header = header.encode('ascii')
+            if isinstance(value, str):
+                value = value.encode('latin1')
+            headers.append((bytes(header), bytes(value)))
+        for cookie in response.cookies.values():
+            headers.append(
+                (b'Set-Cookie', cookie.output(header='').encode('ascii')
+                 .strip())
+            )
+        await send({'type': 'http.response.start',
+                    'status': response.status_code, 'headers': headers})
@@ -23,6 +23,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -64,6 +65,52 @@ DATABASES = {
     }
 }
 
+# Read replicas of the default database, "host[:port]" separated by commas.
+# Safe requests to the API are read from one of them, see api.routers.
+for number, address in enumerate(
+        filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(',')),
+        start=1):
+    host, _, port = address.strip().partition(':')
+    DATABASES[f'replica_{number}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+    }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['api.routers.PrimaryReplicaRouter']
+# Seconds a user keeps reading from the primary after writing to it, so
+# that replication lag does not hide their own changes.
+DATABASE_REPLICA_PIN_SECONDS = int(
+    os.environ.get('DB_REPLICA_PIN_SECONDS', 5)
+)
+
+# Cached responses are keyed by resource versions kept in
+# VERSION_STORE_PATH, a file shared by every worker process of the host
+# like the throttling and metrics stores. A change made in one worker
+# therefore invalidates the responses cached by all of them, even with the
+# per-process locmem backend.
+CACHES = {
+    'default': {
+        'BACKEND': (os.environ.get('CACHE_BACKEND')
+                    or 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION') or '',
+    }
+}
+
+VERSION_STORE_PATH = os.environ.get(
+    'VERSION_STORE_PATH', os.path.join(BASE_DIR, 'tmp/versions.sqlite3')
+)
+
+API_RESPONSE_CACHE_TIMEOUT = int(
+    os.environ.get('API_RESPONSE_CACHE_TIMEOUT', 5 * 60)
+)
+
+# Sub-requests accepted by /api/v1/batch/ at once.
+BATCH_MAX_REQUESTS = 20
+# Objects accepted by the bulk endpoints at once.
+BULK_MAX_OBJECTS = 10000
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -100,7 +147,16 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
     'DEFAULT_FILTER_BACKENDS': [
         'rest_framework.filters.SearchFilter',
@@ -112,11 +168,27 @@ REST_FRAMEWORK = {
         'auth-non-employee': '30/hour',
         'burst-non-employee': '60/min',
     },
+    'NUM_PROXIES': 1,
     'DEFAULT_PAGINATION_CLASS':
         'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10
 }
 
+THROTTLE_STORE_PATH = os.environ.get(
+    'THROTTLE_STORE_PATH', os.path.join(BASE_DIR, 'tmp/throttle.sqlite3')
+)
+
+# Threads of one ASGI worker; each of them keeps a database connection.
+ASGI_READ_THREADS = int(os.environ.get('ASGI_READ_THREADS', 32))
+ASGI_WRITE_THREADS = int(os.environ.get('ASGI_WRITE_THREADS', 4))
+# Seconds a streamed response waits for a client that stopped reading.
+ASGI_STREAM_TIMEOUT = 60
+
+METRICS_STORE_PATH = os.environ.get(
+    'METRICS_STORE_PATH', os.path.join(BASE_DIR, 'tmp/metrics.sqlite3')
+)
+METRICS_FLUSH_INTERVAL = 5
+
 SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
     'ACCESS_TOKEN_LIFETIME': timedelta(days=365),
@@ -124,8 +196,18 @@ SIMPLE_JWT = {
 
 AUTH_USER_MODEL = 'api.User'
 
+AUTH_USER_CACHE_TTL = 30
+AUTH_USER_CACHE_SIZE = 10000
+
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'tmp/test-sent-mail')
 
+EMAIL_QUEUE_SIZE = 1000
+EMAIL_QUEUE_WORKERS = 2
+EMAIL_QUEUE_BATCH_SIZE = 50
+EMAIL_QUEUE_MAX_RETRIES = 3
+EMAIL_QUEUE_RETRY_BACKOFF = 1.0
+EMAIL_QUEUE_SHUTDOWN_TIMEOUT = 10
+
 EMAIL_EXPIRATION_TIME = timedelta(hours=3)
 DEFAULT_FROM_EMAIL = 'api@yatube.com'
@@ -0,0 +1,145 @@
+"""
+Latency of filtering titles by several genres: joins per genre against
+the through table lookup of TitleQuerySet.with_genres().
+
+    python -m benchmarks.genres --fresh
+    python -m benchmarks.genres --titles 500000 --genres-per-title 5
+
+The catalogue is generated into its own SQLite file, by default
+tmp/benchmark-genres.sqlite3, since it needs far more titles per genre
+than benchmarks.seed creates. For every mode and number of genres the
+count and the first page of the title list are fetched, as the paginated
+API does, and the results of both approaches are compared.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import django
+
+from .run import percentile
+from .seed import spread
+
+DEFAULT_DATABASE = 'tmp/benchmark-genres.sqlite3'
+GENRES = 30
+PAGE_SIZE = 10
+
+
+def fill(titles, genres_per_title, random_seed=0, chunk_size=10000):
+    """Titles with "genres_per_title" random genres each, in bulk."""
+    from api.models import Genre, Title
+
+    rng = random.Random(random_seed)
+    Genre.objects.bulk_create(
+        Genre(id=number, name=f'Жанр {number}', slug=f'genre-{number}')
+        for number in range(1, GENRES + 1)
+    )
+    through = Title.genre.through
+    title_id = 0
+    for size in spread(titles, -(-titles // chunk_size) or 1):
+        first_id = title_id + 1
+        title_id += size
+        Title.objects.bulk_create(
+            Title(id=pk, name=f'Произведение {pk}', year=2000)
+            for pk in range(first_id, title_id + 1)
+        )
+        through.objects.bulk_create(
+            through(title_id=pk, genre_id=genre_id)
+            for pk in range(first_id, title_id + 1)
+            for genre_id in rng.sample(range(1, GENRES + 1),
+                                       genres_per_title)
+        )
+
+
+def joined(queryset, slugs, match_all):
+    """The naive query: one join per genre and DISTINCT against repeats."""
+    if not match_all:
+        return queryset.filter(genre__slug__in=slugs).distinct()
+    for slug in slugs:
+        queryset = queryset.filter(genre__slug=slug)
+    return queryset.distinct()
+
+
+def through_lookup(queryset, slugs, match_all):
+    return queryset.with_genres(slugs, match_all=match_all)
+
+
+def fetch(queryset):
+    """What a page of the title list reads: the count and the first ids."""
+    return queryset.count(), list(
+        queryset.order_by('-id').values_list('id', flat=True)[:PAGE_SIZE]
+    )
+
+
+def measure(build, slugs, match_all, iterations):
+    from api.models import Title
+
+    timings, result = [], None
+    for _ in range(iterations):
+        started = time.perf_counter()
+        result = fetch(build(Title.objects.all(), slugs, match_all))
+        timings.append(time.perf_counter() - started)
+    return result, percentile(timings, 0.5) * 1000
+
+
+def compare(iterations, genre_counts=(2, 3, 5)):
+    """Rows of (mode, genres, titles found, joined ms, with_genres() ms)."""
+    rows = []
+    for match_all in (False, True):
+        for count in genre_counts:
+            slugs = [f'genre-{number}' for number in range(1, count + 1)]
+            expected, joined_ms = measure(joined, slugs, match_all,
+                                          iterations)
+            result, lookup_ms = measure(through_lookup, slugs, match_all,
+                                        iterations)
+            if result != expected:
+                raise AssertionError(
+                    f'Результаты не совпадают для {slugs}: {result} и '
+                    f'{expected}'
+                )
+            rows.append(('all' if match_all else 'any', count, result[0],
+                         joined_ms, lookup_ms))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--titles', type=int, default=500000)
+    parser.add_argument('--genres-per-title', type=int, default=5)
+    parser.add_argument('--iterations', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Начальное значение генератора случайных чисел.')
+    parser.add_argument('--fresh', action='store_true',
+                        help='Пересоздать базу перед замером.')
+    options = parser.parse_args(argv)
+
+    os.environ.setdefault('BENCHMARK_DATABASE', DEFAULT_DATABASE)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+    django.setup()
+    from django.conf import settings
+    from django.core.management import call_command
+
+    path = settings.DATABASES['default']['NAME']
+    if options.fresh and os.path.exists(path):
+        os.remove(path)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        call_command('migrate', verbosity=0)
+        started = time.monotonic()
+        fill(options.titles, options.genres_per_title,
+             random_seed=options.seed)
+        print(f'База заполнена за {time.monotonic() - started:.0f} с: '
+              f'{path}', file=sys.stderr)
+
+    for mode, count, found, joined_ms, lookup_ms in compare(
+            options.iterations):
+        print(f'{mode}, жанров {count}, найдено {found}: '
+              f'JOIN на жанр {joined_ms:.1f} мс, '
+              f'with_genres() {lookup_ms:.1f} мс, '
+              f'ускорение {joined_ms / lookup_ms:.1f}×')
+
+
+if __name__ == '__main__':
+    main()
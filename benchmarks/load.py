@@ -0,0 +1,191 @@
+"""
+Compare the throughput of the WSGI and ASGI deployments under load.
+
+    python -m benchmarks.load --connections 50 --slow-clients 20 --slow 2
+
+Both servers run under gunicorn with the same number of workers against
+the database filled by benchmarks.seed. Fast clients send requests to the
+read endpoints back to back while slow clients, like those on a mobile
+network, spend --slow seconds sending each request head. The throughput
+and latency of the fast clients are reported.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import django
+
+from .run import fill, percentile
+
+DEFAULT_OUTPUT = 'tmp/benchmark-load.json'
+
+SERVERS = {
+    'wsgi': ('api_yamdb.wsgi:application',),
+    'asgi': ('api_yamdb.asgi:application',
+             '--worker-class', 'uvicorn.workers.UvicornH11Worker'),
+}
+PATHS = (
+    '/api/v1/titles/',
+    '/api/v1/titles/{title}/',
+    '/api/v1/titles/{title}/reviews/',
+    '/api/v1/titles/{title}/reviews/{review}/comments/',
+    '/api/v1/categories/',
+    '/api/v1/genres/',
+)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(mode, port, workers):
+    # gunicorn 20.0 cannot be run with "python -m".
+    command = (sys.executable, '-c',
+               'from gunicorn.app.wsgiapp import run; run()', *SERVERS[mode],
+               '--workers', str(workers), '--bind', f'127.0.0.1:{port}',
+               '--log-level', 'warning')
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE='benchmarks.settings')
+    return subprocess.Popen(command, env=env)
+
+
+async def fetch(port, path, slow=0, parts=10):
+    """
+    Status of one request. A slow client sends the head of the request in
+    "parts" pieces spread over "slow" seconds.
+    """
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    head = (f'GET {path} HTTP/1.1\r\nHost: testserver\r\n'
+            f'Connection: close\r\n\r\n').encode()
+    try:
+        if slow:
+            size = -(-len(head) // parts)
+            for start in range(0, len(head), size):
+                writer.write(head[start:start + size])
+                await writer.drain()
+                await asyncio.sleep(slow / parts)
+        else:
+            writer.write(head)
+        await writer.drain()
+        response = await reader.read()
+    finally:
+        writer.close()
+    return int(response.split(b' ', 2)[1])
+
+
+async def wait_until_ready(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if await fetch(port, '/api/v1/genres/') == 200:
+                return
+        except (OSError, IndexError, ValueError):
+            pass
+        if time.monotonic() > deadline:
+            raise RuntimeError('Сервер не запустился')
+        await asyncio.sleep(0.2)
+
+
+async def load(port, paths, connections, slow_clients, slow, duration):
+    """Latencies of the fast clients while slow ones keep connecting."""
+    deadline = time.monotonic() + duration
+    latencies, errors = [], 0
+
+    async def client(number, slow):
+        nonlocal errors
+        sent = number
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                status = await fetch(port, paths[sent % len(paths)], slow)
+            except (OSError, IndexError, ValueError):
+                status = None
+            if status != 200:
+                errors += 1
+            elif not slow:
+                latencies.append(time.perf_counter() - started)
+            sent += 1
+
+    started = time.monotonic()
+    await asyncio.gather(
+        *(client(number, 0) for number in range(connections)),
+        *(client(number, slow) for number in range(slow_clients)),
+    )
+    elapsed = time.monotonic() - started
+    if not latencies:
+        raise RuntimeError('Ни один запрос не выполнен успешно')
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.5) * 1000, 1),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 1),
+    }
+
+
+def benchmark(mode, paths, options):
+    port = free_port()
+    server = start_server(mode, port, options.workers)
+    try:
+        asyncio.run(wait_until_ready(port))
+        return asyncio.run(load(port, paths, options.connections,
+                                options.slow_clients, options.slow,
+                                options.duration))
+    finally:
+        server.terminate()
+        server.wait(30)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--connections', type=int, default=50,
+                        help='Количество быстрых клиентов.')
+    parser.add_argument('--slow-clients', type=int, default=20,
+                        help='Количество медленных клиентов.')
+    parser.add_argument('--duration', type=float, default=15,
+                        help='Длительность нагрузки на каждый сервер, с.')
+    parser.add_argument('--slow', type=float, default=2,
+                        help='За сколько секунд медленный клиент '
+                             'отправляет заголовки запроса.')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--output', default=DEFAULT_OUTPUT,
+                        help='Файл для результатов в формате JSON.')
+    options = parser.parse_args(argv)
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+    django.setup()
+    from .run import BenchmarkError, get_samples
+
+    try:
+        samples = get_samples()
+    except BenchmarkError as error:
+        sys.exit(str(error))
+    paths = [fill(path, samples) for path in PATHS]
+
+    results = {'options': vars(options)}
+    for mode in SERVERS:
+        results[mode] = benchmark(mode, paths, options)
+        print(f'{mode}: {results[mode]["requests_per_second"]} запросов/с, '
+              f'p95 {results[mode]["p95_ms"]} мс, '
+              f'ошибок {results[mode]["errors"]}')
+    results['speedup'] = round(
+        results['asgi']['requests_per_second']
+        / max(results['wsgi']['requests_per_second'], 1e-6), 2
+    )
+    print(f'ASGI быстрее WSGI в {results["speedup"]} раза')
+
+    directory = os.path.dirname(options.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(options.output, 'w', encoding='utf-8') as file:
+        json.dump(results, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
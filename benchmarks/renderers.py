@@ -0,0 +1,74 @@
+"""
+CPU time of rendering and parsing JSON: the stock DRF classes against
+FastJSONRenderer and FastJSONParser.
+
+    python -m benchmarks.renderers --page-size 100 --repeat 500
+
+Pages of titles and reviews are serialized once from the database filled
+by benchmarks.seed, so only encoding and decoding are measured.
+"""
+import argparse
+import io
+import os
+import time
+
+import django
+
+
+def cpu_per_call(function, data, repeat):
+    started = time.process_time()
+    for _ in range(repeat):
+        function(data)
+    return (time.process_time() - started) / repeat * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=500)
+    options = parser.parse_args(argv)
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+    django.setup()
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+
+    from api.models import Review, Title
+    from api.parsers import FastJSONParser
+    from api.renderers import FastJSONRenderer, orjson
+    from api.serializers import (TITLE_COLUMNS, ReviewsSerializer,
+                                 TitleRowSerializer)
+
+    if orjson is None:
+        print('orjson не установлен, FastJSONRenderer использует '
+              'стандартный рендерер')
+    size = options.page_size
+    pages = {
+        'titles': TitleRowSerializer(
+            Title.objects.order_by('-id').values(*TITLE_COLUMNS)[:size],
+            many=True
+        ).data,
+        'reviews': ReviewsSerializer(
+            Review.objects.select_related('author').order_by('-id')[:size],
+            many=True
+        ).data,
+    }
+    for name, data in pages.items():
+        body = JSONRenderer().render(data)
+        assert FastJSONRenderer().render(data) == body, name
+        for measure, stock, fast, argument in (
+            ('render', JSONRenderer().render, FastJSONRenderer().render,
+             data),
+            ('parse', lambda body: JSONParser().parse(io.BytesIO(body)),
+             lambda body: FastJSONParser().parse(io.BytesIO(body)), body),
+        ):
+            stock_ms = cpu_per_call(stock, argument, options.repeat)
+            fast_ms = cpu_per_call(fast, argument, options.repeat)
+            print(f'{name} {measure}, {len(body)} байт: '
+                  f'стандартный {stock_ms:.3f} мс, '
+                  f'быстрый {fast_ms:.3f} мс, '
+                  f'ускорение {stock_ms / fast_ms:.1f}×')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,365 @@
+"""
+Measure latency and queries per request of every API route.
+
+    python -m benchmarks.run --iterations 50
+    python -m benchmarks.run --baseline benchmarks/baseline.json
+
+Requests go through the Django test client against the database filled
+by benchmarks.seed. Writes are rolled back after every request, so runs
+are repeatable. With --baseline the run fails when a route got slower than
+the threshold allows or sends more queries than before.
+"""
+import argparse
+import datetime as dt
+import json
+import math
+import os
+import platform
+import sqlite3
+import sys
+import time
+from contextlib import nullcontext
+
+import django
+
+DEFAULT_OUTPUT = 'tmp/benchmark-results.json'
+ADMIN_USERNAME = 'benchmark-admin'
+NEW_USER_EMAIL = 'benchmark@yamdb.fake'
+
+BULK_TITLES = [{'name': f'Бенчмарк {number}', 'year': 2000,
+                'category': '{category}', 'genre': ['{genre}']}
+               for number in range(1000)]
+
+NO_CACHE = {'default': {
+    'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+}}
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+class Case:
+    """
+    One request to one route. Strings in "path" and "data" are formatted
+    with the sample objects picked from the database.
+    """
+
+    def __init__(self, name, route, path, method='get', data=None,
+                 admin=False, status=200, rollback=False, iterations=None):
+        self.name = name
+        self.route = route
+        self.path = path
+        self.method = method
+        self.data = data
+        self.admin = admin
+        self.status = status
+        self.rollback = rollback or method != 'get'
+        self.iterations = iterations
+
+
+CASES = (
+    Case('api-root', 'api-root', '/api/v1/', admin=True),
+    Case('user-list', 'user-list', '/api/v1/users/', admin=True),
+    Case('user-create', 'user-list', '/api/v1/users/', 'post',
+         {'username': 'benchmark-user', 'email': 'user@benchmark.fake'},
+         admin=True, status=201),
+    Case('user-detail', 'user-detail', '/api/v1/users/{username}/',
+         admin=True),
+    Case('user-me', 'user-me', '/api/v1/users/me/', admin=True),
+    Case('user-me-update', 'user-me', '/api/v1/users/me/', 'patch',
+         {'bio': 'Бенчмарк'}, admin=True),
+    Case('category-list', 'category-list', '/api/v1/categories/'),
+    Case('category-create', 'category-list', '/api/v1/categories/', 'post',
+         {'name': 'Бенчмарк', 'slug': 'benchmark'}, admin=True, status=201),
+    Case('category-delete', 'category-detail',
+         '/api/v1/categories/{category}/', 'delete', admin=True,
+         status=204),
+    Case('category-bulk', 'category-bulk', '/api/v1/categories/bulk/',
+         'post', [{'name': f'Бенчмарк {number}', 'slug': f'benchmark-{number}'}
+                  for number in range(100)], admin=True, status=201),
+    Case('genre-list', 'genre-list', '/api/v1/genres/'),
+    Case('genre-bulk', 'genre-bulk', '/api/v1/genres/bulk/', 'post',
+         [{'name': f'Бенчмарк {number}', 'slug': f'benchmark-{number}'}
+          for number in range(100)], admin=True, status=201),
+    Case('genre-delete', 'genre-detail', '/api/v1/genres/{genre}/',
+         'delete', admin=True, status=204),
+    Case('title-list', 'title-list', '/api/v1/titles/'),
+    Case('title-list-genre', 'title-list', '/api/v1/titles/?genre={genre}'),
+    Case('title-list-genres-any', 'title-list',
+         '/api/v1/titles/?genre=genre-0,genre-1,genre-2'),
+    Case('title-list-genres-all', 'title-list',
+         '/api/v1/titles/?genre=genre-0,genre-1&genre_mode=all'),
+    Case('title-list-search', 'title-list',
+         '/api/v1/titles/?search=поезд'),
+    Case('title-list-fields', 'title-list',
+         '/api/v1/titles/?fields=id,name,rating'),
+    Case('title-list-top-rated', 'title-list',
+         '/api/v1/titles/?ordering=-rating'),
+    Case('title-list-category-top-rated', 'title-list',
+         '/api/v1/titles/?category={category}&ordering=-rating'),
+    Case('title-list-genre-top-rated', 'title-list',
+         '/api/v1/titles/?genre={genre}&ordering=-rating&rating_min=5'),
+    Case('title-create', 'title-list', '/api/v1/titles/', 'post',
+         {'name': 'Бенчмарк', 'year': 2000, 'category': '{category}',
+          'genre': ['{genre}']}, admin=True, status=201),
+    Case('title-bulk-create', 'title-bulk', '/api/v1/titles/bulk/', 'post',
+         BULK_TITLES, admin=True, status=201, iterations=5),
+    Case('title-bulk-update', 'title-bulk', '/api/v1/titles/bulk/', 'patch',
+         [{'id': '{title}', 'year': 2001, 'genre': ['{genre}']}],
+         admin=True),
+    Case('title-detail', 'title-detail', '/api/v1/titles/{title}/'),
+    Case('title-stats', 'title-stats', '/api/v1/titles/{title}/stats/'),
+    Case('title-export', 'title-export', '/api/v1/titles/export/',
+         admin=True, iterations=3),
+    Case('review-list', 'review-list', '/api/v1/titles/{title}/reviews/'),
+    Case('review-list-fields', 'review-list',
+         '/api/v1/titles/{title}/reviews/?fields=id,score,author'),
+    Case('review-create', 'review-list', '/api/v1/titles/{title}/reviews/',
+         'post', {'text': 'Бенчмарк', 'score': 5}, admin=True, status=201),
+    Case('review-detail', 'review-detail',
+         '/api/v1/titles/{title}/reviews/{review}/'),
+    Case('comment-list', 'comment-list',
+         '/api/v1/titles/{title}/reviews/{review}/comments/'),
+    Case('comment-create', 'comment-list',
+         '/api/v1/titles/{title}/reviews/{review}/comments/', 'post',
+         {'text': 'Бенчмарк'}, admin=True, status=201),
+    Case('comment-detail', 'comment-detail',
+         '/api/v1/titles/{title}/reviews/{review}/comments/{comment}/'),
+    Case('auth-email', 'send_confirmation_code_view', '/api/v1/auth/email/',
+         'post', {'email': NEW_USER_EMAIL}),
+    Case('auth-token', 'token_receive_view', '/api/v1/auth/token/', 'post',
+         {'email': NEW_USER_EMAIL, 'confirmation_code': '{code}'}),
+    Case('auth-email-stats', 'mail_queue_stats_view',
+         '/api/v1/auth/email/stats/', admin=True),
+    Case('metrics', 'metrics_view', '/api/v1/_metrics', admin=True),
+    Case('batch-title-page', 'batch_view', '/api/v1/batch/', 'post',
+         {'requests': [
+             {'path': '/api/v1/titles/{title}/'},
+             {'path': '/api/v1/titles/{title}/reviews/'},
+             {'path': '/api/v1/titles/{title}/reviews/{review}/comments/'},
+             {'path': '/api/v1/genres/'},
+         ]}, admin=True),
+)
+
+
+def route_names():
+    """Names of every route declared in api/urls.py."""
+    from api.urls import auth_patterns, router_v1
+
+    return {pattern.name for pattern in router_v1.urls + auth_patterns}
+
+
+def uncovered_routes(cases=CASES):
+    return sorted(route_names() - {case.route for case in cases})
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)]
+
+
+def fill(value, samples):
+    if isinstance(value, str):
+        return value.format(**samples)
+    if isinstance(value, dict):
+        return {key: fill(item, samples) for key, item in value.items()}
+    if isinstance(value, list):
+        return [fill(item, samples) for item in value]
+    return value
+
+
+def get_samples():
+    """Objects the requests refer to, and the admin's credentials."""
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    from api.models import Category, Comment, Genre, User
+    from api.views import create_jwt
+
+    comment = (Comment.objects.select_related('review__author')
+               .order_by('id').first())
+    if comment is None:
+        raise BenchmarkError(
+            'В базе нет комментариев: сначала выполните '
+            'python -m benchmarks.seed.'
+        )
+    admin, _ = User.objects.get_or_create(
+        username=ADMIN_USERNAME,
+        defaults={'email': f'{ADMIN_USERNAME}@yamdb.fake',
+                  'role': User.ADMIN_ROLE, 'is_staff': True},
+    )
+    return {
+        'title': comment.review.title_id,
+        'review': comment.review_id,
+        'comment': comment.id,
+        'username': comment.review.author.username,
+        'category': Category.objects.order_by('id').first().slug,
+        'genre': Genre.objects.order_by('id').first().slug,
+        'code': create_jwt(NEW_USER_EMAIL),
+        'token': str(AccessToken.for_user(admin)),
+    }
+
+
+def send(client, case, samples):
+    extra = {}
+    if case.admin:
+        extra['HTTP_AUTHORIZATION'] = f'Bearer {samples["token"]}'
+    request = getattr(client, case.method)
+    path = fill(case.path, samples)
+    if case.method == 'get':
+        response = request(path, **extra)
+    else:
+        response = request(path, json.dumps(fill(case.data, samples)),
+                           content_type='application/json', **extra)
+    if response.streaming:
+        # A streamed response is only produced while it is read.
+        b''.join(response.streaming_content)
+    return response
+
+
+def measure(client, case, samples, iterations):
+    """Timings in milliseconds and query counts of repeated requests."""
+    from django.db import connection, transaction
+    from django.test.utils import CaptureQueriesContext
+
+    timings, queries = [], []
+    # The first request warms up imports and connections, untimed.
+    for iteration in range(iterations + 1):
+        with transaction.atomic() if case.rollback else nullcontext():
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                response = send(client, case, samples)
+                elapsed = time.perf_counter() - started
+            if case.rollback:
+                transaction.set_rollback(True)
+        if response.status_code != case.status:
+            raise BenchmarkError(
+                f'{case.name}: ожидался статус {case.status}, '
+                f'получен {response.status_code}'
+            )
+        if iteration:
+            timings.append(elapsed * 1000)
+            queries.append(len(context.captured_queries))
+    return {
+        'method': case.method.upper(),
+        'path': case.path,
+        'iterations': iterations,
+        'p50_ms': round(percentile(timings, 0.5), 3),
+        'p95_ms': round(percentile(timings, 0.95), 3),
+        'mean_ms': round(sum(timings) / len(timings), 3),
+        'queries': max(queries),
+    }
+
+
+def run(cases=CASES, iterations=30, with_cache=False, progress=None):
+    from django.core.cache import cache
+    from django.test import Client
+    from django.test.utils import override_settings
+
+    from api.models import Comment, Review, Title
+
+    samples = get_samples()
+    client = Client()
+    results = {}
+    with override_settings(**({} if with_cache else {'CACHES': NO_CACHE})):
+        for case in cases:
+            cache.clear()
+            results[case.name] = measure(
+                client, case, samples, case.iterations or iterations
+            )
+            if progress is not None:
+                progress(case.name, results[case.name])
+    return {
+        'meta': {
+            'created': dt.datetime.now(dt.timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'iterations': iterations,
+            'with_cache': with_cache,
+            'titles': Title.objects.count(),
+            'reviews': Review.objects.count(),
+            'comments': Comment.objects.count(),
+        },
+        'results': results,
+    }
+
+
+def compare(results, baseline, threshold):
+    """Regressions of "results" against "baseline"."""
+    regressions = []
+    for name, current in results['results'].items():
+        previous = baseline['results'].get(name)
+        if previous is None:
+            continue
+        if current['p95_ms'] > previous['p95_ms'] * (1 + threshold):
+            regressions.append(
+                f'{name}: p95 {current["p95_ms"]:.1f} мс, '
+                f'в базовом прогоне {previous["p95_ms"]:.1f} мс'
+            )
+        if current['queries'] > previous['queries']:
+            regressions.append(
+                f'{name}: {current["queries"]} запросов к БД, '
+                f'в базовом прогоне {previous["queries"]}'
+            )
+    return regressions
+
+
+def report_progress(name, result):
+    print(f'{name:<20} {result["p50_ms"]:>9.1f} {result["p95_ms"]:>9.1f} '
+          f'{result["queries"]:>8}', file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--iterations', type=int, default=30,
+                        help='Количество замеров каждого запроса.')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT,
+                        help='Файл для результатов в формате JSON.')
+    parser.add_argument('--baseline',
+                        help='Результаты прошлого прогона для сравнения.')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Допустимый относительный рост p95.')
+    parser.add_argument('--only', nargs='+', metavar='CASE',
+                        help='Выполнить только указанные замеры.')
+    parser.add_argument('--with-cache', action='store_true',
+                        help='Не отключать кэш ответов API.')
+    options = parser.parse_args(argv)
+    if options.iterations < 1:
+        parser.error('--iterations должен быть положительным.')
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+    django.setup()
+
+    cases = [case for case in CASES
+             if not options.only or case.name in options.only]
+    for route in uncovered_routes():
+        print(f'Маршрут {route} не покрыт бенчмарками', file=sys.stderr)
+    print(f'{"":<20} {"p50, мс":>9} {"p95, мс":>9} {"запросы":>8}',
+          file=sys.stderr)
+    try:
+        results = run(cases, options.iterations, options.with_cache,
+                      progress=report_progress)
+    except BenchmarkError as error:
+        sys.exit(str(error))
+
+    directory = os.path.dirname(options.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(options.output, 'w', encoding='utf-8') as file:
+        json.dump(results, file, ensure_ascii=False, indent=2)
+    print(f'Результаты записаны в {options.output}')
+
+    if options.baseline:
+        with open(options.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, options.threshold)
+        if regressions:
+            sys.exit('Замедление относительно базового прогона:\n'
+                     + '\n'.join(regressions))
+        print('Замедлений относительно базового прогона нет.')
+
+
+if __name__ == '__main__':
+    main()
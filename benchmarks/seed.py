@@ -0,0 +1,141 @@
+"""
+Fill the benchmark database with a generated catalogue.
+
+    python -m benchmarks.seed --fresh
+    python -m benchmarks.seed --titles 1000 --reviews 20000 --comments 50000
+
+Rows go through CatalogueImporter, so seeding exercises the same bulk
+import path as the import_data command.
+"""
+import argparse
+import os
+import random
+import sys
+
+import django
+
+WORDS = ('поезд', 'город', 'ночь', 'море', 'война', 'мир', 'дом', 'песня',
+         'звезда', 'зима', 'дорога', 'сад', 'тень', 'остров', 'письмо',
+         'река', 'сон', 'ветер', 'огонь', 'мастер')
+CATEGORIES = 10
+GENRES = 30
+
+
+def spread(total, buckets):
+    """How many of "total" items fall into each of "buckets" buckets."""
+    share, extra = divmod(total, buckets)
+    for number in range(buckets):
+        yield share + (number < extra)
+
+
+def user_rows(count):
+    for number in range(count):
+        yield {'username': f'user{number}',
+               'email': f'user{number}@yamdb.fake'}
+
+
+def category_rows():
+    for number in range(CATEGORIES):
+        yield {'name': f'Категория {number}', 'slug': f'category-{number}'}
+
+
+def genre_rows():
+    for number in range(GENRES):
+        yield {'name': f'Жанр {number}', 'slug': f'genre-{number}'}
+
+
+def title_rows(count, rng):
+    for number in range(1, count + 1):
+        genres = rng.sample(range(GENRES), rng.randint(1, 3))
+        yield {
+            'id': number,
+            'name': ' '.join(rng.sample(WORDS, rng.randint(1, 3))),
+            'year': rng.randint(1900, 2024),
+            'description': ' '.join(rng.choices(WORDS, k=20)),
+            'category': f'category-{rng.randrange(CATEGORIES)}',
+            'genre': [f'genre-{genre}' for genre in genres],
+        }
+
+
+def review_rows(titles, count, users, rng):
+    """Reviews of one title are written by consecutive users."""
+    review_id = 0
+    for title_id, reviews in enumerate(spread(count, titles), start=1):
+        for offset in range(reviews):
+            review_id += 1
+            yield {
+                'id': review_id,
+                'title': title_id,
+                'author': f'user{(title_id + offset) % users}',
+                'text': ' '.join(rng.choices(WORDS, k=30)),
+                'score': rng.randint(1, 10),
+            }
+
+
+def comment_rows(reviews, count, users, rng):
+    for review_id, comments in enumerate(spread(count, reviews), start=1):
+        for _ in range(comments):
+            yield {
+                'review': review_id,
+                'author': f'user{rng.randrange(users)}',
+                'text': ' '.join(rng.choices(WORDS, k=10)),
+            }
+
+
+def seed(titles, reviews, comments, users, random_seed=0, progress=None,
+         chunk_size=None):
+    """Generate and import the catalogue into the default database."""
+    from api.importers import DEFAULT_CHUNK_SIZE, CatalogueImporter
+
+    if titles and reviews / titles > users:
+        raise ValueError('Пользователей меньше, чем отзывов на произведение.')
+    rng = random.Random(random_seed)
+    importer = CatalogueImporter(chunk_size=chunk_size or DEFAULT_CHUNK_SIZE,
+                                 progress=progress)
+    try:
+        importer.import_users(user_rows(users))
+        importer.import_categories(category_rows())
+        importer.import_genres(genre_rows())
+        importer.import_titles(title_rows(titles, rng))
+        importer.import_reviews(review_rows(titles, reviews, users, rng))
+        importer.import_comments(comment_rows(reviews, comments, users, rng))
+    finally:
+        importer.finish()
+
+
+def report_progress(model, total, seconds):
+    print(f'  {model._meta.verbose_name_plural}: {total} строк, '
+          f'{total / max(seconds, 1e-6):.0f} строк/с', file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--titles', type=int, default=100000)
+    parser.add_argument('--reviews', type=int, default=2000000)
+    parser.add_argument('--comments', type=int, default=5000000)
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Начальное значение генератора случайных чисел.')
+    parser.add_argument('--fresh', action='store_true',
+                        help='Удалить базу бенчмарков перед заполнением.')
+    options = parser.parse_args(argv)
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+    django.setup()
+    from django.conf import settings
+    from django.core.management import call_command
+
+    path = settings.DATABASES['default']['NAME']
+    if os.path.exists(path):
+        if not options.fresh:
+            parser.error(f'{path} уже существует, используйте --fresh.')
+        os.remove(path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    call_command('migrate', verbosity=0)
+    seed(options.titles, options.reviews, options.comments, options.users,
+         random_seed=options.seed, progress=report_progress)
+    print(f'База бенчмарков заполнена: {path}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+"""Settings for the benchmark suite: a separate SQLite file, no throttling."""
+import os
+
+from api_yamdb.settings import *  # noqa: F401,F403
+from api_yamdb.settings import BASE_DIR, REST_FRAMEWORK
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get(
+            'BENCHMARK_DATABASE',
+            os.path.join(BASE_DIR, 'tmp/benchmark.sqlite3')
+        ),
+    }
+}
+DATABASE_REPLICAS = []
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    'DEFAULT_THROTTLE_RATES': {
+        'auth-non-employee': None,
+        'burst-non-employee': None,
+    },
+}
+
+EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+
+DEBUG = False
+ALLOWED_HOSTS = ['testserver']
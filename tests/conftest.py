@@ -1,9 +1,36 @@
 import sys
 from os.path import abspath, dirname
 
+import pytest
+from django.core.cache import cache
+
 root_dir = dirname(dirname(abspath(__file__)))
 sys.path.append(root_dir)
 
 
 pytest_plugins = [
+    'tests.fixtures.fixture_user',
+    'tests.fixtures.fixture_data',
 ]
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def throttle_store(settings, tmp_path):
+    settings.THROTTLE_STORE_PATH = str(tmp_path / 'throttle.sqlite3')
+
+
+@pytest.fixture(autouse=True)
+def metrics_store(settings, tmp_path):
+    settings.METRICS_STORE_PATH = str(tmp_path / 'metrics.sqlite3')
+
+
+@pytest.fixture(autouse=True)
+def version_store(settings, tmp_path):
+    settings.VERSION_STORE_PATH = str(tmp_path / 'versions.sqlite3')
@@ -0,0 +1,44 @@
+import pytest
+
+from api.models import Category, Comment, Genre, Review, Title
+
+
+@pytest.fixture
+def category():
+    return Category.objects.create(name='Фильм', slug='films')
+
+
+@pytest.fixture
+def genres():
+    return [
+        Genre.objects.create(name='Драма', slug='drama'),
+        Genre.objects.create(name='Комедия', slug='comedy'),
+    ]
+
+
+@pytest.fixture
+def title(category, genres):
+    title = Title.objects.create(name='Поезд', year=1895, category=category,
+                                 description='Прибытие поезда')
+    title.genre.set(genres)
+    return title
+
+
+@pytest.fixture
+def reviews(title, user, another_user):
+    return [
+        Review.objects.create(title=title, author=user, text='Хорошо',
+                              score=7),
+        Review.objects.create(title=title, author=another_user,
+                              text='Отлично', score=10),
+    ]
+
+
+@pytest.fixture
+def comments(reviews, user, another_user):
+    return [
+        Comment.objects.create(review=reviews[0], author=another_user,
+                               text='Согласен'),
+        Comment.objects.create(review=reviews[0], author=user,
+                               text='Спасибо'),
+    ]
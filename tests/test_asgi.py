@@ -0,0 +1,77 @@
+import asyncio
+import json
+
+import pytest
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api_yamdb.handlers import ThreadPoolASGIHandler
+
+
+def request(handler, method, path, token=None, body=b'', parts=1):
+    """Send one request; the body arrives in "parts" messages."""
+    headers = [(b'host', b'testserver'),
+               (b'content-type', b'application/json'),
+               (b'content-length', str(len(body)).encode())]
+    if token is not None:
+        headers.append((b'authorization', f'Bearer {token}'.encode()))
+    size = -(-len(body) // parts) or 1
+    incoming = [
+        {'type': 'http.request', 'body': body[start:start + size],
+         'more_body': start + size < len(body)}
+        for start in range(0, max(len(body), 1), size)
+    ]
+    outgoing = []
+
+    async def receive():
+        await asyncio.sleep(0.01)
+        return incoming.pop(0)
+
+    async def send(message):
+        outgoing.append(message)
+
+    scope = {'type': 'http', 'method': method, 'path': path,
+             'query_string': b'', 'headers': headers, 'scheme': 'http',
+             'http_version': '1.1', 'server': ('testserver', 80)}
+    asyncio.run(handler(scope, receive, send))
+    body = b''.join(message.get('body', b'') for message in outgoing[1:])
+    return outgoing[0]['status'], body
+
+
+@pytest.fixture
+def handler():
+    handler = ThreadPoolASGIHandler()
+    yield handler
+    handler.read_executor.shutdown()
+    handler.write_executor.shutdown()
+
+
+@pytest.mark.django_db(transaction=True)
+class TestThreadPoolASGIHandler:
+
+    def test_reads_use_read_pool(self, handler, title):
+        status, body = request(handler, 'GET', '/api/v1/titles/')
+        assert status == 200
+        assert json.loads(body)['results'][0]['name'] == title.name
+        assert handler.read_executor._threads
+        assert not handler.write_executor._threads, (
+            'Проверьте, что чтение выполняется в пуле потоков для чтения'
+        )
+
+    def test_writes_use_write_pool(self, handler, admin):
+        body = json.dumps({'name': 'Книга', 'slug': 'books'}).encode()
+        status, _ = request(handler, 'POST', '/api/v1/categories/',
+                            token=AccessToken.for_user(admin), body=body,
+                            parts=3)
+        assert status == 201
+        assert handler.write_executor._threads
+        assert not handler.read_executor._threads
+
+    def test_streamed_response(self, handler, admin, title):
+        status, body = request(handler, 'GET', '/api/v1/titles/export/',
+                               token=AccessToken.for_user(admin))
+        assert status == 200, (
+            'Проверьте, что потоковый ответ читает базу не в цикле событий'
+        )
+        assert [json.loads(line)['id'] for line in body.splitlines()] == [
+            title.id
+        ]
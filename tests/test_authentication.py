@@ -0,0 +1,65 @@
+import time
+
+import pytest
+
+from api import cache
+from api.authentication import user_cache
+from api.models import User
+from api.stores import VersionStore
+
+
+@pytest.fixture(autouse=True)
+def clear_user_cache():
+    user_cache.clear()
+    yield
+    user_cache.clear()
+
+
+@pytest.mark.django_db(transaction=True)
+class TestCachedAuthentication:
+
+    def test_user_is_cached(self, user_client, django_assert_num_queries):
+        assert user_client.get('/api/v1/users/me/').status_code == 200
+        with django_assert_num_queries(0):
+            response = user_client.get('/api/v1/users/me/')
+        assert response.json()['username'] == 'TestUser', (
+            'Проверьте, что пользователь берётся из кэша без запроса к БД'
+        )
+
+    def test_role_change_by_admin(self, user_client, admin_client):
+        assert user_client.get('/api/v1/users/').status_code == 403
+        response = admin_client.patch('/api/v1/users/TestUser/',
+                                      {'role': 'moderator'})
+        assert response.status_code == 200
+        assert user_client.get('/api/v1/users/me/').json()['role'] == (
+            'moderator'
+        ), 'Проверьте, что смена роли сразу сбрасывает кэш'
+
+    def test_username_change_through_me(self, user_client):
+        user_client.get('/api/v1/users/me/')
+        user_client.patch('/api/v1/users/me/', {'username': 'Renamed'})
+        assert user_client.get('/api/v1/users/me/').json()['username'] == (
+            'Renamed'
+        )
+
+    def test_change_in_another_process(self, user, user_client, settings):
+        user_client.get('/api/v1/users/me/')
+        User.objects.filter(pk=user.pk).update(role='moderator')
+        VersionStore(settings.VERSION_STORE_PATH).set_many({
+            cache.VERSION_KEY.format(cache.USER.format(user.pk)):
+                time.time_ns()
+        })
+        assert user_client.get('/api/v1/users/me/').json()['role'] == (
+            'moderator'
+        ), 'Проверьте, что версии пользователей общие для всех процессов'
+
+    def test_deactivated_user(self, user, user_client):
+        user_client.get('/api/v1/users/me/')
+        user.is_active = False
+        user.save()
+        assert user_client.get('/api/v1/users/me/').status_code == 401
+
+    def test_deleted_user(self, user, user_client):
+        user_client.get('/api/v1/users/me/')
+        user.delete()
+        assert user_client.get('/api/v1/users/me/').status_code == 401
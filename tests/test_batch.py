@@ -0,0 +1,140 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.models import Comment, Review, Title
+from api.throttling import NonEmployeeScopedRateThrottle
+
+
+def batch(client, *requests):
+    return client.post('/api/v1/batch/', {'requests': list(requests)},
+                       format='json')
+
+
+@pytest.mark.django_db
+class TestBatch:
+
+    def test_reads(self, guest_client, title, comments):
+        review = comments[0].review
+        requests = (
+            {'path': f'/api/v1/titles/{title.id}/'},
+            {'path': f'/api/v1/titles/{title.id}/reviews/?fields=id,score'},
+            {'path': f'/api/v1/titles/{title.id}/reviews/{review.id}/'
+                     'comments/'},
+            {'path': '/api/v1/genres/'},
+            {'path': '/api/v1/users/'},
+            {'path': '/api/v1/nowhere/'},
+        )
+        response = batch(guest_client, *requests)
+        assert response.status_code == 200
+        results = response.json()['results']
+        for item, result in zip(requests[:4], results):
+            single = guest_client.get(item['path'])
+            assert result == {'status': 200, 'body': single.json()}, (
+                'Проверьте, что подзапрос отвечает так же, как отдельный '
+                'запрос'
+            )
+        assert results[4]['status'] == 401, (
+            'Проверьте, что права доступа проверяются для каждого подзапроса'
+        )
+        assert results[5]['status'] == 404
+
+    def test_links_and_routes(self, guest_client):
+        Title.objects.bulk_create(Title(name=f'Произведение {number}')
+                                  for number in range(11))
+        response = batch(guest_client,
+                         {'path': '/api/v1/titles/'},
+                         {'path': '/admin/'},
+                         {'path': '/admin/api/title/'},
+                         {'path': '/redoc/'})
+        assert response.status_code == 200
+        results = response.json()['results']
+        assert results[0]['body']['next'] == (
+            guest_client.get('/api/v1/titles/').json()['next']
+        ), 'Проверьте, что ссылки в подзапросах сохраняют схему запроса'
+        assert [result['status'] for result in results[1:]] == [404] * 3, (
+            'Проверьте, что в пакете доступны только представления API'
+        )
+
+    def test_authenticates_once(self, user_client, title):
+        with CaptureQueriesContext(connection) as context:
+            response = batch(user_client,
+                             {'path': '/api/v1/users/me/'},
+                             {'path': f'/api/v1/titles/{title.id}/'})
+        assert response.json()['results'][0]['body']['username'] == (
+            'TestUser'
+        )
+        user_queries = [query for query in context.captured_queries
+                        if 'FROM "api_user"' in query['sql']]
+        assert len(user_queries) <= 1
+
+    def test_throttled_once(self, guest_client, title, monkeypatch):
+        monkeypatch.setattr(NonEmployeeScopedRateThrottle, 'THROTTLE_RATES',
+                            {'burst-non-employee': '2/min'})
+        path = {'path': f'/api/v1/titles/{title.id}/'}
+        response = batch(guest_client, *[path] * 5)
+        assert response.status_code == 200
+        assert {result['status'] for result in response.json()['results']} \
+            == {200}, 'Проверьте, что подзапросы не ограничиваются отдельно'
+        assert batch(guest_client, path).status_code == 200
+        assert batch(guest_client, path).status_code == 429
+
+    def test_auth_throttled_per_item(self, guest_client, monkeypatch):
+        monkeypatch.setattr(NonEmployeeScopedRateThrottle, 'THROTTLE_RATES',
+                            {'burst-non-employee': '60/min',
+                             'auth-non-employee': '2/min'})
+        requests = [{'method': 'POST', 'path': '/api/v1/auth/email/',
+                     'body': {'email': f'user{number}@yamdb.fake'}}
+                    for number in range(3)]
+        response = batch(guest_client, *requests)
+        assert [result['status'] for result in response.json()['results']] \
+            == [200, 200, 429], (
+            'Проверьте, что подзапросы к авторизации ограничиваются '
+            'отдельно'
+        )
+
+    def test_writes_in_one_transaction(self, user_client, title, reviews):
+        review = reviews[0]
+        response = batch(
+            user_client,
+            {'method': 'POST',
+             'path': f'/api/v1/titles/{title.id}/reviews/{review.id}/'
+                     'comments/',
+             'body': {'text': 'Пакетный'}},
+            {'method': 'PATCH',
+             'path': f'/api/v1/titles/{title.id}/reviews/{review.id}/',
+             'body': {'score': 11}},
+        )
+        assert response.status_code == 400
+        assert [result['status'] for result in response.json()['results']] \
+            == [201, 400]
+        assert not Comment.objects.filter(text='Пакетный').exists(), (
+            'Проверьте, что изменения пакета отменяются при ошибке'
+        )
+
+        response = batch(
+            user_client,
+            {'method': 'PATCH',
+             'path': f'/api/v1/titles/{title.id}/reviews/{review.id}/',
+             'body': {'score': 3}},
+            {'path': f'/api/v1/titles/{title.id}/'},
+        )
+        assert response.status_code == 200
+        assert Review.objects.get(id=review.id).score == 3
+
+    @pytest.mark.parametrize('requests', (
+        [],
+        [{'path': '/api/v1/batch/', 'method': 'POST'}] * 21,
+        [{'path': 'api/v1/titles/'}],
+        [{'path': '/api/v1/titles/', 'method': 'TRACE'}],
+    ))
+    def test_invalid(self, guest_client, requests):
+        response = guest_client.post('/api/v1/batch/',
+                                     {'requests': requests}, format='json')
+        assert response.status_code == 400
+
+    def test_not_nested(self, guest_client):
+        response = batch(guest_client,
+                         {'method': 'POST', 'path': '/api/v1/batch/',
+                          'body': {'requests': []}})
+        assert response.json()['results'][0]['status'] == 400
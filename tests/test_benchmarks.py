@@ -0,0 +1,66 @@
+import pytest
+
+from api.models import Comment, Review, Title
+from benchmarks.genres import compare as compare_genres
+from benchmarks.genres import fill
+from benchmarks.run import CASES, compare, percentile, run, uncovered_routes
+from benchmarks.seed import seed, spread
+
+
+def result(p95_ms, queries):
+    return {'results': {'title-list': {'p95_ms': p95_ms,
+                                       'queries': queries}}}
+
+
+class TestBenchmarkHelpers:
+
+    def test_every_route_is_measured(self):
+        assert uncovered_routes() == [], (
+            'Добавьте в benchmarks/run.py замер для каждого маршрута API'
+        )
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        assert percentile(values, 0.5) == 50
+        assert percentile(values, 0.95) == 95
+        assert percentile([7], 0.95) == 7
+
+    def test_spread(self):
+        assert list(spread(10, 4)) == [3, 3, 2, 2]
+
+    def test_compare(self):
+        baseline = result(10.0, 3)
+        assert compare(result(12.0, 3), baseline, 0.25) == []
+        regressions = compare(result(13.0, 4), baseline, 0.25)
+        assert len(regressions) == 2, (
+            'Проверьте, что замедление и рост числа запросов — регрессии'
+        )
+        assert compare({'results': {'new': {}}}, baseline, 0.25) == []
+
+
+@pytest.mark.django_db
+def test_seed_and_run():
+    seed(titles=3, reviews=6, comments=9, users=2, chunk_size=4)
+    assert Title.objects.count() == 3
+    assert Review.objects.count() == 6
+    assert Comment.objects.count() == 9
+    assert Title.objects.get(pk=1).rating_count == 2
+
+    results = run(iterations=1)
+    assert set(results['results']) == {case.name for case in CASES}
+    assert results['meta']['titles'] == 3, (
+        'Созданные при замерах объекты должны откатываться'
+    )
+    for name, measurement in results['results'].items():
+        assert measurement['queries'] >= 0
+        assert 0 < measurement['p50_ms'] <= measurement['p95_ms'], name
+
+
+@pytest.mark.django_db
+def test_genre_benchmark():
+    fill(titles=50, genres_per_title=5, chunk_size=20)
+    assert Title.objects.count() == 50
+    assert Title.genre.through.objects.count() == 250
+    rows = compare_genres(iterations=1, genre_counts=(2,))
+    assert [row[:2] for row in rows] == [('any', 2), ('all', 2)]
+    assert rows[0][2] >= rows[1][2]
@@ -0,0 +1,144 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.models import Category, Genre, Title
+
+
+@pytest.mark.django_db
+class TestBulkTitles:
+    url = '/api/v1/titles/bulk/'
+
+    def test_create(self, admin_client, category, genres):
+        items = [
+            {'name': f'Произведение {number}', 'year': 2000 + number,
+             'category': category.slug,
+             'genre': [genre.slug for genre in genres[:number % 3]]}
+            for number in range(300)
+        ]
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(self.url, items, format='json')
+        assert response.status_code == 201, response.json()
+        assert len(context.captured_queries) < 20, (
+            'Проверьте, что произведения и жанры сохраняются пачками'
+        )
+        data = response.json()
+        assert len(data) == 300
+        title = Title.objects.get(id=data[5]['id'])
+        assert data[5] == {
+            'id': title.id, 'genre': [genres[0].slug, genres[1].slug],
+            'category': category.slug, 'name': 'Произведение 5',
+            'year': 2005, 'description': '',
+        }
+        assert sorted(title.genre.values_list('slug', flat=True)) == sorted(
+            data[5]['genre']
+        )
+        response = admin_client.get(f'/api/v1/titles/{title.id}/')
+        assert response.json()['category']['slug'] == category.slug
+
+    def test_errors_per_item(self, admin_client, category, genres):
+        items = [
+            {'name': 'Годное', 'genre': [genres[0].slug]},
+            {'name': 'Без жанра', 'genre': ['nope', genres[0].slug]},
+            {'year': 2000, 'category': 'missing'},
+            {'id': 5, 'name': 'С id'},
+        ]
+        response = admin_client.post(self.url, items, format='json')
+        assert response.status_code == 400
+        errors = response.json()
+        assert errors[0] == {}
+        assert list(errors[1]) == ['genre'] and 'nope' in errors[1]['genre'][0]
+        assert set(errors[2]) == {'name'}, (
+            'Проверьте, что ошибки полей возвращаются до поиска по slug'
+        )
+        assert list(errors[3]) == ['id']
+        assert not Title.objects.exists()
+
+    def test_update(self, admin_client, title, category, genres):
+        other = Title.objects.create(name='Другое', year=1990)
+        response = admin_client.patch(self.url, [
+            {'id': title.id, 'genre': [genres[-1].slug], 'year': 1999},
+            {'id': other.id, 'category': category.slug},
+        ], format='json')
+        assert response.status_code == 200, response.json()
+        assert response.json()[0]['genre'] == [genres[-1].slug]
+        assert response.json()[1]['category'] == category.slug
+        title.refresh_from_db()
+        other.refresh_from_db()
+        assert title.year == 1999 and title.name != 'Другое'
+        assert list(title.genre.values_list('slug', flat=True)) == [
+            genres[-1].slug
+        ]
+        assert other.category == category and other.name == 'Другое'
+
+        response = admin_client.patch(self.url, [{'name': 'Без id'},
+                                                 {'id': 0, 'year': 1}],
+                                      format='json')
+        assert response.status_code == 400
+        assert list(response.json()[0]) == ['id']
+        assert list(response.json()[1]) == ['id']
+
+    def test_repeated_genres_and_ids(self, admin_client, title, genres):
+        slug = genres[0].slug
+        response = admin_client.post(self.url, [
+            {'name': 'Повтор', 'genre': [slug, slug]},
+        ], format='json')
+        assert response.status_code == 201, response.json()
+        assert response.json()[0]['genre'] == [slug]
+        created = Title.objects.get(id=response.json()[0]['id'])
+        assert list(created.genre.values_list('slug', flat=True)) == [slug], (
+            'Проверьте, что повторяющиеся жанры сохраняются один раз'
+        )
+
+        response = admin_client.patch(self.url, [
+            {'id': title.id, 'genre': [slug, slug]},
+            {'id': created.id, 'year': 1999},
+            {'id': title.id, 'year': 2001},
+        ], format='json')
+        assert response.status_code == 400
+        errors = response.json()
+        assert [list(error) for error in errors] == [['id'], [], ['id']], (
+            'Проверьте, что повторяющиеся id возвращаются как ошибки '
+            'элементов'
+        )
+
+    def test_permissions_and_limits(self, user_client, admin_client,
+                                    settings):
+        items = [{'name': 'Произведение'}] * 3
+        assert user_client.post(self.url, items,
+                                format='json').status_code == 403
+        assert admin_client.post(self.url, [],
+                                 format='json').status_code == 400
+        settings.BULK_MAX_OBJECTS = 2
+        assert admin_client.post(self.url, items,
+                                 format='json').status_code == 400
+
+
+@pytest.mark.django_db
+class TestBulkGenresAndCategories:
+
+    @pytest.mark.parametrize('prefix, model', (('genres', Genre),
+                                               ('categories', Category)))
+    def test_create(self, admin_client, genres, category, prefix, model):
+        existing = model.objects.first()
+        items = [
+            {'name': 'Новое', 'slug': 'new'},
+            {'name': 'Новое', 'slug': 'new-2'},
+            {'name': 'Ещё', 'slug': existing.slug},
+            {'name': 'Плохой', 'slug': 'не slug'},
+        ]
+        url = f'/api/v1/{prefix}/bulk/'
+        response = admin_client.post(url, items, format='json')
+        assert response.status_code == 400
+        errors = response.json()
+        assert errors[0] == {} and list(errors[1]) == ['name']
+        assert list(errors[2]) == ['slug'] and list(errors[3]) == ['slug']
+
+        count = model.objects.count()
+        response = admin_client.post(url, items[:1] + [
+            {'name': 'Ещё', 'slug': 'more'}
+        ], format='json')
+        assert response.status_code == 201
+        assert response.json() == [{'name': 'Новое', 'slug': 'new'},
+                                   {'name': 'Ещё', 'slug': 'more'}]
+        assert model.objects.count() == count + 2
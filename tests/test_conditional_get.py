@@ -0,0 +1,112 @@
+import time
+
+import pytest
+from django.utils.http import http_date
+
+from api import cache
+from api.models import Comment
+from api.stores import VersionStore
+
+
+@pytest.mark.django_db(transaction=True)
+class TestConditionalGet:
+
+    def _revalidate(self, client, url, response):
+        return client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    @pytest.mark.parametrize('url', (
+        '/api/v1/titles/{title}/',
+        '/api/v1/titles/{title}/reviews/',
+        '/api/v1/titles/{title}/reviews/{review}/comments/',
+    ))
+    def test_not_modified(self, guest_client, comments, url, monkeypatch,
+                          django_assert_num_queries):
+        review = comments[0].review
+        url = url.format(title=review.title_id, review=review.id)
+        response = guest_client.get(url)
+        assert response.status_code == 200
+        assert response.has_header('ETag')
+        assert not response.has_header('Last-Modified'), (
+            'Проверьте, что Last-Modified не отдаётся, пока последней '
+            'версии меньше секунды'
+        )
+        with django_assert_num_queries(0):
+            not_modified = self._revalidate(guest_client, url, response)
+        assert not_modified.status_code == 304, (
+            'Проверьте, что при совпадении ETag возвращается 304'
+        )
+        assert not not_modified.content
+        modified = guest_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60)
+        )
+        assert modified.status_code == 200
+
+        # Two seconds later the versions are old enough for an HTTP date.
+        later = time.time_ns() + 2 * 10 ** 9
+        monkeypatch.setattr(cache, '_new_version', lambda: later)
+        response = guest_client.get(url)
+        assert response.has_header('Last-Modified')
+        with django_assert_num_queries(0):
+            not_modified = guest_client.get(
+                url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+            )
+        assert not_modified.status_code == 304, (
+            'Проверьте, что If-Modified-Since возвращает 304'
+        )
+        modified = guest_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+            HTTP_IF_NONE_MATCH='"other"'
+        )
+        assert modified.status_code == 200, (
+            'Проверьте, что If-None-Match важнее If-Modified-Since'
+        )
+        cache.bump_versions(cache.TITLES,
+                            cache.TITLE_REVIEWS.format(review.title_id),
+                            cache.REVIEW_COMMENTS.format(review.id))
+        changed = guest_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        assert changed.status_code == 200, (
+            'Проверьте, что изменение сразу меняет ответ на If-Modified-Since'
+        )
+
+    def test_comment_change_invalidates_etag(self, guest_client, comments,
+                                             user):
+        review = comments[0].review
+        url = f'/api/v1/titles/{review.title_id}/reviews/{review.id}/comments/'
+        response = guest_client.get(url)
+        Comment.objects.create(review=review, author=user, text='Новый')
+        changed = self._revalidate(guest_client, url, response)
+        assert changed.status_code == 200, (
+            'Проверьте, что после изменений ETag меняется'
+        )
+        assert changed.json()['count'] == 3
+
+    def test_change_in_another_process(self, guest_client, title, settings):
+        url = f'/api/v1/titles/{title.id}/'
+        response = guest_client.get(url)
+        VersionStore(settings.VERSION_STORE_PATH).set_many({
+            cache.VERSION_KEY.format(cache.TITLES): time.time_ns()
+        })
+        assert self._revalidate(guest_client, url,
+                                response).status_code == 200, (
+            'Проверьте, что версии общие для всех процессов'
+        )
+
+    def test_username_change_invalidates_reviews(self, guest_client,
+                                                 user_client, reviews):
+        url = f'/api/v1/titles/{reviews[0].title_id}/reviews/'
+        response = guest_client.get(url)
+        user_client.patch('/api/v1/users/me/', {'username': 'Renamed'})
+        changed = self._revalidate(guest_client, url, response)
+        assert changed.status_code == 200
+        assert 'Renamed' in {item['author']
+                             for item in changed.json()['results']}
+
+    def test_deleted_title_is_not_revalidated(self, guest_client,
+                                              admin_client, title):
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        response = guest_client.get(url)
+        admin_client.delete(f'/api/v1/titles/{title.id}/')
+        assert self._revalidate(guest_client, url,
+                                response).status_code == 404
@@ -0,0 +1,109 @@
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.models import Comment, Review, Title
+
+
+@pytest.mark.django_db
+class TestStoredCounters:
+
+    def _comments_count(self, review):
+        review.refresh_from_db()
+        return review.comments_count
+
+    def test_comment_create_delete(self, reviews, comments, user):
+        assert self._comments_count(reviews[0]) == 2, (
+            'Проверьте, что при создании комментария обновляется счётчик'
+        )
+        assert self._comments_count(reviews[1]) == 0
+        comments[0].delete()
+        assert self._comments_count(reviews[0]) == 1, (
+            'Проверьте, что при удалении комментария обновляется счётчик'
+        )
+        with CaptureQueriesContext(connection) as context:
+            Comment.objects.create(review=reviews[1], author=user, text='Да')
+        assert not [query for query in context.captured_queries
+                    if query['sql'].startswith('SELECT')], (
+            'Проверьте, что сохранение комментария не читает его отзыв'
+        )
+        Comment.objects.filter(review=reviews[0]).delete()
+        assert self._comments_count(reviews[0]) == 0
+        assert self._comments_count(reviews[1]) == 1
+
+    def test_user_delete_cascade(self, title, reviews, comments,
+                                 another_user):
+        another_user.delete()
+        # Review 0 is written by "user" and commented on by both users.
+        assert self._comments_count(reviews[0]) == 1, (
+            'Проверьте, что при удалении автора обновляются счётчики '
+            'комментариев'
+        )
+        title.refresh_from_db()
+        assert title.rating_count == 1
+
+    def test_api(self, guest_client, title, reviews, comments):
+        response = guest_client.get('/api/v1/titles/')
+        assert response.json()['results'][0]['reviews_count'] == 2
+        response = guest_client.get(f'/api/v1/titles/{title.id}/')
+        assert response.json()['reviews_count'] == 2
+        response = guest_client.get(
+            f'/api/v1/titles/{title.id}/?fields=id,reviews_count'
+        )
+        assert response.json() == {'id': title.id, 'reviews_count': 2}
+        response = guest_client.get(
+            f'/api/v1/titles/{title.id}/reviews/{reviews[0].id}/'
+        )
+        assert response.json()['comments_count'] == 2
+
+    @pytest.mark.django_db(transaction=True)
+    def test_api_write(self, guest_client, user_client, title, reviews):
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        response = guest_client.get(url)
+        etag = response['ETag']
+        counts = [review['comments_count']
+                  for review in response.json()['results']]
+        assert counts == [0, 0]
+        response = user_client.post(f'{url}{reviews[1].id}/comments/',
+                                    {'text': 'Согласен'})
+        assert response.status_code == 201
+        response = guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что новый комментарий меняет версию списка отзывов'
+        )
+        assert response.json()['results'][0]['comments_count'] == 1
+        etag = response['ETag']
+        comment_id = Comment.objects.get(review=reviews[1]).id
+        response = user_client.delete(
+            f'{url}{reviews[1].id}/comments/{comment_id}/'
+        )
+        assert response.status_code == 204
+        response = guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что удаление комментария меняет версию списка отзывов'
+        )
+        assert response.json()['results'][0]['comments_count'] == 0
+
+        Comment.objects.create(review=reviews[1], author=reviews[0].author,
+                               text='Из консоли')
+        etag = guest_client.get(url)['ETag']
+        Comment.objects.get(review=reviews[1]).delete()
+        response = guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что удаление комментария вне API тоже меняет версию '
+            'списка отзывов'
+        )
+        assert response.json()['results'][0]['comments_count'] == 0
+
+    def test_recalculate_command(self, title, reviews, comments):
+        Review.objects.update(comments_count=5)
+        Title.objects.update(rating_count=0)
+        with pytest.raises(CommandError):
+            call_command('recalculate_ratings', '--check')
+        call_command('recalculate_ratings')
+        call_command('recalculate_ratings', '--check')
+        assert self._comments_count(reviews[0]) == 2
+        assert self._comments_count(reviews[1]) == 0
+        title.refresh_from_db()
+        assert title.rating_count == 2
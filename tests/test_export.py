@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from api import export
+from api.models import Title
+
+URL = '/api/v1/titles/export/'
+
+
+def _lines(response):
+    content = b''.join(response.streaming_content)
+    return [json.loads(line) for line in content.decode().splitlines()]
+
+
+@pytest.mark.django_db
+class TestTitlesExport:
+
+    def test_permissions(self, guest_client, user_client):
+        assert guest_client.get(URL).status_code == 401
+        assert user_client.get(URL).status_code == 403, (
+            'Проверьте, что выгрузка доступна только администратору'
+        )
+
+    def test_export_matches_api(self, admin_client, guest_client, title,
+                                reviews):
+        Title.objects.create(name='Без категории')
+        response = admin_client.get(URL)
+        assert response.status_code == 200
+        assert response['Content-Type'] == 'application/x-ndjson'
+        lines = _lines(response)
+        expected = guest_client.get('/api/v1/titles/').json()['results']
+        assert lines == expected[::-1], (
+            'Проверьте, что выгрузка совпадает с ответом API'
+        )
+
+    def test_export_filters(self, admin_client, title):
+        Title.objects.create(name='Другое', year=2000)
+        assert [row['name'] for row in _lines(
+            admin_client.get(URL, {'year': 2000})
+        )] == ['Другое']
+        assert [row['id'] for row in _lines(
+            admin_client.get(URL, {'genre': 'drama'})
+        )] == [title.id]
+
+    def test_queries_per_chunk(self, admin_client, genres, monkeypatch,
+                               django_assert_num_queries):
+        monkeypatch.setattr(export, 'EXPORT_CHUNK_SIZE', 10)
+        for i in range(25):
+            Title.objects.create(name=f'Произведение {i}').genre.set(genres)
+        # Пользователь, курсор по произведениям и запрос жанров на пачку.
+        with django_assert_num_queries(1 + 1 + 3):
+            lines = _lines(admin_client.get(URL))
+        assert len(lines) == 25
+        assert all(len(row['genre']) == 2 for row in lines)
@@ -0,0 +1,90 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.models import Comment
+
+
+def select_clause(context, table):
+    """The SELECT columns of the first query of rows from "table"."""
+    for query in context.captured_queries:
+        select, _, rest = query['sql'].partition(' FROM ')
+        if rest.startswith(f'"{table}"') and 'COUNT(' not in select:
+            return select
+    raise AssertionError(f'Нет запроса к {table}')
+
+
+@pytest.mark.django_db
+class TestSparseFieldsets:
+
+    def test_titles(self, guest_client, title, reviews):
+        with CaptureQueriesContext(connection) as context:
+            response = guest_client.get(
+                '/api/v1/titles/?fields=id,name,rating'
+            )
+        assert response.status_code == 200
+        assert response.json()['results'] == [
+            {'id': title.id, 'name': title.name, 'rating': 8.5}
+        ]
+        # COUNT и страница: без запроса жанров и без JOIN категорий.
+        assert len(context.captured_queries) == 2
+        select = select_clause(context, 'api_title')
+        assert 'description' not in select and 'api_category' not in select
+
+        response = guest_client.get(
+            f'/api/v1/titles/{title.id}/?omit=description,genre'
+        )
+        assert list(response.json()) == ['id', 'category', 'rating',
+                                         'reviews_count', 'name', 'year']
+
+    def test_reviews_and_comments(self, guest_client, title, comments):
+        review = comments[0].review
+        with CaptureQueriesContext(connection) as context:
+            response = guest_client.get(
+                f'/api/v1/titles/{title.id}/reviews/?fields=id,score,author'
+            )
+        assert response.status_code == 200
+        assert response.json()['results'][-1] == {
+            'id': review.id, 'score': review.score,
+            'author': review.author.username,
+        }
+        # Заголовок произведения, COUNT и страница вместе с авторами.
+        assert len(context.captured_queries) == 3
+        select = select_clause(context, 'api_review')
+        assert '"text"' not in select and '"username"' in select
+
+        with CaptureQueriesContext(connection) as context:
+            response = guest_client.get(
+                f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+                '?omit=author,text'
+            )
+        assert list(response.json()['results'][0]) == ['id', 'pub_date']
+        assert 'api_user' not in select_clause(context, 'api_comment'), (
+            'Проверьте, что автор не присоединяется, если он не запрошен'
+        )
+
+        Comment.objects.bulk_create(
+            Comment(review=review, author=review.author, text=str(number))
+            for number in range(8)
+        )
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+        # Отзыв, COUNT и страница; курсор обходится без COUNT.
+        for query, count in (('?fields=id', 3), ('?cursor=&fields=id', 2)):
+            with CaptureQueriesContext(connection) as context:
+                response = guest_client.get(url + query)
+            assert len(response.json()['results']) == 10
+            assert len(context.captured_queries) == count, (
+                'Проверьте, что число запросов не зависит от числа '
+                'комментариев'
+            )
+
+    def test_full_output_by_default(self, guest_client, title, reviews):
+        response = guest_client.get(f'/api/v1/titles/{title.id}/reviews/')
+        assert list(response.json()['results'][0]) == [
+            'id', 'text', 'author', 'score', 'pub_date', 'comments_count'
+        ]
+
+    def test_unknown_field(self, guest_client, title):
+        response = guest_client.get('/api/v1/titles/?fields=id,password')
+        assert response.status_code == 400
+        assert 'password' in response.json()['fields'][0]
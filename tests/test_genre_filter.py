@@ -0,0 +1,77 @@
+import pytest
+
+from api.models import Genre, Title
+
+
+@pytest.fixture
+def genre_titles(genres):
+    musical = Genre.objects.create(name='Мюзикл', slug='musical')
+    drama, comedy = genres
+    titles = {}
+    for name, title_genres in (
+        ('Все три', (drama, comedy, musical)),
+        ('Драма и комедия', (drama, comedy)),
+        ('Драма', (drama,)),
+        ('Мюзикл', (musical,)),
+        ('Без жанра', ()),
+    ):
+        titles[name] = Title.objects.create(name=name)
+        titles[name].genre.set(title_genres)
+    return titles
+
+
+@pytest.mark.django_db
+class TestGenreFilter:
+
+    def _names(self, client, **params):
+        response = client.get('/api/v1/titles/', params)
+        assert response.status_code == 200, response.json()
+        data = response.json()
+        names = [item['name'] for item in data['results']]
+        assert data['count'] == len(names), (
+            'Проверьте, что количество произведений для пагинации '
+            'совпадает с выборкой'
+        )
+        return sorted(names)
+
+    def test_any(self, guest_client, genre_titles):
+        assert self._names(guest_client, genre='drama') == [
+            'Все три', 'Драма', 'Драма и комедия'
+        ]
+        assert self._names(guest_client, genre='comedy,musical') == [
+            'Все три', 'Драма и комедия', 'Мюзикл'
+        ], 'Проверьте, что произведения не повторяются в выдаче'
+        assert self._names(guest_client, genre='drama,unknown',
+                           genre_mode='any') == [
+            'Все три', 'Драма', 'Драма и комедия'
+        ]
+
+    def test_all(self, guest_client, genre_titles):
+        assert self._names(guest_client, genre='drama,comedy',
+                           genre_mode='all') == ['Все три', 'Драма и комедия']
+        assert self._names(guest_client, genre='drama,comedy,musical',
+                           genre_mode='all') == ['Все три']
+        assert self._names(guest_client, genre='drama,drama',
+                           genre_mode='all') == [
+            'Все три', 'Драма', 'Драма и комедия'
+        ], 'Проверьте, что повторный жанр не мешает фильтрации'
+        assert self._names(guest_client, genre='drama,unknown',
+                           genre_mode='all') == []
+
+    def test_pagination(self, guest_client, genres):
+        for number in range(15):
+            Title.objects.create(name=f'Произведение {number}').genre.set(
+                genres
+            )
+        response = guest_client.get('/api/v1/titles/', {
+            'genre': 'drama,comedy', 'genre_mode': 'all', 'page': 2
+        })
+        data = response.json()
+        assert data['count'] == 15
+        assert len(data['results']) == 5
+
+    def test_invalid_mode(self, guest_client, genre_titles):
+        response = guest_client.get('/api/v1/titles/', {
+            'genre': 'drama', 'genre_mode': 'none'
+        })
+        assert response.status_code == 400
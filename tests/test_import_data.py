@@ -0,0 +1,94 @@
+import json
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from api.models import Comment, Review, Title, User
+
+
+@pytest.fixture
+def dump(tmp_path):
+    files = {
+        'users.csv': (
+            'username,email,role,bio\n'
+            'reader,reader@yamdb.fake,user,\n'
+            'critic,critic@yamdb.fake,moderator,Пишет отзывы\n'
+        ),
+        'categories.jsonl': (
+            '{"name": "Фильм", "slug": "movie"}\n'
+            '{"name": "Книга", "slug": "book"}\n'
+        ),
+        'genres.csv': 'name,slug\nДрама,drama\nКомедия,comedy\n',
+        'titles.csv': (
+            'id,name,year,category,genre,description\n'
+            '10,Поезд,1895,movie,"drama,comedy",\n'
+            '11,Война и мир,1869,book,drama,Роман\n'
+            '12,Без жанра,,,,\n'
+        ),
+        'reviews.jsonl': '\n'.join(json.dumps(row) for row in (
+            {'id': 5, 'title': 10, 'author': 'reader', 'text': 'Да',
+             'score': 6, 'pub_date': '2020-01-01T10:00:00Z'},
+            {'id': 6, 'title': 10, 'author': 'critic', 'text': 'Нет',
+             'score': 9},
+            {'id': 7, 'title': 11, 'author': 'critic', 'text': 'Да',
+             'score': 10},
+        )),
+        'comments.csv': (
+            'review,author,text\n'
+            '5,critic,Согласен\n'
+            '5,reader,Спасибо\n'
+        ),
+    }
+    for name, content in files.items():
+        (tmp_path / name).write_text(content, encoding='utf-8')
+    return {name.split('.')[0]: str(tmp_path / name) for name in files}
+
+
+@pytest.mark.django_db
+class TestImportData:
+
+    def test_import(self, dump, capsys):
+        call_command(
+            'import_data', '--chunk-size=2',
+            *(f'--{source}={path}' for source, path in dump.items())
+        )
+        assert User.objects.get(username='critic').role == 'moderator'
+        titles = Title.objects.order_by('id')
+        assert [title.id for title in titles] == [10, 11, 12]
+        assert sorted(titles[0].genre.values_list('slug', flat=True)) == [
+            'comedy', 'drama'
+        ], 'Проверьте, что загружается связь произведений и жанров'
+        assert titles[1].category.slug == 'book'
+        assert titles[2].category is None
+        assert (titles[0].rating_sum, titles[0].rating_count) == (15, 2), (
+            'Проверьте, что после загрузки отзывов рейтинг пересчитан'
+        )
+        assert Review.objects.get(id=5).pub_date.year == 2020
+        assert Comment.objects.filter(review_id=5).count() == 2
+        assert Review.objects.get(id=5).comments_count == 2, (
+            'Проверьте, что после загрузки комментариев счётчики пересчитаны'
+        )
+        assert 'строк/с' in capsys.readouterr().out
+        call_command('recalculate_ratings', '--check')
+
+    def test_new_titles_get_pks_for_genres(self, dump, tmp_path, genres):
+        path = tmp_path / 'titles.jsonl'
+        path.write_text('\n'.join(
+            json.dumps({'name': f'Произведение {i}', 'genre': ['drama']})
+            for i in range(5)
+        ), encoding='utf-8')
+        call_command('import_data', '--chunk-size=2', f'--titles={path}')
+        assert Title.genre.through.objects.filter(
+            genre__slug='drama'
+        ).count() == 5
+        assert set(Title.objects.values_list('id', flat=True)) == set(
+            Title.genre.through.objects.values_list('title_id', flat=True)
+        )
+
+    def test_unknown_slug(self, tmp_path, genres):
+        path = tmp_path / 'titles.csv'
+        path.write_text('name,genre\nМюзикл,"drama,musical"\n',
+                        encoding='utf-8')
+        with pytest.raises(CommandError, match='musical'):
+            call_command('import_data', f'--titles={path}')
+        assert not Title.objects.exists()
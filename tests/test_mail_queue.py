@@ -0,0 +1,162 @@
+import threading
+
+import pytest
+from django.core.mail import EmailMessage
+
+from api.mail import MailQueue, get_mail_queue
+
+
+class FakeConnection:
+
+    def __init__(self, owner):
+        self.owner = owner
+
+    def __enter__(self):
+        self.owner.batches.append([])
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def send_messages(self, messages):
+        self.owner.started.set()
+        self.owner.release.wait(5)
+        if self.owner.failures:
+            self.owner.failures -= 1
+            raise ConnectionError('SMTP недоступен')
+        for message in messages:
+            address = message.to[0]
+            if self.owner.failing.get(address):
+                self.owner.failing[address] -= 1
+                raise ConnectionError(f'Адрес {address} недоступен')
+            self.owner.batches[-1].append(address)
+        return len(messages)
+
+
+class FakeBackend:
+
+    def __init__(self, failures=0, failing=None):
+        self.failures = failures
+        self.failing = dict(failing or {})
+        self.batches = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self):
+        return FakeConnection(self)
+
+
+def _message(number):
+    return EmailMessage(subject='Код', body='123',
+                        to=(f'user{number}@yamdb.fake',))
+
+
+class TestMailQueue:
+
+    def test_batches_share_connection(self):
+        backend = FakeBackend()
+        mail_queue = MailQueue(workers=1, batch_size=10,
+                               connection_factory=backend)
+        mail_queue.enqueue(_message(0))
+        assert backend.started.wait(5)
+        for number in range(1, 5):
+            mail_queue.enqueue(_message(number))
+        backend.release.set()
+        assert mail_queue.flush(5)
+        assert [len(batch) for batch in backend.batches] == [1, 4], (
+            'Проверьте, что накопившиеся письма отправляются одной пачкой'
+        )
+        stats = mail_queue.stats()
+        assert stats['sent'] == 5
+        assert stats['depth'] == 0
+        assert stats['latency_max'] >= stats['latency_avg'] > 0
+
+    def test_retry_with_backoff(self):
+        backend = FakeBackend(failures=2)
+        backend.release.set()
+        mail_queue = MailQueue(workers=1, retry_backoff=0,
+                               connection_factory=backend)
+        mail_queue.enqueue(_message(0))
+        assert mail_queue.flush(5)
+        stats = mail_queue.stats()
+        assert (stats['sent'], stats['retries']) == (1, 2)
+
+    def test_retry_only_failed_messages(self):
+        backend = FakeBackend(failing={'user1@yamdb.fake': 1})
+        mail_queue = MailQueue(workers=1, batch_size=10, retry_backoff=0,
+                               connection_factory=backend)
+        for number in range(3):
+            mail_queue.enqueue(_message(number))
+        backend.release.set()
+        assert mail_queue.flush(5)
+        sent = [address for batch in backend.batches for address in batch]
+        assert sorted(sent) == [f'user{number}@yamdb.fake'
+                                for number in range(3)], (
+            'Проверьте, что повторно отправляются только неотправленные '
+            'письма'
+        )
+        stats = mail_queue.stats()
+        assert (stats['sent'], stats['retries']) == (3, 1)
+
+    def test_dead_workers_are_replaced(self):
+        backend = FakeBackend()
+        backend.release.set()
+        mail_queue = MailQueue(workers=1, connection_factory=backend)
+        dead = threading.Thread(target=lambda: None)
+        dead.start()
+        dead.join()
+        mail_queue._threads = [dead]
+        mail_queue.enqueue(_message(0))
+        assert mail_queue.flush(5), (
+            'Проверьте, что остановившиеся потоки отправки перезапускаются'
+        )
+        assert mail_queue.stats()['sent'] == 1
+
+    def test_gives_up_after_retries(self):
+        backend = FakeBackend(failures=10)
+        backend.release.set()
+        mail_queue = MailQueue(workers=1, max_retries=1, retry_backoff=0,
+                               connection_factory=backend)
+        mail_queue.enqueue(_message(0))
+        assert mail_queue.flush(5)
+        assert mail_queue.stats()['failed'] == 1
+
+    def test_queue_is_bounded(self):
+        backend = FakeBackend()
+        mail_queue = MailQueue(maxsize=1, workers=1,
+                               connection_factory=backend)
+        assert mail_queue.enqueue(_message(0))
+        assert backend.started.wait(5)
+        assert mail_queue.enqueue(_message(1))
+        assert not mail_queue.enqueue(_message(2)), (
+            'Проверьте, что размер очереди ограничен'
+        )
+        backend.release.set()
+        assert mail_queue.flush(5)
+        assert mail_queue.stats()['dropped'] == 1
+
+
+@pytest.mark.django_db
+class TestSendConfirmationCode:
+
+    def test_code_is_sent_in_background(self, guest_client, settings,
+                                        tmp_path):
+        settings.EMAIL_BACKEND = (
+            'django.core.mail.backends.filebased.EmailBackend'
+        )
+        mail_dir = tmp_path / 'mail'
+        settings.EMAIL_FILE_PATH = str(mail_dir)
+        response = guest_client.post('/api/v1/auth/email/',
+                                     {'email': 'new@yamdb.fake'})
+        assert response.status_code == 200
+        assert get_mail_queue().flush(5)
+        sent = ''.join(path.read_text() for path in mail_dir.iterdir())
+        assert 'new@yamdb.fake' in sent
+        assert 'confirmation_code' in sent
+
+    def test_stats_for_admin_only(self, user_client, admin_client):
+        url = '/api/v1/auth/email/stats/'
+        assert user_client.get(url).status_code == 403
+        response = admin_client.get(url)
+        assert response.status_code == 200
+        assert 'depth' in response.json()
@@ -0,0 +1,98 @@
+import re
+
+import pytest
+
+from api.metrics import Metrics, MetricsStore, get_metrics
+
+
+def value(text, series):
+    match = re.search(rf'^{re.escape(series)} (\S+)$', text, re.MULTILINE)
+    assert match, f'Не найдена серия {series}'
+    return float(match.group(1))
+
+
+class TestMetrics:
+
+    def test_increments_are_buffered(self, tmp_path):
+        store = MetricsStore(str(tmp_path / 'metrics.sqlite3'))
+        metrics = Metrics(store, flush_interval=60)
+        metrics.observe_request('title-list', 'GET', 200, 0.02, 3, 0.001,
+                                100)
+        assert store.series() == []
+        metrics.flush()
+        assert len(store.series()) > 0
+
+    def test_processes_are_combined(self, tmp_path):
+        path = str(tmp_path / 'metrics.sqlite3')
+        workers = [Metrics(MetricsStore(path)) for _ in range(2)]
+        for duration, metrics in zip((0.003, 0.3), workers):
+            metrics.observe_request('title-list', 'GET', 200, duration, 2,
+                                    0.001, 50)
+        workers[0].flush()
+        text = workers[1].render()
+        labels = 'route="title-list"'
+        assert value(text, 'api_requests_total{route="title-list",'
+                           'method="GET",status="200"}') == 2, (
+            'Проверьте, что метрики суммируются по всем процессам'
+        )
+        assert value(text, f'api_db_queries_total{{{labels}}}') == 4
+        assert value(
+            text, f'api_request_duration_seconds_bucket{{{labels},le="0.005"}}'
+        ) == 1
+        assert value(
+            text, f'api_request_duration_seconds_bucket{{{labels},le="+Inf"}}'
+        ) == 2
+        buckets = re.findall(r'le="([^"]+)"', text)
+        assert buckets == sorted(buckets, key=float)
+
+
+@pytest.mark.django_db
+class TestMetricsView:
+
+    def test_requests_are_recorded(self, admin_client, guest_client, title):
+        for _ in range(2):
+            guest_client.get('/api/v1/titles/')
+        guest_client.get('/api/v1/missing/')
+        response = admin_client.get('/api/v1/_metrics')
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/plain; version=0.0.4')
+        text = response.content.decode()
+        assert value(text, 'api_requests_total{route="title-list",'
+                           'method="GET",status="200"}') == 2
+        assert value(text, 'api_request_duration_seconds_count'
+                           '{route="title-list"}') == 2
+        assert value(text, 'api_db_queries_total{route="title-list"}') > 0
+        assert value(text, 'api_response_bytes_total{route="title-list"}') > 0
+        assert value(text, 'api_requests_total{route="unmatched",'
+                           'method="GET",status="404"}') == 1
+
+    def test_unknown_methods_share_one_label(self, admin_client,
+                                             guest_client):
+        for method in ('FOO', 'BAR'):
+            guest_client.generic(method, '/api/v1/titles/')
+        text = admin_client.get('/api/v1/_metrics').content.decode()
+        assert value(text, 'api_requests_total{route="title-list",'
+                           'method="other",status="401"}') == 2, (
+            'Проверьте, что нестандартные методы HTTP не создают новых '
+            'серий метрик'
+        )
+        assert 'method="FOO"' not in text
+
+    def test_streamed_responses_are_measured(self, admin_client, title):
+        response = admin_client.get('/api/v1/titles/export/')
+        size = len(b''.join(response.streaming_content))
+        text = get_metrics().render()
+        assert value(text, 'api_response_bytes_total'
+                           '{route="title-export"}') == size
+        assert value(text, 'api_db_queries_total{route="title-export"}') > 1
+
+    def test_throttled_requests_are_counted(self, admin_client, user_client):
+        for _ in range(61):
+            user_client.get('/api/v1/genres/')
+        text = admin_client.get('/api/v1/_metrics').content.decode()
+        assert value(text, 'api_throttled_requests_total{route="genre-list",'
+                           'scope="burst-non-employee"}') == 1
+
+    def test_only_admin(self, user_client, guest_client):
+        assert user_client.get('/api/v1/_metrics').status_code == 403
+        assert guest_client.get('/api/v1/_metrics').status_code == 401
@@ -0,0 +1,61 @@
+import pytest
+
+from api.models import Comment
+
+
+@pytest.fixture
+def many_comments(reviews, user):
+    return [
+        Comment.objects.create(review=reviews[0], author=user,
+                               text=f'Комментарий {i}')
+        for i in range(25)
+    ]
+
+
+@pytest.mark.django_db
+class TestCursorPagination:
+
+    def _url(self, review):
+        return (f'/api/v1/titles/{review.title_id}/reviews/{review.id}'
+                f'/comments/')
+
+    def test_page_number_still_works(self, guest_client, many_comments):
+        url = self._url(many_comments[0].review)
+        data = guest_client.get(url + '?page=2').json()
+        assert data['count'] == 25, (
+            'Проверьте, что пагинация через ?page= продолжает работать'
+        )
+        assert [item['id'] for item in data['results']] == [
+            comment.id for comment in many_comments[::-1][10:20]
+        ]
+
+    def test_cursor_pages_are_stable(self, guest_client, many_comments,
+                                     user):
+        url = self._url(many_comments[0].review)
+        first = guest_client.get(url + '?cursor=').json()
+        assert 'count' not in first, (
+            'Проверьте, что курсорная пагинация не выполняет COUNT'
+        )
+        assert first['previous'] is None
+
+        Comment.objects.create(review=many_comments[0].review, author=user,
+                               text='Новый комментарий')
+
+        ids = [item['id'] for item in first['results']]
+        next_url = first['next']
+        while next_url:
+            page = guest_client.get(next_url).json()
+            ids.extend(item['id'] for item in page['results'])
+            next_url = page['next']
+        assert ids == [comment.id for comment in many_comments[::-1]], (
+            'Проверьте, что новые записи не сдвигают курсорные страницы'
+        )
+
+    def test_cursor_queries_do_not_depend_on_depth(
+            self, guest_client, many_comments, django_assert_num_queries):
+        url = self._url(many_comments[0].review)
+        next_url = guest_client.get(url + '?cursor=').json()['next']
+        next_url = guest_client.get(next_url).json()['next']
+        # Отзыв для проверки пути и страница комментариев с авторами.
+        with django_assert_num_queries(2):
+            guest_client.get(next_url)
@@ -0,0 +1,93 @@
+import pytest
+from django.apps import apps
+from django.core.management import CommandError, call_command
+from django.db import connection, connections, transaction
+
+from api.management.commands.check_query_plans import (Command,
+                                                       find_sequential_scans)
+from api.models import Comment, Review
+
+REPLICA = 'replica'
+
+
+def drop_comment_review_index(connection):
+    """Drop the indexes on api_comment.review_id; return their SQL."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' "
+            "AND tbl_name = 'api_comment' AND sql LIKE '%review_id%'"
+        )
+        indexes = cursor.fetchall()
+        for name, _ in indexes:
+            cursor.execute(f'DROP INDEX "{name}"')
+    return [sql for _, sql in indexes]
+
+
+class TestFindSequentialScans:
+
+    def test_sqlite(self):
+        plan = ['SCAN api_review', 'SEARCH api_title USING INDEX x (id=?)',
+                'SCAN api_title USING INDEX title_category_year_idx',
+                'SCAN api_category']
+        assert find_sequential_scans(
+            'sqlite', plan, ('api_review', 'api_title')
+        ) == ['api_review']
+
+    def test_postgresql(self):
+        plan = ['Limit  (cost=0.1..1.2 rows=10 width=4)',
+                '  ->  Seq Scan on api_comment  (cost=0.00..35.50 rows=10)',
+                '  ->  Index Scan using api_review_pkey on api_review']
+        assert find_sequential_scans(
+            'postgresql', plan, ('api_comment', 'api_review')
+        ) == ['api_comment']
+
+
+@pytest.mark.django_db
+class TestCheckQueryPlans:
+
+    def test_access_paths_use_indexes(self, comments, capsys):
+        call_command('check_query_plans', verbosity=2)
+        assert 'последовательного чтения нет' in capsys.readouterr().out
+
+    def test_missing_index_is_reported(self, title, user, another_user):
+        # sqlite3 reuses the cached plan of an already explained statement
+        # even after DROP INDEX, so this test must not repeat the SQL of
+        # the one above: the review here has another id.
+        Review.objects.create(title=title, author=user, text='Черновик',
+                              score=5).delete()
+        review = Review.objects.create(title=title, author=user,
+                                       text='Хорошо', score=7)
+        Comment.objects.create(review=review, author=another_user,
+                               text='Согласен')
+        drop_comment_review_index(connection)
+        with pytest.raises(CommandError, match='comment-list: api_comment'):
+            call_command('check_query_plans')
+
+    # Outside a transaction, so that the API reads go to the replica.
+    @pytest.mark.django_db(transaction=True, databases=('default', REPLICA))
+    def test_replica_queries_are_explained(self, comments, settings):
+        settings.DATABASE_REPLICAS = [REPLICA]
+        with transaction.atomic(using=REPLICA):
+            for model in apps.get_app_config('api').get_models(
+                    include_auto_created=True):
+                model.objects.using(REPLICA).bulk_create(model.objects.all())
+        replica = connections[REPLICA]
+        dropped = drop_comment_review_index(replica)
+        try:
+            with pytest.raises(CommandError,
+                               match='comment-list: api_comment'):
+                call_command('check_query_plans')
+        finally:
+            with replica.cursor() as cursor:
+                for sql in dropped:
+                    cursor.execute(sql)
+
+    def test_check_without_selects(self, comments, monkeypatch):
+        monkeypatch.setattr(Command, 'get_checks',
+                            lambda self: [('noop', lambda: None)])
+        with pytest.raises(CommandError, match='noop: не выполнено'):
+            call_command('check_query_plans')
+
+    def test_empty_database(self):
+        with pytest.raises(CommandError):
+            call_command('check_query_plans')
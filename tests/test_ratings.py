@@ -0,0 +1,111 @@
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.models import Review, Title, histogram_median
+
+
+@pytest.mark.django_db
+class TestStoredRating:
+
+    def _rating(self, title):
+        title.refresh_from_db()
+        return title.rating_sum, title.rating_count
+
+    def test_review_create_update_delete(self, title, reviews):
+        assert self._rating(title) == (17, 2), (
+            'Проверьте, что при создании отзыва обновляется рейтинг'
+        )
+        reviews[0].score = 1
+        reviews[0].save()
+        assert self._rating(title) == (11, 2), (
+            'Проверьте, что при изменении оценки обновляется рейтинг'
+        )
+        reviews[1].delete()
+        assert self._rating(title) == (1, 1), (
+            'Проверьте, что при удалении отзыва обновляется рейтинг'
+        )
+
+    def test_user_delete_cascade(self, title, reviews, user):
+        user.delete()
+        assert self._rating(title) == (10, 1), (
+            'Проверьте, что при удалении автора обновляется рейтинг'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_api_rating(self, guest_client, user_client, title, reviews):
+        response = guest_client.get(f'/api/v1/titles/{title.id}/')
+        assert response.json()['rating'] == 8.5
+        reviews[0].delete()
+        reviews[1].delete()
+        response = guest_client.get(f'/api/v1/titles/{title.id}/')
+        assert response.json()['rating'] is None
+
+    def test_recalculate_command(self, title, reviews):
+        Title.objects.filter(pk=title.pk).update(rating_sum=0,
+                                                 rating_count=0, score_7=0)
+        with pytest.raises(CommandError):
+            call_command('recalculate_ratings', '--check')
+        call_command('recalculate_ratings')
+        call_command('recalculate_ratings', '--check')
+        assert self._rating(title) == (17, 2)
+        assert title.score_7 == 1
+        Title.objects.filter(pk=title.pk).update(score_3=1)
+        with pytest.raises(CommandError):
+            call_command('recalculate_ratings', '--check')
+        call_command('recalculate_ratings')
+        Review.objects.all().delete()
+        call_command('recalculate_ratings', '--check')
+
+
+@pytest.mark.django_db
+class TestTitleStats:
+
+    def _stats(self, client, title):
+        response = client.get(f'/api/v1/titles/{title.id}/stats/')
+        assert response.status_code == 200
+        return response.json()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_stats(self, guest_client, title, reviews):
+        histogram = {str(score): 0 for score in range(1, 11)}
+        assert self._stats(guest_client, title) == {
+            'id': title.id, 'reviews_count': 2, 'mean': 8.5, 'median': 8.5,
+            'histogram': {**histogram, '7': 1, '10': 1},
+        }
+        reviews[0].score = 10
+        reviews[0].save()
+        stats = self._stats(guest_client, title)
+        assert stats['histogram'] == {**histogram, '10': 2}, (
+            'Проверьте, что при изменении оценки обновляется гистограмма'
+        )
+        assert stats['mean'] == 10 and stats['median'] == 10
+        reviews[1].delete()
+        reviews[0].delete()
+        assert self._stats(guest_client, title) == {
+            'id': title.id, 'reviews_count': 0, 'mean': None,
+            'median': None, 'histogram': histogram,
+        }
+
+    def test_stats_without_review_queries(self, guest_client, title,
+                                          reviews):
+        with CaptureQueriesContext(connection) as context:
+            self._stats(guest_client, title)
+        assert not [query for query in context.captured_queries
+                    if 'api_review' in query['sql']], (
+            'Проверьте, что статистика читается из счётчиков произведения'
+        )
+        response = guest_client.get('/api/v1/titles/0/stats/')
+        assert response.status_code == 404
+
+    @pytest.mark.parametrize('histogram, median', (
+        ({}, None),
+        ({5: 1}, 5),
+        ({2: 1, 9: 1}, 5.5),
+        ({1: 2, 4: 1}, 1),
+        ({1: 1, 3: 2, 10: 1}, 3),
+        ({3: 0, 6: 2, 8: 2}, 7),
+    ))
+    def test_histogram_median(self, histogram, median):
+        assert histogram_median(histogram) == median
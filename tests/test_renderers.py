@@ -0,0 +1,80 @@
+import datetime as dt
+import io
+import uuid
+from decimal import Decimal
+
+import pytest
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api import parsers, renderers
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer
+
+DATA = {
+    'rating': Decimal('7.33'),
+    'ratings': [Decimal('10.00'), Decimal('0.5'), None],
+    'pub_date': dt.datetime(2020, 5, 1, 12, 30, 15, 123456,
+                            tzinfo=timezone.utc),
+    'naive': dt.datetime(2020, 5, 1, 12, 30),
+    'day': dt.date(2020, 5, 1),
+    'time': dt.time(8, 15, 30, 500000),
+    'duration': dt.timedelta(minutes=90),
+    'detail': gettext_lazy('Not found.'),
+    'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+    'text': 'Ёжик в тумане «цитата» \u2028\u2029\x01\t"\\/',
+    'pair': (1, 2.5),
+    'nested': {1: True, 'empty': [], 'float': 1 / 3},
+}
+
+
+class TestFastJSONRenderer:
+
+    @pytest.mark.parametrize('data', [DATA, [DATA, DATA], 'строка', 42, []])
+    def test_matches_stock_renderer(self, data):
+        assert FastJSONRenderer().render(data) == JSONRenderer().render(
+            data
+        ), 'Проверьте, что быстрый рендерер выдаёт те же байты'
+
+    def test_indent_and_none(self):
+        media_type = 'application/json; indent=4'
+        assert FastJSONRenderer().render(DATA, media_type) == (
+            JSONRenderer().render(DATA, media_type)
+        )
+        assert FastJSONRenderer().render(None) == b''
+
+    def test_fallbacks(self, monkeypatch):
+        big = {'number': 2 ** 70}
+        assert FastJSONRenderer().render(big) == JSONRenderer().render(big)
+        monkeypatch.setattr(renderers, 'orjson', None)
+        assert FastJSONRenderer().render(DATA) == JSONRenderer().render(DATA)
+
+    def test_api_response(self, user_client, title):
+        response = user_client.get(f'/api/v1/titles/{title.id}/')
+        assert response.content == JSONRenderer().render(response.data)
+
+
+class TestFastJSONParser:
+    body = '{"text": "Ёжик\\u2028", "score": 10, "rating": 7.33}'.encode()
+
+    def parse(self, parser, body):
+        return parser.parse(io.BytesIO(body), parser_context={})
+
+    def test_matches_stock_parser(self):
+        assert self.parse(FastJSONParser(), self.body) == self.parse(
+            JSONParser(), self.body
+        )
+
+    @pytest.mark.parametrize('body', [b'{"score": NaN}', b'{', b'\xff'])
+    def test_errors(self, body):
+        with pytest.raises(ParseError):
+            self.parse(FastJSONParser(), body)
+
+    def test_without_orjson(self, monkeypatch):
+        monkeypatch.setattr(parsers, 'orjson', None)
+        assert self.parse(FastJSONParser(), self.body) == self.parse(
+            JSONParser(), self.body
+        )
@@ -0,0 +1,142 @@
+import time
+
+import pytest
+from django.db import transaction
+
+from api import routers
+from api.models import Genre, Title
+from api.stores import VersionStore
+
+REPLICA = 'replica'
+
+
+@pytest.fixture
+def replica(settings):
+    settings.DATABASE_REPLICAS = [REPLICA]
+    routers.reset()
+    yield REPLICA
+    routers.reset()
+
+
+@pytest.fixture
+def titles(replica):
+    """The same title on both databases, with different names to tell
+    which one a response was read from."""
+    title = Title.objects.create(name='Основная база')
+    Title.objects.using(replica).create(id=title.id, name='Реплика')
+    return title
+
+
+class TestPrimaryReplicaRouter:
+    router = routers.PrimaryReplicaRouter()
+
+    def test_without_replicas(self, settings):
+        settings.DATABASE_REPLICAS = []
+        routers.reset()
+        routers.read_from_replica()
+        assert self.router.db_for_read(Title) == 'default'
+
+    @pytest.mark.django_db
+    def test_pin_is_not_read_without_replicas(self, settings, user_client,
+                                              monkeypatch):
+        settings.DATABASE_REPLICAS = []
+        calls = []
+        monkeypatch.setattr(routers, 'is_pinned', calls.append)
+        assert user_client.get('/api/v1/users/me/').status_code == 200
+        assert not calls, (
+            'Проверьте, что без реплик закрепление за основной базой не '
+            'читается'
+        )
+
+    @pytest.mark.django_db(transaction=True, databases=('default', REPLICA))
+    def test_request_sticks_to_primary_after_write(self, replica):
+        assert self.router.db_for_read(Title) == 'default', (
+            'Проверьте, что без переключения чтение идёт из основной базы'
+        )
+        routers.read_from_replica()
+        assert self.router.db_for_read(Title) == replica
+        with transaction.atomic():
+            assert self.router.db_for_read(Title) == 'default', (
+                'Проверьте, что чтение внутри транзакции идёт из основной '
+                'базы'
+            )
+        assert self.router.db_for_write(Title) == 'default'
+        assert self.router.db_for_read(Title) == 'default', (
+            'Проверьте, что после записи запрос читает из основной базы'
+        )
+        routers.reset()
+        routers.read_from_replica()
+        assert self.router.db_for_read(Title) == replica
+
+
+@pytest.mark.django_db(transaction=True, databases=('default', REPLICA))
+class TestReplicaReads:
+
+    def test_safe_methods_read_from_replica(self, guest_client, titles):
+        response = guest_client.get('/api/v1/titles/')
+        assert [item['name'] for item in response.json()['results']] == [
+            'Реплика'
+        ], 'Проверьте, что GET-запросы к API читают из реплики'
+        response = guest_client.head(f'/api/v1/titles/{titles.id}/')
+        assert response.status_code == 200
+
+    def test_genres_read_from_replica(self, guest_client, replica, titles):
+        titles.genre.add(Genre.objects.create(name='Драма', slug='drama'))
+        genre = Genre.objects.using(replica).create(name='Комедия',
+                                                    slug='comedy')
+        Title.genre.through.objects.using(replica).create(title_id=titles.pk,
+                                                          genre=genre)
+        response = guest_client.get('/api/v1/titles/')
+        assert response.json()['results'][0]['genre'] == [
+            {'name': 'Комедия', 'slug': 'comedy'}
+        ], 'Проверьте, что жанры произведений читаются из реплики'
+
+    def test_writes_go_to_primary(self, admin_client, replica):
+        response = admin_client.post('/api/v1/titles/',
+                                     {'name': 'Новое', 'year': 2000})
+        assert response.status_code == 201, response.json()
+        assert Title.objects.using('default').filter(name='Новое').exists()
+        assert not Title.objects.using(replica).exists()
+
+    def test_user_reads_own_writes(self, user_client, another_user_client,
+                                   titles, settings):
+        url = f'/api/v1/titles/{titles.id}/reviews/'
+        response = user_client.post(url, {'text': 'Отлично', 'score': 9})
+        assert response.status_code == 201, response.json()
+
+        assert user_client.get(url).json()['count'] == 1, (
+            'Проверьте, что после записи пользователь читает из основной '
+            'базы и видит свой отзыв'
+        )
+        assert another_user_client.get(url).json()['count'] == 0, (
+            'Проверьте, что другие пользователи читают из реплики'
+        )
+        settings.DATABASE_REPLICA_PIN_SECONDS = 0
+        assert user_client.get(url).json()['count'] == 0, (
+            'Проверьте, что пользователь возвращается к реплике, когда '
+            'окно после записи истекло'
+        )
+
+    def test_pin_is_shared_between_processes(self, user, user_client,
+                                             titles, settings):
+        VersionStore(settings.VERSION_STORE_PATH).set_many({
+            routers.PIN_KEY.format(user.pk): time.time_ns()
+        })
+        response = user_client.get(f'/api/v1/titles/{titles.id}/')
+        assert response.json()['name'] == 'Основная база', (
+            'Проверьте, что пользователь, записавший данные в другом '
+            'процессе, читает из основной базы'
+        )
+
+    def test_lagging_response_is_not_cached(self, guest_client, replica,
+                                            titles):
+        # The title was just created, so the replica may not have it yet.
+        response = guest_client.get('/api/v1/titles/')
+        assert 'ETag' not in response
+        Title.objects.using(replica).filter(pk=titles.pk).update(
+            name='Догнала'
+        )
+        response = guest_client.get('/api/v1/titles/')
+        assert response.json()['results'][0]['name'] == 'Догнала', (
+            'Проверьте, что ответ из отстающей реплики не кешируется'
+        )
@@ -0,0 +1,66 @@
+import time
+
+import pytest
+
+from api import cache
+from api.models import Category, Genre, Review, Title
+from api.stores import VersionStore
+
+
+@pytest.mark.django_db(transaction=True)
+class TestResponseCache:
+
+    def test_titles_list_is_cached(self, guest_client, title,
+                                   django_assert_num_queries):
+        guest_client.get('/api/v1/titles/?year=1895&genre=drama')
+        with django_assert_num_queries(0):
+            response = guest_client.get(
+                '/api/v1/titles/?genre=drama&year=1895&page='
+            )
+        assert response.json()['count'] == 1, (
+            'Проверьте, что кэш учитывает нормализованные параметры запроса'
+        )
+        response = guest_client.get('/api/v1/titles/?genre=comedy&year=1')
+        assert response.json()['count'] == 0, (
+            'Проверьте, что разные фильтры кэшируются отдельно'
+        )
+
+    @pytest.mark.parametrize('change', (
+        lambda title, user: Title.objects.get(pk=title.pk).save(),
+        lambda title, user: title.genre.clear(),
+        lambda title, user: Genre.objects.get(slug='drama').save(),
+        lambda title, user: Category.objects.get().delete(),
+        lambda title, user: Review.objects.create(
+            title=title, author=user, text='Текст', score=5
+        ),
+    ))
+    def test_titles_cache_invalidation(self, guest_client, title, user,
+                                       django_assert_num_queries, change):
+        url = f'/api/v1/titles/{title.id}/'
+        guest_client.get(url)
+        change(title, user)
+        with django_assert_num_queries(2):
+            guest_client.get(url)
+
+    def test_categories_and_genres_invalidation(self, guest_client,
+                                                admin_client, category,
+                                                genres):
+        assert guest_client.get('/api/v1/categories/').json()['count'] == 1
+        assert guest_client.get('/api/v1/genres/').json()['count'] == 2
+        admin_client.post('/api/v1/categories/',
+                          {'name': 'Книга', 'slug': 'books'})
+        admin_client.delete('/api/v1/genres/drama/')
+        assert guest_client.get('/api/v1/categories/').json()['count'] == 2
+        assert guest_client.get('/api/v1/genres/').json()['count'] == 1
+
+    def test_versions_are_shared_between_processes(self, guest_client,
+                                                   title, settings,
+                                                   django_assert_num_queries):
+        url = f'/api/v1/titles/{title.id}/'
+        guest_client.get(url)
+        # Another worker process has its own connection to the store.
+        VersionStore(settings.VERSION_STORE_PATH).set_many({
+            cache.VERSION_KEY.format(cache.TITLES): time.time_ns()
+        })
+        with django_assert_num_queries(2):
+            guest_client.get(url)
@@ -0,0 +1,54 @@
+import pytest
+
+from api.models import Title
+
+
+@pytest.fixture
+def catalogue(category):
+    return [
+        Title.objects.create(name='Прибытие поезда', category=category,
+                             description='Короткий фильм'),
+        Title.objects.create(name='Политый поливальщик', category=category,
+                             description='Комедия о поезде и садовнике'),
+        Title.objects.create(name='Выход рабочих', category=category,
+                             description='Рабочие выходят с фабрики'),
+    ]
+
+
+@pytest.mark.django_db
+class TestTitleSearch:
+
+    def _names(self, client, query):
+        response = client.get('/api/v1/titles/', {'search': query})
+        assert response.status_code == 200
+        return [item['name'] for item in response.json()['results']]
+
+    def test_ranked_search(self, guest_client, catalogue):
+        assert self._names(guest_client, 'поезд') == [
+            'Прибытие поезда', 'Политый поливальщик'
+        ], 'Проверьте, что совпадения в названии ранжируются выше'
+
+    def test_prefix_and_all_words(self, guest_client, catalogue):
+        assert self._names(guest_client, 'раб фабрики') == ['Выход рабочих']
+        assert self._names(guest_client, 'поезд фабрики') == []
+
+    def test_index_follows_changes(self, guest_client, catalogue):
+        catalogue[2].name = 'Кормление ребёнка'
+        catalogue[2].save()
+        catalogue[0].delete()
+        assert self._names(guest_client, 'кормление') == [
+            'Кормление ребёнка'
+        ]
+        assert self._names(guest_client, 'прибытие') == []
+
+    def test_search_with_other_filters(self, guest_client, catalogue,
+                                       genres):
+        catalogue[1].genre.set(genres)
+        response = guest_client.get('/api/v1/titles/',
+                                    {'search': 'поезд', 'genre': 'drama'})
+        data = response.json()
+        assert data['count'] == 1
+        assert data['results'][0]['name'] == 'Политый поливальщик'
+
+    def test_query_without_words(self, guest_client, catalogue):
+        assert self._names(guest_client, '"*') == []
@@ -1,3 +1,5 @@
+import importlib
+
 from api_yamdb import settings
 
 
@@ -9,3 +11,16 @@ class TestSettings:
         assert settings.DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql', (
             'Проверьте, что используете базу данных PostgreSql'
         )
+
+    def test_empty_cache_variables(self, monkeypatch):
+        monkeypatch.setenv('CACHE_BACKEND', '')
+        monkeypatch.setenv('CACHE_LOCATION', '')
+        try:
+            cache = importlib.reload(settings).CACHES['default']
+        finally:
+            monkeypatch.undo()
+            importlib.reload(settings)
+        assert cache == {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': '',
+        }, 'Проверьте, что пустые переменные окружения кэша не ломают запуск'
@@ -0,0 +1,76 @@
+import multiprocessing
+
+import pytest
+
+from api.throttling import TokenBucketStore
+
+ATTEMPTS_PER_PROCESS = 40
+PROCESSES = 4
+CAPACITY = 50
+
+
+def _consume(path, results):
+    store = TokenBucketStore(path)
+    allowed = sum(
+        store.consume('user_1', CAPACITY, CAPACITY / 3600)[0]
+        for _ in range(ATTEMPTS_PER_PROCESS)
+    )
+    results.put(allowed)
+
+
+class TestTokenBucketStore:
+
+    def test_refill(self, tmp_path):
+        store = TokenBucketStore(str(tmp_path / 'buckets.sqlite3'))
+        assert store.consume('key', 2, 1, now=100) == (True, 0)
+        assert store.consume('key', 2, 1, now=100) == (True, 0)
+        assert store.consume('key', 2, 1, now=100) == (False, 1)
+        assert store.consume('key', 2, 1, now=100.5) == (False, 0.5)
+        assert store.consume('key', 2, 1, now=101)[0]
+        assert store.consume('other', 2, 1, now=101)[0], (
+            'Проверьте, что ключи ограничиваются независимо'
+        )
+
+    def test_limit_is_global_across_processes(self, tmp_path):
+        path = str(tmp_path / 'buckets.sqlite3')
+        TokenBucketStore(path).consume('warm-up', 1, 1)
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        processes = [context.Process(target=_consume, args=(path, results))
+                     for _ in range(PROCESSES)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(30)
+        allowed = sum(results.get(timeout=5) for _ in processes)
+        assert allowed == CAPACITY, (
+            'Проверьте, что лимит соблюдается суммарно по всем процессам'
+        )
+
+
+@pytest.mark.django_db
+class TestThrottledViews:
+
+    def test_auth_views_are_throttled(self, guest_client):
+        responses = [
+            guest_client.post('/api/v1/auth/token/', {}).status_code
+            for _ in range(31)
+        ]
+        assert responses[:30] == [400] * 30
+        assert responses[30] == 429, (
+            'Проверьте, что функции аутентификации ограничены по частоте'
+        )
+        response = guest_client.post('/api/v1/auth/email/', {})
+        assert response.status_code == 429
+        assert int(response['Retry-After']) > 0
+
+    def test_employees_are_not_throttled(self, admin_client):
+        assert all(
+            admin_client.get('/api/v1/genres/').status_code == 200
+            for _ in range(61)
+        )
+
+    def test_users_are_throttled(self, user_client):
+        responses = [user_client.get('/api/v1/genres/').status_code
+                     for _ in range(61)]
+        assert responses.count(429) == 1
@@ -0,0 +1,84 @@
+import pytest
+
+from api.models import Review, Title
+
+
+@pytest.fixture
+def rated_titles(category, genres, user, another_user):
+    titles = [
+        Title.objects.create(name='Бета', year=1999, category=category),
+        Title.objects.create(name='Альфа', year=2005),
+        Title.objects.create(name='Гамма', year=1990, category=category),
+        Title.objects.create(name='Дельта', year=2010, category=category),
+    ]
+    titles[0].genre.set(genres[:1])
+    titles[2].genre.set(genres[:2])
+    for title, scores in zip(titles, ((7, 8), (10,), (3, 4), ())):
+        for author, score in zip((user, another_user), scores):
+            Review.objects.create(title=title, author=author, text='Текст',
+                                  score=score)
+    return titles
+
+
+@pytest.mark.django_db
+class TestTitleOrdering:
+
+    def _names(self, client, **params):
+        response = client.get('/api/v1/titles/', params)
+        assert response.status_code == 200, response.json()
+        return [item['name'] for item in response.json()['results']]
+
+    def test_stored_rating(self, rated_titles):
+        Title.objects.filter(pk=rated_titles[0].pk).update(rating_mean=0)
+        assert Title.objects.with_rating_drift().count() == 1
+        Title.objects.recalculate_ratings()
+        assert list(Title.objects.order_by('id').values_list(
+            'rating_mean', flat=True
+        )) == [7.5, 10, 3.5, 0]
+        rated_titles[1].reviews.get().delete()
+        rated_titles[3].reviews.create(author=rated_titles[0].reviews.first()
+                                       .author, text='Текст', score=6)
+        assert list(Title.objects.order_by('id').values_list(
+            'rating_mean', flat=True
+        )) == [7.5, 0, 3.5, 6], (
+            'Проверьте, что средняя оценка обновляется вместе с отзывами'
+        )
+
+    def test_ordering(self, guest_client, rated_titles):
+        assert self._names(guest_client, ordering='-rating') == [
+            'Альфа', 'Бета', 'Гамма', 'Дельта'
+        ]
+        assert self._names(guest_client, ordering='rating') == [
+            'Дельта', 'Гамма', 'Бета', 'Альфа'
+        ]
+        assert self._names(guest_client, ordering='year') == [
+            'Гамма', 'Бета', 'Альфа', 'Дельта'
+        ]
+        assert self._names(guest_client, ordering='name') == [
+            'Альфа', 'Бета', 'Гамма', 'Дельта'
+        ]
+        assert self._names(guest_client) == [
+            'Дельта', 'Гамма', 'Альфа', 'Бета'
+        ], 'Проверьте, что по умолчанию новые произведения идут первыми'
+        response = guest_client.get('/api/v1/titles/', {'ordering': 'id'})
+        assert response.status_code == 400
+
+    def test_filters(self, guest_client, rated_titles, category, genres):
+        assert self._names(guest_client, rating_min=5,
+                           ordering='-rating') == ['Альфа', 'Бета']
+        assert self._names(guest_client, rating_max=7.5,
+                           ordering='-rating') == ['Бета', 'Гамма'], (
+            'Проверьте, что произведения без отзывов не попадают в выборку '
+            'по максимальному рейтингу'
+        )
+        assert self._names(guest_client, year_min=1995, year_max=2005,
+                           ordering='year') == ['Бета', 'Альфа']
+        assert self._names(guest_client, category=category.slug,
+                           ordering='-rating') == ['Бета', 'Гамма', 'Дельта']
+        assert self._names(guest_client, genre=genres[0].slug,
+                           ordering='-rating') == ['Бета', 'Гамма']
+
+    def test_rating_ten(self, guest_client, rated_titles):
+        response = guest_client.get(f'/api/v1/titles/{rated_titles[1].id}/')
+        assert response.status_code == 200
+        assert response.json()['rating'] == 10
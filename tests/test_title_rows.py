@@ -0,0 +1,69 @@
+import pytest
+from django.db import connection
+from rest_framework.renderers import JSONRenderer
+
+from api import serializers
+from api.models import Review, Title
+from api.serializers import (TITLE_COLUMNS, TitleRowSerializer,
+                             TitlesSafeMethodSerializer, genre_batches,
+                             group_genres)
+
+
+def render(data):
+    return JSONRenderer().render(data)
+
+
+@pytest.fixture
+def catalogue(title, reviews, another_user):
+    Review.objects.filter(author=another_user).update(score=8)
+    Title.objects.recalculate_ratings()
+    Title.objects.create(name='Без категории', year=None)
+    Title.objects.create(name='Книга', description='').genre.set(
+        title.genre.all()[:1]
+    )
+    return Title.objects.order_by('-id')
+
+
+@pytest.mark.django_db
+class TestTitleRowSerializer:
+
+    def test_matches_model_serializer(self, catalogue):
+        expected = TitlesSafeMethodSerializer(catalogue, many=True).data
+        rows = catalogue.values(*TITLE_COLUMNS)
+        assert render(TitleRowSerializer(rows, many=True).data) == render(
+            expected
+        ), 'Проверьте, что быстрый сериализатор выдаёт те же байты'
+        assert render(TitleRowSerializer(rows[2]).data) == render(
+            TitlesSafeMethodSerializer(catalogue[2]).data
+        )
+
+    def test_views(self, guest_client, catalogue):
+        response = guest_client.get('/api/v1/titles/')
+        assert render(response.data['results']) == render(
+            TitlesSafeMethodSerializer(catalogue, many=True).data
+        )
+        title = catalogue.last()
+        response = guest_client.get(f'/api/v1/titles/{title.id}/')
+        assert response.content == render(
+            TitlesSafeMethodSerializer(title).data
+        )
+        assert guest_client.get('/api/v1/titles/0/').status_code == 404
+
+
+class TestGroupGenres:
+
+    def test_batches_are_split_and_padded(self, monkeypatch):
+        monkeypatch.setattr(connection.features, 'max_query_params', 5)
+        assert list(genre_batches(connection, [1, 2, 3, 4, 5, 6, 7])) == [
+            [1, 2, 3, 4], [5, 6, 7, 7]
+        ], ('Проверьте, что списки IN не превышают лимит параметров и '
+            'дополняются до степени двойки')
+
+    @pytest.mark.django_db
+    def test_several_batches(self, catalogue, monkeypatch):
+        title_ids = list(catalogue.values_list('id', flat=True))
+        expected = group_genres(title_ids)
+        monkeypatch.setattr(serializers, 'GENRES_MAX_BATCH', 2)
+        monkeypatch.setattr(serializers, '_genres_sql', {})
+        assert group_genres(title_ids) == expected
+        assert {size for _, size in serializers._genres_sql} <= {1, 2}
@@ -0,0 +1,65 @@
+import pytest
+from rest_framework.pagination import PageNumberPagination
+
+from api.models import Category, Genre, Title
+
+
+@pytest.fixture
+def many_titles(genres):
+    categories = [
+        Category.objects.create(name=f'Категория {i}', slug=f'category-{i}')
+        for i in range(3)
+    ]
+    extra_genre = Genre.objects.create(name='Мюзикл', slug='musical')
+    titles = []
+    for i in range(25):
+        title = Title.objects.create(name=f'Произведение {i}', year=2000 + i,
+                                     category=categories[i % 3])
+        title.genre.set(genres if i % 2 else [genres[0], extra_genre])
+        titles.append(title)
+    return titles
+
+
+@pytest.mark.django_db
+class TestTitlesQueries:
+
+    @pytest.mark.parametrize('query', (
+        '',
+        '?page=2',
+        '?genre=drama',
+        '?genre=comedy,musical',
+        '?genre=drama,musical&genre_mode=all',
+        '?category=category-1',
+        '?name=Произведение&year=2001',
+    ))
+    def test_list_queries(self, guest_client, many_titles,
+                          django_assert_num_queries, query):
+        # COUNT для пагинации, страница с категориями, жанры одним запросом.
+        with django_assert_num_queries(3):
+            response = guest_client.get(f'/api/v1/titles/{query}')
+        assert response.status_code == 200
+        assert response.json()['results'], (
+            'Проверьте, что фильтры возвращают произведения'
+        )
+
+    @pytest.mark.parametrize('page_size', (1, 10, 25))
+    def test_list_queries_do_not_depend_on_page_size(
+            self, guest_client, many_titles, genres, monkeypatch,
+            django_assert_num_queries, page_size):
+        monkeypatch.setattr(PageNumberPagination, 'page_size', page_size)
+        with django_assert_num_queries(3):
+            response = guest_client.get('/api/v1/titles/?genre=drama')
+        results = response.json()['results']
+        assert len(results) == page_size
+        assert all(
+            {'name': 'Драма', 'slug': 'drama'} in result['genre']
+            for result in results
+        )
+
+    def test_detail_queries(self, guest_client, title,
+                            django_assert_num_queries):
+        with django_assert_num_queries(2):
+            response = guest_client.get(f'/api/v1/titles/{title.id}/')
+        data = response.json()
+        assert data['category'] == {'name': 'Фильм', 'slug': 'films'}
+        assert len(data['genre']) == 2